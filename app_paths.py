@@ -0,0 +1,28 @@
+import os
+import sys
+from pathlib import Path
+
+
+def project_root() -> Path:
+    """Directory holding the bundled project files (PyInstaller extracts them to sys._MEIPASS)."""
+    meipass = getattr(sys, "_MEIPASS", None)
+    if meipass:
+        return Path(meipass)
+    return Path(__file__).parent.resolve()
+
+
+def user_data_dir(*parts) -> Path:
+    """
+    Per-user writable directory for caches and profiles
+    (%LOCALAPPDATA%\\OBDPlus on Windows, ~/.obdplus elsewhere).
+    The directory is created on first use.
+    """
+    base = os.environ.get("OBDPLUS_DATA_DIR")
+    if not base:
+        if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+            base = os.path.join(os.environ["LOCALAPPDATA"], "OBDPlus")
+        else:
+            base = os.path.join(os.path.expanduser("~"), ".obdplus")
+    path = Path(base).joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -1,7 +1,13 @@
+import socket
+import threading
+import time
+
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
 RENDER_API_URL = "https://obdpluscloud.onrender.com/explain"  # Replace with your real Render URL
+# Service root, used for warm-up pings and half-open health probes
+RENDER_HEALTH_URL = RENDER_API_URL.rsplit("/", 1)[0] + "/"
 
 # Session with light retry policy to avoid long blocking
 _session = requests.Session()
@@ -10,19 +16,316 @@ _session.mount("https://", HTTPAdapter(max_retries=_retries))
 _session.mount("http://", HTTPAdapter(max_retries=_retries))
 
 
+class CircuitBreaker:
+    """
+    Tracks the health of the cloud service.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open it.
+    open      -> calls fail immediately. After `reset_timeout` seconds (on a timer,
+                 so recovery does not wait for the next call) a single background
+                 probe is sent (half_open); success closes the circuit, failure
+                 re-opens it with the timeout doubled (up to `max_reset_timeout`).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 2, reset_timeout: float = 20.0,
+                 max_reset_timeout: float = 300.0, probe_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe_timeout = probe_timeout
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._last_error = None
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        self._timer = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a real request may be sent now. Kicks off a probe when one is due."""
+        probe = False
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+                self._state = self.HALF_OPEN
+                probe = True
+        if probe:
+            self.schedule_probe()
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._reset_timeout = self.base_reset_timeout
+            self._last_error = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._last_error = str(error) if error else self._last_error
+            if self._state == self.HALF_OPEN:
+                self._reset_timeout = min(self._reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold and self._state == self.CLOSED:
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        print(f"[cloud] Circuit open for {self._reset_timeout:.0f}s: {self._last_error}")
+        # Probe when the timeout runs out, whether or not anything calls allow() by then
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self._reset_timeout, self.allow)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def schedule_probe(self) -> bool:
+        """Run probe() in the background. False if one is already running."""
+        with self._lock:
+            if self._probe_thread is not None and self._probe_thread.is_alive():
+                return False
+            self._probe_thread = threading.Thread(target=self.probe, name="cloud-probe", daemon=True)
+            self._probe_thread.start()
+        return True
+
+    def probe(self):
+        """One health check; its result closes or (re)opens the circuit like a real call."""
+        try:
+            res = requests.get(RENDER_HEALTH_URL, timeout=self.probe_timeout)
+            if res.status_code >= 500:
+                self.record_failure(f"health probe returned {res.status_code}")
+            else:
+                self.record_success()
+        except requests.exceptions.RequestException as e:
+            self.record_failure(e)
+
+    def status(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self._reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "retry_in": round(retry_in, 1),
+                "last_error": self._last_error,
+            }
+
+
+breaker = CircuitBreaker()
+
+
+def warm_up():
+    """
+    Fire-and-forget ping to wake the (cold-starting) cloud service so it is hot
+    by the time an explanation is requested. Also feeds the circuit breaker.
+    Never blocks; a probe already in progress is not duplicated.
+    """
+    breaker.schedule_probe()
+
+
+def _unavailable_error():
+    st = breaker.status()
+    msg = "Explain service is currently unavailable"
+    if st["retry_in"]:
+        msg += f"; retrying in the background (next check in {st['retry_in']:.0f}s)"
+    if st["last_error"]:
+        msg += f". Last error: {st['last_error']}"
+    return {"error": msg}
+
+
+def _is_service_failure(exc) -> bool:
+    # 4xx answers mean the service is up; only transport errors and 5xx count against it
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return isinstance(exc, requests.exceptions.RequestException)
+
+
+class ExplainJob:
+    """
+    Handle for one in-flight streamed explanation so another request thread
+    can cancel it. Cancelling closes the upstream response, which unblocks the
+    thread reading it.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.cancelled = threading.Event()
+        self._response = None
+        self._lock = threading.Lock()
+
+    def attach(self, response):
+        with self._lock:
+            self._response = response
+        if self.cancelled.is_set():
+            _abort_response(response)
+
+    def cancel(self):
+        self.cancelled.set()
+        with self._lock:
+            response = self._response
+        if response is not None:
+            _abort_response(response)
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _abort_response(res):
+    try:
+        sock = res.raw._connection.sock
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass
+    try:
+        res.close()
+    except Exception:
+        pass
+
+
+def start_job(job_id):
+    """Register an explain job under `job_id` (any client-chosen string)."""
+    job = ExplainJob(job_id)
+    if job_id:
+        with _jobs_lock:
+            _jobs[job_id] = job
+    return job
+
+
+def finish_job(job):
+    with _jobs_lock:
+        if _jobs.get(job.job_id) is job:
+            del _jobs[job.job_id]
+
+
+def cancel_job(job_id) -> bool:
+    """Cancel an in-flight explain job. Returns False if it is unknown or already finished."""
+    with _jobs_lock:
+        job = _jobs.pop(job_id, None)
+    if job is None:
+        return False
+    job.cancel()
+    return True
+
+
 def get_dtc_explanation_from_cloud(code, freeze_frame, timeout: int = 60):
     """
     Sends DTC + freeze frame data to Render backend for explanation.
     Returns a JSON dict with 'explanation' or {'error': <message>}.
     Uses a timeout (default 60s) to allow slower provider responses when needed.
+    Fails immediately while the circuit breaker reports the service as down.
     """
+    if not breaker.allow():
+        return _unavailable_error()
+
     payload = {"code": code, "freeze_frame": freeze_frame}
 
     try:
         res = _session.post(RENDER_API_URL, json=payload, timeout=timeout)
         res.raise_for_status()
+        breaker.record_success()
         return res.json()
     except requests.exceptions.RequestException as e:
+        if _is_service_failure(e):
+            breaker.record_failure(e)
         return {"error": f"Cloud request failed: {e}"}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+def _sse_data(lines):
+    """
+    Data of each server-sent event: its `data:` lines joined with newlines, one
+    optional leading space removed per line (so <pre> fragments keep their layout).
+    """
+    data = []
+    for line in lines:
+        if line is None:
+            continue
+        if not line:
+            # A blank line ends the event
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue  # comment / keep-alive
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data.append(value)
+    if data:
+        # Stream closed without the final blank line: keep what arrived
+        yield "\n".join(data)
+
+
+def stream_dtc_explanation_from_cloud(code, freeze_frame, timeout: int = 60, job=None):
+    """
+    Streams the explanation for a DTC from the Render backend.
+    Yields dicts: {'html': <fragment>} as fragments arrive, or a single
+    {'error': <message>} on failure. If the service answers with a plain JSON
+    document (non-streaming deployment) the whole explanation is yielded once.
+    `timeout` applies per read, so a slow but steadily streaming answer is not cut off.
+    If an ExplainJob is given, cancelling it ends the stream early without an error.
+    Fails immediately while the circuit breaker reports the service as down.
+    """
+    if job is not None and job.cancelled.is_set():
+        return
+    if not breaker.allow():
+        yield _unavailable_error()
+        return
+
+    payload = {"code": code, "freeze_frame": freeze_frame, "stream": True}
+    headers = {"Accept": "text/event-stream, text/html, application/json"}
+
+    try:
+        with _session.post(RENDER_API_URL, json=payload, headers=headers,
+                           timeout=(10, timeout), stream=True) as res:
+            if job is not None:
+                job.attach(res)
+                if job.cancelled.is_set():
+                    return
+            res.raise_for_status()
+            breaker.record_success()
+            ctype = res.headers.get("Content-Type", "")
+            if "text/event-stream" in ctype:
+                for fragment in _sse_data(res.iter_lines(chunk_size=None, decode_unicode=True)):
+                    yield {"html": fragment}
+            elif ctype.startswith("text/"):
+                for chunk in res.iter_content(chunk_size=None, decode_unicode=True):
+                    if chunk:
+                        yield {"html": chunk}
+            else:
+                body = res.json()
+                if isinstance(body, dict) and body.get("error"):
+                    yield {"error": body.get("error")}
+                elif isinstance(body, dict):
+                    yield {"html": body.get("explanation") or body.get("html") or str(body)}
+                else:
+                    yield {"html": str(body)}
+    except requests.exceptions.RequestException as e:
+        if job is None or not job.cancelled.is_set():
+            if _is_service_failure(e):
+                breaker.record_failure(e)
+            yield {"error": f"Cloud request failed: {e}"}
+    except Exception as e:
+        if job is None or not job.cancelled.is_set():
+            yield {"error": str(e)}
@@ -0,0 +1,261 @@
+"""
+Offline DTC knowledge base.
+
+The curated seed in data/dtc_kb.json (causes, fixes and related sensors per code,
+plus per-subsystem fallbacks) is merged with python-obd's table of generic code
+descriptions and compiled once into an indexed SQLite file (FTS5 full-text index
+when the sqlite build supports it). The compiled file lives in the user data dir
+and is keyed by the seed content hash, so edits to the seed rebuild it automatically.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from app_paths import project_root, user_data_dir
+
+SEED_PATH = project_root() / "data" / "dtc_kb.json"
+_SCHEMA_VERSION = 1
+
+_CODE_RE = re.compile(r"^[PBCU][0-9A-F]{4}$")
+# A lone system letter or a letter plus a digit; "BAD", "CAB" or "FACE" are words, not codes
+_CODE_PREFIX_RE = re.compile(r"^[PBCU]([0-9][0-9A-F]{0,3})?$")
+
+_db = None
+_db_lock = threading.Lock()
+_has_fts = False
+_seed = None
+
+
+def normalize_code(code) -> str:
+    return str(code or "").strip().upper()
+
+
+def is_valid_code(code) -> bool:
+    return bool(_CODE_RE.match(normalize_code(code)))
+
+
+def _load_seed():
+    global _seed
+    if _seed is None:
+        with open(SEED_PATH, "r", encoding="utf-8") as f:
+            _seed = json.load(f)
+    return _seed
+
+
+def _generic_descriptions():
+    # python-obd ships SAE descriptions for the generic P0/P2/P3/U0 ranges
+    try:
+        from obd.codes import DTC
+        return dict(DTC)
+    except Exception as e:
+        print(f"[dtc_knowledge] python-obd code table unavailable: {e}")
+        return {}
+
+
+def _category(code, categories):
+    for key in (code[:3], code[:2], code[:1]):
+        if key in categories:
+            return categories[key]
+    return {}
+
+
+def _db_path():
+    with open(SEED_PATH, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(str(_SCHEMA_VERSION).encode())
+    return user_data_dir("cache") / f"dtc_kb-{digest.hexdigest()[:12]}.sqlite"
+
+
+def _fts5_available(conn) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _populate(conn) -> bool:
+    """Create and fill the tables on an open (empty) connection.
+    Returns False when python-obd's generic descriptions were not available."""
+    seed = _load_seed()
+    systems = seed.get("systems", {})
+    categories = seed.get("categories", {})
+    curated = seed.get("codes", {})
+
+    descriptions = _generic_descriptions()
+    codes = sorted(set(descriptions) | set(curated))
+
+    conn.execute(
+        "CREATE TABLE dtc (code TEXT PRIMARY KEY, system TEXT, area TEXT, description TEXT,"
+        " causes TEXT, fixes TEXT, sensors TEXT, source TEXT)"
+    )
+    rows = []
+    for code in codes:
+        cat = _category(code, categories)
+        entry = curated.get(code, {})
+        rows.append((
+            code,
+            systems.get(code[0], ""),
+            cat.get("area", ""),
+            entry.get("description") or descriptions.get(code, ""),
+            json.dumps(entry.get("causes") or cat.get("causes", [])),
+            json.dumps(entry.get("fixes") or cat.get("fixes", [])),
+            json.dumps(entry.get("sensors") or cat.get("sensors", [])),
+            "curated" if entry else "generic",
+        ))
+    conn.executemany("INSERT INTO dtc VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    if _fts5_available(conn):
+        conn.execute(
+            "CREATE VIRTUAL TABLE dtc_fts USING fts5(code, description, causes, fixes, sensors,"
+            " content='dtc', content_rowid='rowid')"
+        )
+        conn.execute("INSERT INTO dtc_fts(dtc_fts) VALUES ('rebuild')")
+    conn.commit()
+    return bool(descriptions)
+
+
+def build_database(path):
+    """Compile the seed + generic descriptions into an indexed SQLite file at `path`."""
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        complete = _populate(conn)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    if not complete:
+        # Don't persist a partial table; it would be reused until the seed changes
+        os.remove(tmp)
+        raise OSError("generic DTC descriptions unavailable; not caching")
+    os.replace(tmp, path)
+    return path
+
+
+def _get_db():
+    global _db, _has_fts
+    if _db is not None:
+        return _db
+    with _db_lock:
+        if _db is None:
+            try:
+                path = _db_path()
+                if not path.exists():
+                    build_database(path)
+                conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            except (OSError, sqlite3.Error) as e:
+                # Read-only or full disk: fall back to an in-memory copy
+                print(f"[dtc_knowledge] Using in-memory knowledge base: {e}")
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+                _populate(conn)
+            conn.row_factory = sqlite3.Row
+            _has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'dtc_fts'"
+            ).fetchone() is not None
+            _db = conn
+    return _db
+
+
+def _row_to_info(row):
+    return {
+        "code": row["code"],
+        "system": row["system"],
+        "area": row["area"],
+        "description": row["description"],
+        "causes": json.loads(row["causes"]),
+        "fixes": json.loads(row["fixes"]),
+        "sensors": json.loads(row["sensors"]),
+        "source": row["source"],
+    }
+
+
+def get_dtc_info(code):
+    """
+    Look up one code. Returns a dict (code, system, area, description, causes,
+    fixes, sensors, source) or None when `code` is not a valid DTC. Codes missing
+    from the table (e.g. manufacturer ranges) get their subsystem's generic entry.
+    """
+    code = normalize_code(code)
+    if not _CODE_RE.match(code):
+        return None
+    db = _get_db()
+    with _db_lock:
+        row = db.execute("SELECT * FROM dtc WHERE code = ?", (code,)).fetchone()
+    if row is not None:
+        return _row_to_info(row)
+
+    seed = _load_seed()
+    cat = _category(code, seed.get("categories", {}))
+    system = seed.get("systems", {}).get(code[0], "")
+    return {
+        "code": code,
+        "system": system,
+        "area": cat.get("area", ""),
+        "description": f"{cat.get('area') or system} fault (no specific description available)",
+        "causes": cat.get("causes", []),
+        "fixes": cat.get("fixes", []),
+        "sensors": cat.get("sensors", []),
+        "source": "category",
+    }
+
+
+def search_dtc(query, limit: int = 20):
+    """Search by code prefix (e.g. 'P03') or by words in descriptions, causes, fixes and sensors."""
+    q = str(query or "").strip()
+    if not q:
+        return []
+    limit = max(1, min(int(limit), 200))
+    db = _get_db()
+    with _db_lock:
+        rows = []
+        if _CODE_PREFIX_RE.match(q.upper()):
+            rows = db.execute(
+                "SELECT * FROM dtc WHERE code >= ? AND code < ? ORDER BY code LIMIT ?",
+                (q.upper(), q.upper() + "\uffff", limit),
+            ).fetchall()
+        # No code matched (or it was not code-shaped): search the text instead
+        if not rows and _has_fts:
+            terms = [t for t in re.findall(r"\w+", q) if t]
+            if not terms:
+                return []
+            match = " ".join('"{}"*'.format(t.replace('"', "")) for t in terms)
+            rows = db.execute(
+                "SELECT d.* FROM dtc_fts JOIN dtc d ON d.rowid = dtc_fts.rowid"
+                " WHERE dtc_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        elif not rows:
+            rows = db.execute(
+                "SELECT * FROM dtc WHERE description LIKE ? ORDER BY code LIMIT ?",
+                (f"%{q}%", limit),
+            ).fetchall()
+    return [_row_to_info(r) for r in rows]
+
+
+def render_explanation_html(info) -> str:
+    """Render a knowledge-base entry as the HTML shown in the explain dialog."""
+    esc = html.escape
+    parts = [f"<h2>{esc(info['code'])} &mdash; {esc(info['description'])}</h2>"]
+    subtitle = " &middot; ".join(esc(x) for x in (info.get("system"), info.get("area")) if x)
+    if subtitle:
+        parts.append(f"<p><i>{subtitle}</i></p>")
+    for title, key in (("Common causes", "causes"), ("Suggested fixes", "fixes")):
+        items = info.get(key) or []
+        if items:
+            parts.append(f"<h3>{title}</h3><ul>")
+            parts.extend(f"<li>{esc(i)}</li>" for i in items)
+            parts.append("</ul>")
+    if info.get("sensors"):
+        parts.append("<h3>Related sensors</h3><p>{}</p>".format(", ".join(esc(s) for s in info["sensors"])))
+    return "".join(parts)
+
+
+if __name__ == "__main__":
+    # Build-time helper: python dtc_knowledge.py  -> compiles the cache for this seed
+    print(build_database(_db_path()))
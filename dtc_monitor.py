@@ -0,0 +1,172 @@
+"""
+MIL-status-gated DTC monitoring.
+
+Reading the code lists (Modes 03/07/0A) is a multi-frame exchange per ECU.
+Instead of doing that on every refresh, a background thread polls Mode 01
+PID 01 (MIL state + confirmed DTC count, one short frame) every few seconds
+and only re-reads the lists when that status changes. Pending codes do not
+move the count, so the lists are also re-read on a slow safety interval.
+
+Every code that appears in or disappears from a list is recorded in a
+history table with its timestamp and published on the event hub (topic
+"dtc", types "appear" / "clear"), so clients see new codes within seconds.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import obd_functions
+from events import hub
+
+TOPIC = "dtc"
+KINDS = ("stored", "pending", "permanent")
+
+DEFAULT_STATUS_SECONDS = float(os.environ.get("OBDPLUS_DTC_STATUS_SECONDS", "5"))
+DEFAULT_FULL_REFRESH_SECONDS = float(os.environ.get("OBDPLUS_DTC_FULL_REFRESH_SECONDS", "300"))
+
+
+class DtcMonitor:
+    def __init__(self, status_interval: float = DEFAULT_STATUS_SECONDS,
+                 full_refresh: float = DEFAULT_FULL_REFRESH_SECONDS, history_size: int = 1000):
+        self.status_interval = status_interval
+        self.full_refresh = full_refresh
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        # Stop event of the current thread; each thread gets its own, so an old thread
+        # still blocked on the adapter never sees a restart as "keep going"
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._status = None       # last {"mil", "dtc_count"}
+        self._lists = None        # last {kind: [(code, desc)]}
+        self._status_time = None
+        self._lists_time = None
+        self.status_reads = 0
+        self.list_reads = 0
+
+    # --- lifecycle ---
+    def start(self, conn):
+        """Start watching `conn` (restarts if already running on another connection)."""
+        if self.running and self._conn is conn:
+            return
+        self.stop()
+        with self._lock:
+            self._conn = conn
+            self._status = self._lists = None
+            self._status_time = self._lists_time = None
+        stop = self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(conn, stop), name="dtc-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if wait and thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        with self._lock:
+            self._conn = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def invalidate(self):
+        """Force a list re-read on the next tick (e.g. after codes were cleared)."""
+        with self._lock:
+            self._status = None
+
+    # --- loop ---
+    def _run(self, conn, stop):
+        print("[dtc_monitor] started")
+        while not stop.is_set():
+            try:
+                self.check(conn)
+            except Exception as e:
+                print(f"[dtc_monitor] Error: {e}")
+            if stop.wait(self.status_interval):
+                break
+        print("[dtc_monitor] stopped")
+
+    def check(self, conn=None):
+        """One tick: read PID 01; re-read the lists if it changed (or the safety interval passed)."""
+        conn = conn if conn is not None else self._conn
+        if conn is None:
+            return
+        status = obd_functions.get_mil_status(conn)
+        now = time.time()
+        self.status_reads += 1
+        with self._lock:
+            if self._conn is not conn:
+                return  # stopped or restarted on another connection while reading
+            previous = self._status
+            stale = self._lists_time is None or now - self._lists_time >= self.full_refresh
+            if status is not None:
+                self._status, self._status_time = status, now
+        if status is None or (status == previous and not stale):
+            return
+        if previous is not None and status != previous:
+            hub.publish(TOPIC, {"type": "status", "time": now, **status})
+        self._refresh_lists(conn)
+
+    def _refresh_lists(self, conn):
+        lists = obd_functions.get_dtc_lists(conn)
+        now = time.time()
+        self.list_reads += 1
+        with self._lock:
+            if self._conn is not conn:
+                return
+            old = self._lists
+            self._lists, self._lists_time = lists, now
+            events = self._diff(old or {}, lists, now, initial=old is None)
+            self._history.extend(events)
+        for ev in events:
+            hub.publish(TOPIC, ev)
+
+    @staticmethod
+    def _diff(old, new, now, initial=False):
+        # The first read after start records the codes already present as "initial" appearances
+        events = []
+        for kind in KINDS:
+            before = dict(old.get(kind, []))
+            after = dict(new.get(kind, []))
+            for code in after.keys() - before.keys():
+                ev = {"type": "appear", "kind": kind, "code": code,
+                      "description": after[code], "time": now}
+                if initial:
+                    ev["initial"] = True
+                events.append(ev)
+            for code in before.keys() - after.keys():
+                events.append({"type": "clear", "kind": kind, "code": code,
+                               "description": before[code], "time": now})
+        return events
+
+    # --- read side ---
+    def current(self, kind: str = "stored"):
+        """Last list read for `kind` while running, else None (caller reads the adapter)."""
+        with self._lock:
+            if not self.running or self._lists is None:
+                return None
+            return list(self._lists.get(kind, []))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "status": self._status,
+                "status_time": self._status_time,
+                "lists": {k: list(v) for k, v in self._lists.items()} if self._lists else None,
+                "lists_time": self._lists_time,
+                "status_interval": self.status_interval,
+                "status_reads": self.status_reads,
+                "list_reads": self.list_reads,
+            }
+
+    def history(self, limit: int = None):
+        """Appear/clear events, oldest first."""
+        with self._lock:
+            events = list(self._history)
+        return events[-limit:] if limit else events
+
+
+monitor = DtcMonitor()
@@ -0,0 +1,242 @@
+"""
+Declarative DTC inference rules.
+
+Each rule is (code, description, condition, hold_seconds). The condition is a
+small expression over the variables in VARIABLES, written with NumPy
+operators (`&`, `|`, `~`, comparisons, `abs`, `between`). Conditions are
+parsed and compiled once, then evaluated over whole arrays of samples at a
+time: one call covers a single snapshot or hours of recorded data.
+
+A rule with hold_seconds > 0 only fires once its condition has held
+continuously for that long, so single noisy frames do not raise codes.
+Rules may also give a clear condition and clear hold (hysteresis for the
+streaming FaultMonitor); by default a fault clears once its condition has
+been false for the same hold time.
+"""
+import ast
+import threading
+
+import numpy as np
+
+# Expression variable -> live channel name
+VARIABLES = {
+    "rpm": "RPM",
+    "speed": "SPEED",
+    "coolant": "COOLANT_TEMP",
+    "intake": "INTAKE_TEMP",
+    "maf": "MAF",
+    "throttle": "THROTTLE_POS",
+    "stft": "SHORT_FUEL_TRIM_1",
+    "ltft": "LONG_FUEL_TRIM_1",
+    "o2s1": "O2_B1S1",
+    "o2s2": "O2_B1S2",
+    "timing": "TIMING_ADVANCE",
+    "fuel_pressure": "FUEL_PRESSURE",
+}
+
+# (code, description, condition, hold_seconds[, clear_condition[, clear_hold_seconds]])
+RULES = [
+    # --- Fuel mixture and airflow ---
+    ("P0171", "System Too Lean Bank 1", "(maf < 0.6) & (ltft > 10) & (stft > 8)", 5,
+     "(maf > 0.8) | (ltft < 8) | (stft < 6)"),
+    ("P0172", "System Too Rich (Bank 1)", "(maf > 3.5) & (ltft < -10) & (stft < -8)", 5,
+     "(maf < 3.0) | (ltft > -8) | (stft > -6)"),
+    ("P0101", "MAF Circuit Range/Performance", "(maf < 0.3) | (maf > 10.0)", 3,
+     "between(maf, 0.5, 9.0)"),
+    # --- Misfire / ignition ---
+    ("P0300", "Random Misfire Detected Code", "(rpm < 600) & (throttle < 5) & (timing < 10)", 3),
+    ("P0301", "Cylinder #1 Misfire", "(abs(stft) > 15) & (rpm < 650)", 3),
+    # --- Catalyst and O2 sensors ---
+    ("P0420", "Catalyst System Efficiency Below Threshold", "(abs(o2s1 - o2s2) < 0.1) & (o2s2 > 0.6)", 10),
+    ("P0133", "Oxygen Sensor Circuit Slow Response", "(abs(stft) > 12) & ((o2s1 < 0.2) | (o2s1 > 0.9))", 5),
+    # --- Cooling system ---
+    ("P0128", "Thermostat OBD-II Trouble Code", "(coolant < 70) & (speed > 20)", 10),
+    ("P0217", "Engine Over Temperature", "coolant > 105", 3, "coolant < 100", 10),
+    # --- Fuel system pressure ---
+    ("P0087", "Fuel Rail/System Pressure - Too Low", "(fuel_pressure < 35) & ((maf < 1.5) | (ltft > 12))", 3),
+    # --- Throttle / air intake ---
+    ("P2119", "Throttle Actuator Control Throttle Body Range", "(throttle < 5) & (rpm > 2500)", 2),
+    # --- Idle control ---
+    ("P0507", "Idle Air Control System RPM Higher Than Expected",
+     "between(rpm, 600, 900) & (abs(stft) > 10) & (maf < 0.5)", 5),
+    # --- Intake air temperature sensor ---
+    ("P0113", "IAT Sensor 1 Circuit High Input", "(intake < -10) | (intake > 60)", 3,
+     "between(intake, -5, 55)"),
+]
+
+
+def between(x, lo, hi):
+    """lo < x < hi (exclusive), element-wise."""
+    return (x > lo) & (x < hi)
+
+
+_FUNCTIONS = {"abs": np.abs, "between": between}
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name,
+    ast.Load, ast.Constant, ast.BitAnd, ast.BitOr, ast.Invert, ast.USub, ast.UAdd,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+def _compile_expression(code, expression):
+    """Parse and whitelist a rule expression; returns (code object, variable names)."""
+    tree = ast.parse(expression, mode="eval")
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.BoolOp, ast.Not)):
+            raise ValueError(f"{code}: use & / | / ~ instead of and / or / not in {expression!r}")
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{code}: unsupported syntax {type(node).__name__} in {expression!r}")
+        if isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+            if node.id not in VARIABLES:
+                raise ValueError(f"{code}: unknown variable {node.id!r}")
+            names.add(node.id)
+    return compile(tree, f"<rule {code}>", "eval"), names
+
+
+def _run(compiled, names, columns):
+    env = {name: columns[name] for name in names}
+    env.update(_FUNCTIONS)
+    return np.asarray(eval(compiled, {"__builtins__": {}}, env), dtype=bool)
+
+
+class CompiledRule:
+    __slots__ = ("code", "description", "condition", "hold", "clear", "clear_hold",
+                 "variables", "_code", "_clear_code", "_clear_names")
+
+    def __init__(self, code, description, condition, hold=0.0, clear=None, clear_hold=None):
+        self._code, names = _compile_expression(code, condition)
+        if clear:
+            self._clear_code, self._clear_names = _compile_expression(code, clear)
+        else:
+            self._clear_code, self._clear_names = None, names
+        self.code = code
+        self.description = description
+        self.condition = condition
+        self.hold = float(hold)
+        self.clear = clear
+        self.clear_hold = float(clear_hold) if clear_hold is not None else self.hold
+        self.variables = sorted(names | self._clear_names)
+
+    def evaluate(self, columns: dict) -> np.ndarray:
+        """Raw condition per sample (bool array) over `columns` (variable -> float array)."""
+        return _run(self._code, self.variables, columns)
+
+    def evaluate_clear(self, columns: dict) -> np.ndarray:
+        """Per sample: may an active fault clear? (explicit clear condition, else not condition)"""
+        if self._clear_code is None:
+            return ~self.evaluate(columns)
+        return _run(self._clear_code, self.variables, columns)
+
+
+_compiled = None
+_compile_lock = threading.Lock()
+
+
+def compiled_rules():
+    """RULES compiled once per process."""
+    global _compiled
+    if _compiled is None:
+        with _compile_lock:
+            if _compiled is None:
+                _compiled = [CompiledRule(*r) for r in RULES]
+    return _compiled
+
+
+def to_float(value, missing=np.nan) -> float:
+    """'12.5 kph' -> 12.5; anything unparsable -> `missing`."""
+    try:
+        return float(str(value).split(' ')[0])
+    except Exception:
+        return missing
+
+
+def columns_from_samples(samples, missing=np.nan) -> dict:
+    """
+    Build variable -> float array columns from either a list of snapshots
+    ({channel: value-text}) or a dict of {channel: sequence of numbers}.
+    """
+    if isinstance(samples, dict):
+        n = max((len(v) for v in samples.values()), default=0)
+        cols = {}
+        for var, channel in VARIABLES.items():
+            col = samples.get(channel)
+            cols[var] = (np.asarray(col, dtype=np.float64) if col is not None
+                         else np.full(n, missing, dtype=np.float64))
+        return cols
+    return {
+        var: np.fromiter((to_float(s.get(channel), missing) if channel in s else missing
+                          for s in samples), dtype=np.float64, count=len(samples))
+        for var, channel in VARIABLES.items()
+    }
+
+
+def held_mask(condition: np.ndarray, t: np.ndarray, hold: float) -> np.ndarray:
+    """
+    True where `condition` has been true continuously for at least `hold`
+    seconds (measured from the first sample of the current true run).
+    """
+    if hold <= 0 or not len(condition):
+        return condition
+    n = len(condition)
+    idx = np.arange(n)
+    # index of the most recent False at or before each sample (-1 if none)
+    last_false = np.maximum.accumulate(np.where(condition, -1, idx))
+    run_start = np.minimum(last_false + 1, n - 1)
+    return condition & ((t - t[run_start]) >= hold)
+
+
+def evaluate(columns: dict, t=None, rules=None, apply_hold: bool = True) -> dict:
+    """
+    Evaluate rules over sample columns (variable -> array, all the same length).
+    `t` are sample times in seconds (needed for hold semantics; without it the
+    hold is ignored). Returns {code: bool array of samples where the rule fires}.
+    """
+    rules = rules if rules is not None else compiled_rules()
+    ts = np.asarray(t, dtype=np.float64) if t is not None else None
+    out = {}
+    with np.errstate(invalid="ignore"):
+        for rule in rules:
+            cond = rule.evaluate(columns)
+            if apply_hold and ts is not None:
+                cond = held_mask(cond, ts, rule.hold)
+            out[rule.code] = cond if rule.code not in out else (out[rule.code] | cond)
+    return out
+
+
+def find_episodes(columns: dict, t, rules=None):
+    """
+    Intervals where each rule fired over recorded data:
+    list of (code, description, start_time, end_time), ordered by start time.
+    """
+    rules = rules if rules is not None else compiled_rules()
+    ts = np.asarray(t, dtype=np.float64)
+    fired = evaluate(columns, ts, rules)
+    desc = {r.code: r.description for r in rules}
+    episodes = []
+    for code, mask in fired.items():
+        if not mask.any():
+            continue
+        edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        episodes.extend((code, desc[code], float(ts[s]), float(ts[e])) for s, e in zip(starts, ends))
+    episodes.sort(key=lambda ep: ep[2])
+    return episodes
+
+
+def detect_snapshot(data: dict, missing: float = 0.0):
+    """
+    Codes whose condition holds for one snapshot ({channel: value-text}), as
+    [(code, description)] in table order. Hold times cannot apply to a single
+    frame and are ignored; missing values count as `missing` (0.0, as before).
+    """
+    cols = columns_from_samples([data or {}], missing=missing)
+    fired = evaluate(cols, apply_hold=False)
+    seen = set()
+    result = []
+    for rule in compiled_rules():
+        if rule.code not in seen and fired[rule.code][0]:
+            seen.add(rule.code)
+            result.append((rule.code, rule.description))
+    return result
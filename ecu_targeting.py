@@ -0,0 +1,96 @@
+"""
+ECU targeting for CAN vehicles.
+
+A Mode 01 request sent to the functional address (7DF / 18DB33F1) is
+answered by every emissions ECU that knows the PID; the adapter then waits
+for its timeout to be sure no further ECU answers, and python-obd decodes
+and discards the frames that are not from the engine ECU.
+
+ProfiledOBD learns which ECU answers each command the first time it is
+queried (the only functional request for that command). After that it
+sends the command physically to that ECU (`AT SH 7E0+n` / `DA xx F1`) with
+a matching CAN receive filter (`AT CRA 7E8+n` / `18DAF1xx`), so only one
+ECU is asked and only its frames reach the decoder. The learned map is
+stored in the vehicle profile, so a known car starts targeted.
+"""
+from lazy_import import lazy_module
+
+obd = lazy_module("obd")
+
+# python-obd protocol ids: ISO 15765-4 CAN with 11-bit ("6", "8") or 29-bit ("7", "9") ids
+CAN_11BIT = ("6", "8")
+CAN_29BIT = ("7", "9")
+# python-obd's ECU_HEADER.ENGINE: the header every stock command carries
+DEFAULT_HEADER = b"7E0"
+# SAE J1979 services (01-0A); anything else (Mode 22...) is manufacturer-specific
+SAE_MODES = tuple(b"%02X" % m for m in range(0x01, 0x0B))
+
+
+def id_bits(protocol_id):
+    if protocol_id in CAN_11BIT:
+        return 11
+    if protocol_id in CAN_29BIT:
+        return 29
+    return None  # not CAN: targeting does not apply
+
+
+def functional_header(bits) -> bytes:
+    return b"7DF" if bits == 11 else b"DB33F1"
+
+
+def physical_header(bits, tx_id: int) -> bytes:
+    """Request header for the ECU that answers with `tx_id` (python-obd's frame.tx_id)."""
+    if bits == 11:
+        return b"%03X" % (0x7E0 + tx_id)
+    return b"DA%02XF1" % tx_id
+
+
+def receive_filter(bits, tx_id: int) -> bytes:
+    """CAN id of that ECU's responses, for `AT CRA`."""
+    if bits == 11:
+        return b"%03X" % (0x7E8 + tx_id)
+    return b"18DAF1%02X" % tx_id
+
+
+def response_filter(bits, header: bytes):
+    """Receive filter for the ECU a physical request `header` addresses; None if it is not one."""
+    header = bytes(header).upper()
+    if bits == 11 and len(header) == 3 and b"7E0" <= header <= b"7E7":
+        return receive_filter(bits, int(header, 16) - 0x7E0)
+    if bits == 29 and len(header) == 6 and header.startswith(b"DA") and header.endswith(b"F1"):
+        return receive_filter(bits, int(header[2:4], 16))
+    return None
+
+
+def with_header(cmd, header: bytes, ecu=None):
+    """Copy of an OBDCommand addressed with `header` (python-obd sends AT SH when it changes)."""
+    return obd.OBDCommand(
+        cmd.name, cmd.desc, cmd.command, cmd.bytes, cmd.decode,
+        cmd.ecu if ecu is None else ecu, cmd.fast, header,
+    )
+
+
+def responders(messages, cmd):
+    """tx ids (ints) of the ECUs whose answer `cmd` would decode, in response order."""
+    seen = []
+    for m in messages:
+        tx_id = getattr(m, "tx_id", None)
+        if tx_id is None or not m.data or not (cmd.ecu & m.ecu):
+            continue
+        if tx_id not in seen:
+            seen.append(tx_id)
+    return seen
+
+
+class Target:
+    __slots__ = ("command", "header", "rx_filter")
+
+    def __init__(self, command, header, rx_filter):
+        self.command = command
+        self.header = header
+        self.rx_filter = rx_filter
+
+
+def build_target(cmd, bits, tx_id: int) -> Target:
+    header = physical_header(bits, tx_id)
+    return Target(with_header(cmd, header), header, receive_filter(bits, tx_id))
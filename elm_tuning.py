@@ -0,0 +1,150 @@
+"""
+ELM327 low-latency tuning.
+
+By default an ELM327 ends every response by waiting out its receive timeout
+(AT ST, 200 ms) in case another frame or ECU answers. AdapterTuner:
+
+  * identifies the chip (AT I, and ST I for STN chips)
+  * enables adaptive timing (AT AT2, or AT AT1 on clones) and a tighter
+    timeout ceiling (AT ST, OBDPLUS_ELM_ST, default 0x19 = 100 ms)
+  * turns spaces off (AT S0): fewer bytes per frame on the serial link.
+    Echo and linefeeds are already off (python-obd's init); headers stay on
+    because python-obd needs them to tell ECUs apart
+  * learns how many frames each targeted request returns and appends that
+    count to the request (e.g. `010C1`), so the adapter returns as soon as
+    that many frames arrived instead of waiting for the timeout
+
+Clones misbehave in all of these. A request that fails with a count hint
+is retried without it and loses its hint; if that keeps happening hints
+are switched off. Repeated timeouts on commands that used to answer step
+the timing back (AT2 -> AT1 with the default timeout -> hints off).
+"""
+import os
+import re
+
+DEFAULT_ST = os.environ.get("OBDPLUS_ELM_ST", "19")
+STOCK_ST = "32"             # ELM327 power-on default (0x32 * 4 ms = 200 ms)
+MAX_HINT_FAILURES = 3       # hint failures before hints are off for the connection
+MAX_CONSECUTIVE_NULLS = 3   # timeouts on known-good commands before stepping the timing back
+
+# Genuine ELM327 firmware never had these versions; they are reported by clones
+_CLONE_VERSIONS = ("1.5", "2.1")
+
+
+def _key(cmd):
+    return bytes(cmd.header) + bytes(cmd.command)
+
+
+class AdapterTuner:
+    def __init__(self, conn, st: str = DEFAULT_ST):
+        self.conn = conn
+        self.st = st
+        self.version = None
+        self.stn = None
+        self.clone = False
+        self.level = 0          # 2 = AT2 + tight ST, 1 = AT1 + stock ST, 0 = untouched
+        self.hints = False
+        self.spaces_off = False
+        self._frames = {}       # request key -> frames in the last good response
+        self._no_hint = set()   # request keys that misbehaved with a count hint
+        self._known_good = set()
+        self._hint_failures = 0
+        self._nulls = 0
+
+    # --- raw adapter access ---
+    def _send(self, command: str):
+        """Send an AT command; returns the response lines or None if the adapter rejected it."""
+        try:
+            lines = self.conn.interface._ELM327__send(command.encode())
+        except Exception:
+            return None
+        lines = [str(line).strip() for line in lines or [] if str(line).strip()]
+        if not lines or any(line == "?" or "ERROR" in line.upper() for line in lines):
+            return None
+        return lines
+
+    # --- setup ---
+    def apply(self) -> dict:
+        """Probe the chip and apply the fastest settings it is expected to handle."""
+        ident = self._send("ATI")
+        if ident:
+            self.version = ident[-1]
+            m = re.search(r"v(\d+\.\d+)", self.version)
+            self.clone = bool(m and m.group(1) in _CLONE_VERSIONS)
+            stn = self._send("STI")
+            self.stn = stn[-1] if stn else None
+            if self.stn:
+                self.clone = False
+        self.spaces_off = self._send("ATS0") is not None
+        # Clones often drop frames with aggressive adaptive timing
+        self._set_level(1 if self.clone else 2)
+        self.hints = True
+        print(f"[elm_tuning] {self.version or 'unknown adapter'}"
+              f"{' / ' + self.stn if self.stn else ''}: {self.status()}")
+        return self.status()
+
+    def _set_level(self, level: int):
+        if level >= 2 and self._send("ATAT2") and self._send(f"ATST{self.st}"):
+            self.level = 2
+        elif level >= 1 and self._send("ATAT1") and self._send(f"ATST{STOCK_ST}"):
+            self.level = 1
+        else:
+            self.level = 0
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "stn": self.stn,
+            "clone": self.clone,
+            "adaptive_timing": {2: "AT2", 1: "AT1"}.get(self.level, "default"),
+            "st": self.st if self.level == 2 else STOCK_ST,
+            "spaces_off": self.spaces_off,
+            "response_count_hints": self.hints,
+            "hinted_requests": sum(1 for k in self._frames if k not in self._no_hint),
+        }
+
+    # --- per request ---
+    def hint(self, cmd):
+        """Expected frame count for `cmd`, or None to let the adapter time out as usual."""
+        if not self.hints:
+            return None
+        key = _key(cmd)
+        if key in self._no_hint:
+            return None
+        n = self._frames.get(key)
+        return n if n and n <= 0xF else None
+
+    def learn(self, cmd, response):
+        """Record the frame count of a good response (only for requests one ECU answers)."""
+        if response.is_null():
+            return
+        frames = sum(len(m.frames) for m in response.messages)
+        if frames:
+            self._frames[_key(cmd)] = frames
+
+    def hint_failed(self, cmd):
+        self._no_hint.add(_key(cmd))
+        self._hint_failures += 1
+        if self.hints and self._hint_failures >= MAX_HINT_FAILURES:
+            self.hints = False
+            print("[elm_tuning] Response count hints misbehave on this adapter; disabled")
+
+    def observe(self, cmd, response):
+        """Track timeouts on commands that used to answer and back the timing off if they pile up."""
+        key = _key(cmd)
+        if not response.is_null():
+            self._known_good.add(key)
+            self._nulls = 0
+            return
+        if key not in self._known_good:
+            return
+        self._nulls += 1
+        if self._nulls < MAX_CONSECUTIVE_NULLS:
+            return
+        self._nulls = 0
+        if self.level == 2:
+            self._set_level(1)
+            print("[elm_tuning] Responses lost with AT2; falling back to AT1 and the stock timeout")
+        elif self.hints:
+            self.hints = False
+            print("[elm_tuning] Responses still lost; response count hints disabled")
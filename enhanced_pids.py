@@ -0,0 +1,323 @@
+"""
+Manufacturer enhanced PIDs (Mode 22 ReadDataByIdentifier).
+
+Definitions are JSON: data/enhanced_pids.json plus any *.json in the user
+data directory's "pids" folder (a user channel with the same make and name
+replaces the bundled one). Each make lists the VIN prefixes (WMI) it applies
+to, named ECU headers and its channels:
+
+    {"name": "TRANS_FLUID_TEMP", "label": "...", "ecu": "TCM" (or "header": "7E1"),
+     "mode": "22", "did": "1E1C", "bytes": 2, "formula": "s16(A, B) / 16", "unit": "degC"}
+
+`bytes` is the length of the DID's data record; the formula sees its bytes
+as A, B, C... and may use s8(x), s16(hi, lo), abs, min and max. Formulas are
+compiled once into plain Python functions.
+
+EnhancedPoller turns the channels that apply to the connected vehicle into
+python-obd commands, several DIDs per request (`22 1E1C 1E12`) up to the
+make's max_dids_per_request; a CAN single frame caps that at 3. They are
+added to the connection's supported commands, so live polling queries (and
+pipelines) them like any Mode 01 channel. An ECU that rejects a batched
+request drops to one DID per request; a DID it rejects is dropped. Both are
+remembered in the vehicle profile.
+
+OBDPLUS_ENHANCED_PIDS=0 turns this off; OBDPLUS_ENHANCED_MAKE=<make> applies
+a make's channels regardless of the VIN.
+"""
+import ast
+import json
+import os
+import threading
+
+import ecu_targeting
+from app_paths import project_root, user_data_dir
+from lazy_import import lazy_module
+
+obd = lazy_module("obd")
+
+BUNDLED_PATH = project_root() / "data" / "enhanced_pids.json"
+DEFINITIONS_VERSION = 1
+DEFAULT_MODE = "22"
+# A single CAN frame holds 7 bytes: the service id and three 2-byte DIDs
+MAX_DIDS_PER_FRAME = 3
+MAX_MISSES = 3  # incomplete answers in a row before a batch is split / a lone DID dropped
+# Negative response codes meaning "not this DID / not this request"
+_NRC_REJECTED = (0x11, 0x12, 0x13, 0x31)
+
+_VARIABLES = "ABCDEFGH"
+
+
+def _s8(x):
+    return x - 0x100 if x & 0x80 else x
+
+
+def _s16(hi, lo):
+    v = (hi << 8) | lo
+    return v - 0x10000 if v & 0x8000 else v
+
+
+_FUNCTIONS = {"s8": _s8, "s16": _s16, "abs": abs, "min": min, "max": max}
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+)
+
+
+def compile_formula(name, formula, length):
+    """Whitelist `formula` and compile it into f(data) -> number, with A.. bound to data bytes."""
+    tree = ast.parse(formula, mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{name}: unsupported syntax {type(node).__name__} in {formula!r}")
+        if isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+            if node.id not in _VARIABLES[:length]:
+                raise ValueError(f"{name}: {node.id!r} is not one of its {length} data bytes")
+    # Unpack the bytes once and evaluate the expression as a plain function body
+    names = ", ".join(_VARIABLES[:length])
+    source = f"def decode(data):\n    {names}, = data\n    return {ast.unparse(tree)}\n"
+    env = {"__builtins__": {}}
+    env.update(_FUNCTIONS)
+    exec(compile(source, f"<pid {name}>", "exec"), env)
+    return env["decode"]
+
+
+class Channel:
+    __slots__ = ("name", "label", "header", "mode", "did", "length", "unit", "formula", "decode")
+
+    def __init__(self, name, header, did, length, formula, unit="", label=None, mode=DEFAULT_MODE):
+        self.name = name
+        self.label = label or name
+        self.header = header.upper().encode()
+        self.mode = mode.upper().encode()
+        self.did = int(did, 16)
+        self.length = int(length)
+        self.unit = unit
+        self.formula = formula
+        if not 1 <= self.length <= len(_VARIABLES):
+            raise ValueError(f"{name}: bytes must be 1-{len(_VARIABLES)}")
+        self.decode = compile_formula(name, formula, self.length)
+
+    def format(self, data) -> str:
+        value = self.decode(data)
+        return f"{round(value, 3):g} {self.unit}".strip()
+
+
+def _definition_files():
+    files = [BUNDLED_PATH]
+    files += sorted(user_data_dir("pids").glob("*.json"))
+    return files
+
+
+def _load_file(path, makes):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[enhanced_pids] Could not read {path}: {e}")
+        return
+    if doc.get("version") != DEFINITIONS_VERSION:
+        print(f"[enhanced_pids] {path}: unsupported definitions version {doc.get('version')!r}")
+        return
+    for entry in doc.get("makes", []):
+        make = makes.setdefault(entry["make"], {"make": entry["make"], "wmi": set(),
+                                                "max_dids": MAX_DIDS_PER_FRAME, "channels": {}})
+        make["wmi"].update(w.upper() for w in entry.get("wmi", []))
+        if "max_dids_per_request" in entry:
+            make["max_dids"] = max(1, min(int(entry["max_dids_per_request"]), MAX_DIDS_PER_FRAME))
+        ecus = entry.get("ecus", {})
+        for ch in entry.get("channels", []):
+            try:
+                header = ch.get("header") or ecus[ch["ecu"]]
+                make["channels"][ch["name"]] = Channel(
+                    ch["name"], header, ch["did"], ch["bytes"], ch["formula"], ch.get("unit", ""),
+                    ch.get("label"), ch.get("mode", entry.get("mode", DEFAULT_MODE)),
+                )
+            except (KeyError, ValueError, SyntaxError) as e:
+                print(f"[enhanced_pids] {path}: skipping channel {ch.get('name')!r}: {e}")
+
+
+_definitions = None
+_definitions_lock = threading.Lock()
+
+
+def definitions() -> dict:
+    """make -> {"make", "wmi", "max_dids", "channels": {name: Channel}}, loaded and compiled once."""
+    global _definitions
+    if _definitions is None:
+        with _definitions_lock:
+            if _definitions is None:
+                makes = {}
+                for path in _definition_files():
+                    _load_file(path, makes)
+                _definitions = makes
+    return _definitions
+
+
+def make_for_vin(vin):
+    forced = os.environ.get("OBDPLUS_ENHANCED_MAKE")
+    makes = definitions()
+    if forced:
+        return next((m for name, m in makes.items() if name.lower() == forced.lower()), None)
+    if not vin:
+        return None
+    wmi = vin[:3].upper()
+    return next((m for m in makes.values() if wmi in m["wmi"]), None)
+
+
+class _Batch:
+    """One request reading one or more DIDs from one ECU, decoded into {channel: text}."""
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.by_did = {c.did: c for c in channels}
+        self.mode = channels[0].mode
+        self.response_sid = int(self.mode, 16) + 0x40
+        self.nrc = None
+        request = self.mode + b"".join(b"%04X" % c.did for c in channels)
+        name = "ENH_" + channels[0].header.decode() + "_" + "_".join(c.name for c in channels)
+        self.command = obd.OBDCommand(name, ", ".join(c.label for c in channels), request, 0,
+                                      self._decode, obd.ECU.ALL, False, channels[0].header)
+
+    def _decode(self, messages):
+        self.nrc = None
+        for m in messages:
+            data = m.data
+            if len(data) >= 3 and data[0] == 0x7F and data[1] == self.response_sid - 0x40:
+                self.nrc = data[2]
+                return None
+            if not data or data[0] != self.response_sid:
+                continue
+            values, pos = {}, 1
+            while pos + 2 <= len(data):
+                channel = self.by_did.get((data[pos] << 8) | data[pos + 1])
+                end = pos + 2 + (channel.length if channel else 0)
+                if channel is None or end > len(data):
+                    break  # unknown record length: the rest cannot be split
+                try:
+                    values[channel.name] = channel.format(data[pos + 2:end])
+                except (ArithmeticError, ValueError):
+                    values[channel.name] = "N/A"
+                pos = end
+            return values or None
+        return None
+
+
+class EnhancedPoller:
+    def __init__(self, conn, make, profile=None):
+        self.conn = conn
+        self.make = make["make"]
+        self.profile = profile
+        saved = (profile.extra.get("enhanced_pids", {}) if profile is not None else {})
+        self.unsupported = set(saved.get("unsupported", []))
+        self.single = set(saved.get("single_did_headers", []))  # ECUs that take one DID per request
+        bits = ecu_targeting.id_bits(conn.protocol_id())
+        # Headers are 11-bit (7E0...) or 29-bit (DAxxF1); a make's channels only apply to their bus
+        width = 3 if bits == 11 else 6 if bits == 29 else None
+        self.channels = [c for c in make["channels"].values() if len(c.header) == width]
+        self.max_dids = make["max_dids"]
+        self._misses = {}
+        self._batch_misses = {}  # batch command name -> incomplete answers in a row
+        self._batches = []
+        self._stale = True
+
+    def names(self):
+        return [c.name for c in self.channels if c.name not in self.unsupported]
+
+    def _build(self):
+        by_ecu = {}
+        for c in self.channels:
+            if c.name not in self.unsupported:
+                by_ecu.setdefault((c.header, c.mode), []).append(c)
+        batches = []
+        for (header, _), channels in by_ecu.items():
+            size = 1 if header in self.single else self.max_dids
+            batches += [_Batch(channels[i:i + size]) for i in range(0, len(channels), size)]
+        for b in self._batches:
+            self.conn.supported_commands.discard(b.command)
+        for b in batches:
+            self.conn.supported_commands.add(b.command)
+        self._batches = batches
+        self._stale = False
+
+    def commands(self):
+        """Current request commands, grouped by ECU (consecutive ones share the adapter's header)."""
+        if self._stale:
+            self._build()
+        return [b.command for b in self._batches]
+
+    def collect(self, command, response) -> dict:
+        """{channel: value text} from one response; adjusts batching and support on failures."""
+        batch = next((b for b in self._batches if b.command is command), None)
+        if batch is None:
+            return {}
+        values = response.value if not response.is_null() else None
+        values = values or {}
+        missing = [c for c in batch.channels if c.name not in values]
+        if missing:
+            if len(batch.channels) > 1:
+                self._batch_miss(batch)
+            else:
+                self._miss(batch, missing[0])
+        else:
+            self._batch_misses.pop(batch.command.name, None)
+        for c in batch.channels:
+            if c.name in values:
+                self._misses.pop(c.name, None)
+        return {c.name: values.get(c.name, "N/A") for c in batch.channels}
+
+    def _batch_miss(self, batch):
+        # A timeout on a noisy link is not a verdict on batching: only a rejecting NRC,
+        # or the same batch coming back incomplete MAX_MISSES times in a row
+        name = batch.command.name
+        n = self._batch_misses[name] = self._batch_misses.get(name, 0) + 1
+        if batch.nrc in _NRC_REJECTED or n >= MAX_MISSES:
+            # Ask this ECU one DID at a time from now on
+            self._batch_misses.pop(name, None)
+            self._stale = True
+            self.single.add(batch.channels[0].header)
+            self._save()
+            print(f"[enhanced_pids] {batch.channels[0].header.decode()} rejected a batched "
+                  f"request; reading one DID per request")
+
+    def _miss(self, batch, channel):
+        n = self._misses[channel.name] = self._misses.get(channel.name, 0) + 1
+        if batch.nrc in _NRC_REJECTED or n >= MAX_MISSES:
+            self._stale = True
+            self.unsupported.add(channel.name)
+            self._save()
+            print(f"[enhanced_pids] {channel.name} (DID {channel.did:04X}) not supported; dropped")
+
+    def _save(self):
+        if self.profile is None:
+            return
+        self.profile.extra["enhanced_pids"] = {
+            "unsupported": sorted(self.unsupported),
+            "single_did_headers": sorted(h.decode() for h in self.single),
+        }
+        self.profile.dirty = True
+
+    def status(self) -> dict:
+        return {
+            "make": self.make,
+            "channels": self.names(),
+            "unsupported": sorted(self.unsupported),
+            "requests": len(self._batches),
+        }
+
+
+def poller_for(conn):
+    """EnhancedPoller for a connected CAN vehicle with matching definitions, else None."""
+    if os.environ.get("OBDPLUS_ENHANCED_PIDS", "1") == "0":
+        return None
+    if ecu_targeting.id_bits(conn.protocol_id()) is None:
+        return None
+    identity = getattr(conn, "identity", None) or {}
+    make = make_for_vin(identity.get("vin"))
+    if make is None:
+        return None
+    poller = EnhancedPoller(conn, make, getattr(conn, "profile", None))
+    if not poller.names():
+        return None
+    print(f"[enhanced_pids] {poller.make}: {len(poller.names())} enhanced channels")
+    return poller
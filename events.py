@@ -0,0 +1,106 @@
+"""
+In-process publish/subscribe hub for backend events.
+
+Producers (the fault monitor, pollers) call `hub.publish(topic, data)` from
+any thread; each subscriber gets its own bounded queue, so a slow or stalled
+client only loses its own oldest events and never blocks a producer.
+Endpoints turn a subscription into a server-sent event stream.
+"""
+import itertools
+import queue
+import threading
+import time
+
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, hub, sub_id, topics, maxsize):
+        self.hub = hub
+        self.sub_id = sub_id
+        self.topics = frozenset(topics) if topics else None  # None = every topic
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+
+    def wants(self, topic) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                # Drop the oldest event rather than stall the publisher
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next (topic, data, time), None on timeout; raises StopIteration once closed."""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is _CLOSED:
+            self._closed = True
+            raise StopIteration
+        return item
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topics=None, sub_id: str = "") -> Subscription:
+        """Subscribe to `topics` (None = all). A client-chosen `sub_id` allows cancel_subscription()."""
+        with self._lock:
+            sub_id = sub_id or f"sub-{next(self._ids)}"
+            old = self._subs.pop(sub_id, None)
+            sub = Subscription(self, sub_id, topics, self.queue_size)
+            self._subs[sub_id] = sub
+        if old is not None:
+            old.put(_CLOSED)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if self._subs.get(sub.sub_id) is sub:
+                del self._subs[sub.sub_id]
+        sub.put(_CLOSED)
+
+    def cancel_subscription(self, sub_id: str) -> bool:
+        """Close a subscription by id (wakes its stream). False if unknown."""
+        with self._lock:
+            sub = self._subs.get(sub_id)
+        if sub is None:
+            return False
+        self.unsubscribe(sub)
+        return True
+
+    def publish(self, topic: str, data):
+        item = (topic, data, time.time())
+        with self._lock:
+            subs = [s for s in self._subs.values() if s.wants(topic)]
+        for s in subs:
+            s.put(item)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+
+hub = EventHub()
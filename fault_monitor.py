@@ -0,0 +1,140 @@
+"""
+Streaming fault detection.
+
+The live polling loop feeds every new sample to `monitor.feed()`. Each rule in
+dtc_rules.py keeps its own small state machine:
+
+  inactive --(condition held for `hold` s)--> active       emits "enter"
+  active   --(clear held for `clear_hold` s)--> inactive   emits "exit"
+
+so a fault needs a sustained condition to appear (debounce) and a sustained,
+usually stricter, clear condition to go away (hysteresis); a value hovering
+around a threshold does not make the code flicker. Samples in which one of a
+rule's inputs is missing leave that rule untouched, and a gap in the sample
+stream (polling stopped) restarts pending debounce timers.
+
+Enter/exit (and reset) events go to an in-memory timeline and to the event
+hub (topic "dtc") for streaming to clients.
+"""
+import threading
+import time
+from collections import deque
+
+from events import hub
+
+TOPIC = "dtc"
+
+
+class _RuleState:
+    __slots__ = ("active", "enter_since", "clear_since", "since")
+
+    def __init__(self):
+        self.active = False
+        self.enter_since = None  # first sample of the current condition run
+        self.clear_since = None  # first sample of the current clear run
+        self.since = None        # time the fault became active
+
+
+class FaultMonitor:
+    def __init__(self, timeline_size: int = 1000, rules=None, max_gap: float = 10.0):
+        self.max_gap = max_gap
+        self._rules = rules
+        self._state = None
+        self._timeline = deque(maxlen=timeline_size)
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.last_sample_time = None
+
+    def _compiled(self):
+        if self._rules is None:
+            # Imported on first sample so NumPy is not loaded at backend start
+            import dtc_rules
+            self._rules = dtc_rules.compiled_rules()
+        return self._rules
+
+    @property
+    def has_samples(self) -> bool:
+        return self.samples > 0
+
+    def feed(self, sample: dict, ts: float):
+        """Advance every rule with one snapshot ({channel: value-text}) taken at `ts`."""
+        import numpy as np
+        import dtc_rules
+
+        rules = self._compiled()
+        cols = dtc_rules.columns_from_samples([sample or {}])
+        events = []
+        with self._lock:
+            if self._state is None:
+                self._state = [_RuleState() for _ in rules]
+            elif self.last_sample_time is not None and ts - self.last_sample_time > self.max_gap:
+                # Conditions were not observed in between; do not count the gap as held
+                for st in self._state:
+                    st.enter_since = st.clear_since = None
+            with np.errstate(invalid="ignore"):
+                for rule, st in zip(rules, self._state):
+                    if any(np.isnan(cols[v][0]) for v in rule.variables):
+                        continue
+                    if not st.active:
+                        if rule.evaluate(cols)[0]:
+                            if st.enter_since is None:
+                                st.enter_since = ts
+                            if ts - st.enter_since >= rule.hold:
+                                st.active, st.since, st.clear_since = True, ts, None
+                                events.append(self._event("enter", rule, ts))
+                        else:
+                            st.enter_since = None
+                    else:
+                        if rule.evaluate_clear(cols)[0]:
+                            if st.clear_since is None:
+                                st.clear_since = ts
+                            if ts - st.clear_since >= rule.clear_hold:
+                                st.active, st.enter_since, st.clear_since = False, None, None
+                                events.append(self._event("exit", rule, ts, since=st.since))
+                                st.since = None
+                        else:
+                            st.clear_since = None
+            self.samples += 1
+            self.last_sample_time = ts
+            self._timeline.extend(events)
+        for ev in events:
+            hub.publish(TOPIC, ev)
+        return events
+
+    @staticmethod
+    def _event(kind, rule, ts, since=None):
+        ev = {"type": kind, "code": rule.code, "description": rule.description, "time": ts}
+        if since is not None:
+            ev["duration"] = ts - since
+        return ev
+
+    def active(self):
+        """Currently active faults as [(code, description)] in rule table order."""
+        with self._lock:
+            if self._state is None:
+                return []
+            seen, result = set(), []
+            for rule, st in zip(self._rules, self._state):
+                if st.active and rule.code not in seen:
+                    seen.add(rule.code)
+                    result.append((rule.code, rule.description))
+            return result
+
+    def timeline(self, limit: int = None):
+        """Most recent enter/exit/reset events, oldest first."""
+        with self._lock:
+            events = list(self._timeline)
+        return events[-limit:] if limit else events
+
+    def reset(self, reason: str = "reset"):
+        """Forget active faults and pending debounce timers (e.g. after codes are cleared)."""
+        ev = {"type": "reset", "reason": reason, "time": time.time()}
+        with self._lock:
+            self._state = None
+            self.samples = 0
+            self.last_sample_time = None
+            self._timeline.append(ev)
+        hub.publish(TOPIC, ev)
+
+
+monitor = FaultMonitor()
@@ -21,6 +21,13 @@ Set-Location (Join-Path $scriptDir "..")
 
 Write-Host "Building OBDPlusLauncher from" (Get-Location)
 
+# Precompile the stylesheet themes into ui\resources\compiled so the packaged
+# app applies them without processing style.qss at startup.
+$venvPython = Join-Path (Get-Location).Path 'venv\Scripts\python.exe'
+$python = if (Test-Path $venvPython) { $venvPython } else { "python" }
+& $python -m ui.utils.stylesheet
+if ($LASTEXITCODE -ne 0) { Write-Warning "Stylesheet precompile failed; the app will compile it on first run." }
+
 $name = "OBDPlusLauncher"
 $mode = if ($Windowed) { "--windowed" } else { "--console" }
 
@@ -32,8 +39,26 @@ $add3 = "main.py;."
 $add4 = "obd_manager.py;."
 $add5 = "obd_functions.py;."
 $add6 = "cloud_client.py;."
+$add7 = "dtc_knowledge.py;."
+$add8 = "app_paths.py;."
+$add9 = "data;data"
+$add10 = "lazy_import.py;."
+$add11 = "dtc_rules.py;."
+$add12 = "events.py;."
+$add13 = "fault_monitor.py;."
+$add14 = "dtc_monitor.py;."
+$add15 = "mode06.py;."
+$add16 = "vehicle_profile.py;."
+$add17 = "ecu_targeting.py;."
+$add18 = "elm_tuning.py;."
+$add19 = "tcp_transport.py;."
+$add20 = "enhanced_pids.py;."
 $hidden1 = "uvicorn"
 $hidden2 = "uvicorn.subprocess"
+# Imported lazily at runtime (lazy_import.lazy_module / function-level imports),
+# so PyInstaller's import analysis cannot see them
+$hidden3 = "obd"
+$hidden4 = "pyqtgraph"
 
 # Build the argument array to call pyinstaller safely
 $args = @(
@@ -48,8 +73,24 @@ $args = @(
     "--add-data", $add4,
     "--add-data", $add5,
     "--add-data", $add6,
+    "--add-data", $add7,
+    "--add-data", $add8,
+    "--add-data", $add9,
+    "--add-data", $add10,
+    "--add-data", $add11,
+    "--add-data", $add12,
+    "--add-data", $add13,
+    "--add-data", $add14,
+    "--add-data", $add15,
+    "--add-data", $add16,
+    "--add-data", $add17,
+    "--add-data", $add18,
+    "--add-data", $add19,
+    "--add-data", $add20,
     "--hidden-import", $hidden1,
     "--hidden-import", $hidden2,
+    "--hidden-import", $hidden3,
+    "--hidden-import", $hidden4,
     "--clean"
 )
 
@@ -64,7 +105,7 @@ foreach ($c in $collects) {
 
 # Ensure PyInstaller also knows about internal project modules that may not be
 # discoverable via import-time analysis (these are modules in the project root).
-$internalHidden = @("obd_manager", "obd_functions", "cloud_client", "main")
+$internalHidden = @("obd_manager", "obd_functions", "cloud_client", "dtc_knowledge", "app_paths", "lazy_import", "dtc_rules", "events", "fault_monitor", "dtc_monitor", "mode06", "vehicle_profile", "ecu_targeting", "elm_tuning", "tcp_transport", "enhanced_pids", "main")
 foreach ($h in $internalHidden) {
     $args += "--hidden-import"
     $args += $h
@@ -1,7 +1,12 @@
 """
 Launcher that starts the FastAPI backend (uvicorn) in a background thread
-then starts the PyQt UI in the main thread. When the UI exits the launcher
-stops the backend and exits.
+and builds the PyQt UI in the main thread at the same time. When the UI exits
+the launcher signals uvicorn to stop (bounded wait) and exits.
+
+Startup is event driven: the backend thread signals readiness from uvicorn's
+own startup hook (no HTTP polling), the UI is constructed while the backend
+boots, and heavy modules (python-obd/pint, numpy, pyqtgraph) are imported on
+first use. A startup-timing report is written to the log.
 
 This script is written to be friendly for freezing with PyInstaller
 (`--onedir --windowed`). It writes a timestamped log file to `logs/` and
@@ -14,7 +19,7 @@ import logging
 import os
 from pathlib import Path
 
-import requests
+_T0 = time.perf_counter()
 
 # Ensure project root is on sys.path and set as working directory so
 # `import main` works both when running from source and when frozen by
@@ -74,14 +79,39 @@ def _global_excepthook(exc_type, exc_value, exc_tb):
 sys.excepthook = _global_excepthook
 
 
-def start_uvicorn_in_thread(host='127.0.0.1', port=8000):
-    """Start uvicorn programmatically in a background daemon thread."""
-    try:
-        import uvicorn
-    except Exception as e:
-        logger.exception("uvicorn is required to run the backend: %s", e)
-        raise
+class StartupTimer:
+    """Collects named milestones (seconds since the launcher started) and logs a
+    report once all `required` milestones are in, whichever thread marks last.
+    A requirement can be a tuple of alternatives."""
+
+    def __init__(self, required=("window_interactive", ("backend_ready", "backend_failed"))):
+        self._marks = []
+        self._required = [r if isinstance(r, tuple) else (r,) for r in required]
+        self._reported = False
+        self._lock = threading.Lock()
 
+    def mark(self, name: str):
+        with self._lock:
+            self._marks.append((name, time.perf_counter() - _T0, threading.current_thread().name))
+            seen = {m[0] for m in self._marks}
+            done = all(any(name in seen for name in alts) for alts in self._required)
+            if not done or self._reported:
+                return
+            self._reported = True
+            marks = sorted(self._marks, key=lambda m: m[1])
+        lines = [f"  {t * 1000:8.1f} ms  {n:<24} [{th}]" for n, t, th in marks]
+        logger.info("Startup timing (since launcher start):\n%s", "\n".join(lines))
+
+
+startup = StartupTimer()
+backend_ready = threading.Event()
+backend_failed = False
+_server = None
+_backend_thread = None
+
+
+def _load_backend_app():
+    """Import the backend module and return its ASGI app (or the import string)."""
     # Try to import the backend module so PyInstaller includes it in the bundle.
     # Also retrieve the ASGI app object to pass directly to uvicorn (more robust
     # than relying on string imports when frozen).
@@ -125,55 +155,146 @@ def start_uvicorn_in_thread(host='127.0.0.1', port=8000):
             app_target = "main:app"
         else:
             app_target = app_obj
+            startup.mark("backend_imported")
+            # The UI shares this process: let ApiClient call the endpoints directly
+            # instead of over loopback HTTP (OBDPLUS_TRANSPORT=http disables this).
+            try:
+                from ui.transport import register_in_process_backend
+                register_in_process_backend(app_obj)
+                logger.info("Registered in-process backend transport for the UI")
+            except Exception:
+                logger.exception("Failed to register in-process transport; UI will use HTTP")
     except Exception:
         # If import fails here, fall back to the string — uvicorn will try to import it.
         app_target = "main:app"
 
+    return app_target
+
+
+def _signal_backend(ok: bool):
+    global backend_failed
+    if backend_ready.is_set():
+        return
+    backend_failed = not ok
+    startup.mark("backend_ready" if ok else "backend_failed")
+    backend_ready.set()
+    try:
+        from ui.transport import mark_backend_ready
+        mark_backend_ready()
+    except Exception:
+        pass
+
+
+def start_uvicorn_in_thread(host='127.0.0.1', port=8000):
+    """Import the backend and run uvicorn in a background daemon thread.
+    `backend_ready` is set from uvicorn's startup hook once it is serving."""
+    try:
+        from ui.transport import expect_backend
+        # First API calls from the UI wait for the backend instead of failing
+        expect_backend()
+    except Exception:
+        logger.exception("ui.transport unavailable")
+
     def _run():
-        config = uvicorn.Config(app_target, host=host, port=port, log_level="info")
-        server = uvicorn.Server(config)
-        # run() blocks until shutdown; run it here inside the thread
-        logger.info("Starting uvicorn server thread")
-        server.run()
-        logger.info("Uvicorn server thread has exited")
-
-    t = threading.Thread(target=_run, daemon=True)
+        global _server
+        try:
+            import uvicorn
+            app_target = _load_backend_app()
+
+            class _Server(uvicorn.Server):
+                async def startup(self, sockets=None):
+                    await super().startup(sockets=sockets)
+                    if not self.should_exit:
+                        logger.info("Backend is serving on http://%s:%s", host, port)
+                        _signal_backend(True)
+
+            # Bounded graceful shutdown: open connections get at most 1 s after should_exit
+            config = uvicorn.Config(app_target, host=host, port=port, log_level="info",
+                                    timeout_graceful_shutdown=1)
+            server = _Server(config)
+            _server = server
+            # run() blocks until shutdown; run it here inside the thread
+            logger.info("Starting uvicorn server thread")
+            server.run()
+            logger.info("Uvicorn server thread has exited")
+        except BaseException:
+            # SystemExit from uvicorn on bind errors lands here too
+            logger.exception("Backend thread failed")
+        finally:
+            # No-op when startup already succeeded
+            _signal_backend(False)
+
+    global _backend_thread
+    t = threading.Thread(target=_run, name="backend", daemon=True)
     t.start()
+    _backend_thread = t
     return t
 
 
-def wait_for_backend(url="http://127.0.0.1:8000/openapi.json", timeout=15):
-    """Poll the backend until it responds or until timeout seconds elapse."""
-    start = time.time()
-    while True:
-        try:
-            r = requests.get(url, timeout=1)
-            if r.status_code == 200:
-                logger.info("Backend is healthy")
-                return True
-        except Exception:
-            pass
-        if time.time() - start > timeout:
-            logger.error("Backend did not become healthy within %s seconds", timeout)
-            return False
-        time.sleep(0.5)
+def stop_backend(timeout=1.0):
+    """Ask uvicorn to exit and wait at most `timeout` seconds for the server thread.
+    Escalates to force_exit halfway through; the thread is a daemon either way."""
+    server, thread = _server, _backend_thread
+    if server is None or thread is None:
+        return True
+    server.should_exit = True
+    thread.join(timeout / 2)
+    if thread.is_alive():
+        server.force_exit = True
+        thread.join(timeout / 2)
+    stopped = not thread.is_alive()
+    if not stopped:
+        logger.warning("Backend did not stop within %.1f s; exiting anyway", timeout)
+    return stopped
+
+
+def wait_for_backend(timeout=15):
+    """Block until the backend signalled readiness (no polling). Returns True when serving."""
+    if not backend_ready.wait(timeout):
+        logger.error("Backend did not become ready within %s seconds", timeout)
+        return False
+    return not backend_failed
+
+
+def _preload_heavy_modules():
+    # Runs once the window is interactive: warm python-obd/pint off the GUI thread
+    # so the first Connect does not pay for the import.
+    try:
+        import obd_functions
+        from lazy_import import preload
+        preload(obd_functions.obd)
+        startup.mark("obd_preloaded")
+    except Exception as e:
+        logger.info("Background preload skipped: %s", e)
 
 
 def launch_ui():
-    """Import and run the UI. The UI is expected to block until the user closes it."""
+    """Build and run the UI; blocks until the user closes it. Returns the exit code."""
     logger.info("Launching UI (importing ui.app)")
     try:
-        # Importing and calling the UI main function keeps everything in one
-        # frozen executable (recommended for --onedir single-exe launcher).
         from ui import app as ui_app
-        # ui.app should expose a `main()` function that runs the QApplication
-        if hasattr(ui_app, 'main'):
-            ui_app.main()
-        else:
+        startup.mark("ui_imported")
+        if not hasattr(ui_app, "create_app"):
             # fallback: run as a module
-            logger.info("ui.app has no main(); falling back to module run")
+            logger.info("ui.app has no create_app(); falling back to module run")
             import runpy
             runpy.run_module('ui.app', run_name='__main__')
+            return 0
+        from PyQt6.QtCore import QTimer
+
+        app = ui_app.create_app()
+        startup.mark("qapplication_ready")
+        win = ui_app.create_window()
+        startup.mark("window_built")
+        win.show()
+
+        def _interactive():
+            startup.mark("window_interactive")
+            threading.Thread(target=_preload_heavy_modules, name="preload", daemon=True).start()
+
+        # Fires after the first pass of the event loop, i.e. once the window has painted
+        QTimer.singleShot(0, _interactive)
+        return app.exec()
     except Exception:
         logger.exception("Failed to start the UI")
         raise
@@ -182,31 +303,31 @@ def launch_ui():
 def main():
     logger.info("Launcher starting")
 
-    # Start backend
+    # Start the backend; the UI is built in parallel and its first API
+    # call waits on the backend's readiness signal.
     try:
-        server_thread = start_uvicorn_in_thread()
+        start_uvicorn_in_thread()
     except Exception:
         logger.error("Unable to start backend; aborting")
         return 2
 
-    # Wait for backend readiness
-    healthy = wait_for_backend()
-    if not healthy:
-        logger.error("Backend failed to start; see log %s", log_file)
-        return 3
-
     # Launch UI in main thread; this will block until UI exits
+    rc = 0
     try:
-        launch_ui()
+        rc = launch_ui()
     except Exception:
         logger.exception("UI crashed or exited with error")
     finally:
         logger.info("UI exited — attempting backend shutdown")
-        # uvicorn server will normally stop when process exits; give a moment
-        time.sleep(0.5)
+        # The window already stopped live data and closed the adapter (bounded);
+        # now signal uvicorn instead of sleeping and hoping it is done.
+        stop_backend(timeout=1.0)
 
+    if backend_failed:
+        logger.error("Backend failed to start; see log %s", log_file)
+        return 3
     logger.info("Launcher exiting")
-    return 0
+    return rc or 0
 
 
 if __name__ == '__main__':
@@ -0,0 +1,53 @@
+"""
+Deferred imports for heavy dependencies.
+
+`obd = lazy_module("obd")` binds a proxy that imports python-obd (and pint,
+which it pulls in) on the first attribute access instead of at startup.
+The import runs once, under a lock, so concurrent first uses are safe.
+Note: PyInstaller cannot see these imports; list them as hidden imports.
+"""
+import importlib
+import threading
+
+
+class _LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        mod = self.__dict__["_module"]
+        if mod is None:
+            with self.__dict__["_lock"]:
+                mod = self.__dict__["_module"]
+                if mod is None:
+                    mod = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = mod
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_module(name: str):
+    """Return a proxy for module `name` that imports it on first use."""
+    return _LazyModule(name)
+
+
+def is_loaded(proxy) -> bool:
+    return isinstance(proxy, _LazyModule) and proxy.__dict__["_module"] is not None
+
+
+def preload(*proxies):
+    """Import the given lazy modules now (e.g. from a background thread once the UI is up)."""
+    for p in proxies:
+        if isinstance(p, _LazyModule):
+            p._load()
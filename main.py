@@ -1,8 +1,20 @@
+import json
+import os
+import time
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from obd_manager import OBDManager
 import cloud_client as cloud
+import dtc_knowledge
+import mode06
+import vehicle_profile
+import obd_functions
+from dtc_monitor import monitor as dtc_monitor
+from events import hub
+from fault_monitor import monitor as fault_monitor, TOPIC as FAULT_TOPIC
 from obd_functions import (
-    get_dtc_codes, get_freeze_frame, clear_dtc,
+    get_dtc_codes, get_freeze_frame, clear_dtc, get_diagnostic_snapshot,
     start_live_polling, stop_live_polling, get_latest_live_data
 )
 
@@ -10,13 +22,25 @@ app = FastAPI()
 obd_mgr = OBDManager()
 
 @app.get("/connect")
-def connect_obd():
+def connect_obd(port: str = ""):
+    """
+    Connect to the adapter on `port` (or OBDPLUS_PORT): a serial port, or
+    tcp://host:port / host:port for a Wi-Fi adapter. Without one, the
+    simulated adapter of the current setup is used.
+    """
+    # Wake the cloud explain service in the background so it is hot by the time DTCs are read
+    cloud.warm_up()
     # Guard against duplicate connection attempts
     existing = obd_mgr.get_conn()
     if existing and existing.is_connected():
         return {"status": "already_connected"}
     try:
-        if obd_mgr.connect(test=True):  # test mode per current setup
+        port = port or os.environ.get("OBDPLUS_PORT", "")
+        connected = obd_mgr.connect(port=port) if port else obd_mgr.connect(test=True)
+        if connected:
+            if not obd_functions.test:
+                # Watch MIL status / DTC count in the background (synthetic data has no codes to read)
+                dtc_monitor.start(obd_mgr.get_conn())
             return {"status": "connected"}
         return {"status": "failed"}
     except Exception as e:
@@ -24,12 +48,16 @@ def connect_obd():
         return {"status": "error", "detail": str(e)}
 
 @app.get("/disconnect")
-def disconnect():
-    """Stop live polling and close OBD connection safely."""
+def disconnect(fast: bool = False):
+    """
+    Stop live polling and close OBD connection safely.
+    `fast=true` (used when the app exits) does not wait for the polling thread.
+    """
     try:
-        stop_live_polling()
+        stop_live_polling(wait=not fast)
     except Exception:
         pass
+    dtc_monitor.stop(wait=not fast)
     conn_obj = obd_mgr.get_conn()
     if conn_obj and conn_obj.is_connected():
         try:
@@ -40,8 +68,64 @@ def disconnect():
     return {"status": "not_connected"}
 
 
+# Last /diagnostics/snapshot, so explaining its codes does not read the freeze frame again
+SNAPSHOT_REUSE_SECONDS = 120
+_last_snapshot = None
+
+
+def _freeze_frame_for_explain(conn):
+    snap = _last_snapshot
+    if snap is not None and snap["freeze_frame"] and time.time() - snap["time"] < SNAPSHOT_REUSE_SECONDS:
+        return snap["freeze_frame"]
+    return get_freeze_frame(conn)
+
+
+def _cached_snapshot(conn):
+    """
+    The last full scan with its codes and MIL status replaced by what the
+    background monitors already hold. No adapter traffic unless nothing has
+    been read yet (then only the stored codes, as /dtc would).
+    """
+    last = _last_snapshot
+    doc = dict(last) if last is not None else {
+        "time": time.time(), "vin": None, "calibration_ids": [], "cvns": [], "status": None,
+        "dtcs": {"stored": [], "pending": [], "permanent": []}, "freeze_frame": {}, "errors": {},
+    }
+    doc["cached"] = True
+    monitor = dtc_monitor.snapshot()
+    if monitor["running"] and monitor["lists"] is not None:
+        doc["dtcs"] = monitor["lists"]
+        if monitor["status"] is not None:
+            # Readiness only comes with a full scan; keep it from the last one
+            doc["status"] = {**(doc.get("status") or {}), **monitor["status"]}
+    elif obd_functions.test and fault_monitor.has_samples:
+        doc["dtcs"] = {**doc["dtcs"], "stored": fault_monitor.active()}
+    elif last is None:
+        doc["dtcs"] = {**doc["dtcs"], "stored": dtc_codes()}
+    return doc
+
+
+@app.get("/diagnostics/snapshot")
+def diagnostics_snapshot(cached: bool = False):
+    """
+    One-shot full scan in a single adapter session: MIL status and readiness,
+    stored/pending/permanent DTCs, freeze frame and VIN as one document.
+    `cached=true` (pushed refreshes) answers from the monitors' copies instead.
+    """
+    global _last_snapshot
+    if cached:
+        return _cached_snapshot(obd_mgr.get_conn())
+    doc = get_diagnostic_snapshot(obd_mgr.get_conn())
+    _last_snapshot = doc
+    return doc
+
+
 @app.get("/dtc")
 def dtc_codes():
+    # The DTC monitor re-reads Mode 03 whenever MIL status / count change, so its copy is current
+    cached = dtc_monitor.current("stored")
+    if cached is not None:
+        return cached
     return get_dtc_codes(obd_mgr.get_conn())
 
 @app.get("/freeze")
@@ -50,7 +134,12 @@ def freeze_frame():
 
 @app.get("/clear")
 def clear_codes():
-    return {"result": clear_dtc(obd_mgr.get_conn())}
+    global _last_snapshot
+    result = clear_dtc(obd_mgr.get_conn())
+    _last_snapshot = None
+    dtc_monitor.invalidate()
+    mode06.invalidate()
+    return {"result": result}
 
 @app.get("/live/start")
 def start_live():
@@ -58,14 +147,34 @@ def start_live():
     return {"status": "started"}
 
 @app.get("/live/stop")
-def stop_live():
-    stop_live_polling()
+def stop_live(wait: bool = True):
+    stop_live_polling(wait=wait)
     return {"status": "stopped"}
 
 @app.get("/live/data")
 def live_data():
     return get_latest_live_data()
 
+@app.get("/dtc/info/{code}")
+def dtc_info(code: str):
+    """
+    Offline knowledge-base entry for a code (description, causes, fixes, related
+    sensors) plus a pre-rendered `html` view. Needs no adapter or connectivity.
+    """
+    info = dtc_knowledge.get_dtc_info(code)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Not a valid DTC: {code}")
+    info["html"] = dtc_knowledge.render_explanation_html(info)
+    return info
+
+@app.get("/dtc/search")
+def dtc_search(q: str, limit: int = 20):
+    return dtc_knowledge.search_dtc(q, limit=limit)
+
+@app.get("/cloud/status")
+def cloud_status():
+    return cloud.breaker.status()
+
 @app.get("/dtc/explain/{code}")
 def explain_code(code: str):
     """
@@ -76,7 +185,7 @@ def explain_code(code: str):
     if not conn:
         raise HTTPException(status_code=400, detail="Not connected")
 
-    freeze_frame_data = get_freeze_frame(conn)
+    freeze_frame_data = _freeze_frame_for_explain(conn)
 
     # Call cloud explain with a conservative timeout and robust error handling.
     try:
@@ -98,4 +207,159 @@ def explain_code(code: str):
         "code": code,
         "freeze_frame": freeze_frame_data,
         "explanation": explanation
-    }
\ No newline at end of file
+    }
+
+
+def _sse(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _encode_events(events):
+    try:
+        for event, data in events:
+            yield _sse(event, data)
+    finally:
+        # Close the source explicitly on client disconnect so its cleanup runs now
+        events.close()
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Server-sent event response built from an iterator of (event, data) pairs.
+    The raw iterator stays available as `.events` so an in-process client
+    (ui/transport.py) can consume the events without the text round trip.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        super().__init__(
+            _encode_events(events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+@app.get("/dtc/explain/{code}/stream")
+def explain_code_stream(code: str, job_id: str = ""):
+    """
+    Same as /dtc/explain/{code} but relays the cloud answer progressively as
+    server-sent events: `start` (code + freeze frame), any number of `chunk`
+    events carrying HTML fragments, an optional `error`, then `done`.
+    Pass a client-chosen `job_id` to be able to cancel it via /dtc/explain/cancel/{job_id}.
+    """
+    conn = obd_mgr.get_conn()
+    if not conn:
+        raise HTTPException(status_code=400, detail="Not connected")
+
+    # Registered before the freeze frame read, so a cancel sent during it is not lost
+    job = cloud.start_job(job_id)
+    try:
+        freeze_frame_data = _freeze_frame_for_explain(conn)
+    except Exception:
+        cloud.finish_job(job)
+        raise
+
+    def events():
+        try:
+            yield "start", {"code": code, "freeze_frame": freeze_frame_data}
+            if job.cancelled.is_set():
+                # Cancelled while the freeze frame was read: never post to the cloud
+                yield "done", {"cancelled": True}
+                return
+            try:
+                for part in cloud.stream_dtc_explanation_from_cloud(code, freeze_frame_data, timeout=70, job=job):
+                    if part.get("error"):
+                        yield "error", {"error": part["error"]}
+                        break
+                    yield "chunk", {"html": part.get("html", "")}
+            except Exception as e:
+                yield "error", {"error": f"Explain service failed: {e}"}
+            yield "done", {"cancelled": job.cancelled.is_set()}
+        finally:
+            # Also runs when the client disconnects and the generator is closed:
+            # drop the upstream call instead of letting it run to completion.
+            job.cancel()
+            cloud.finish_job(job)
+
+    return EventStreamResponse(events())
+
+
+@app.get("/dtc/explain/cancel/{job_id}")
+def cancel_explain(job_id: str):
+    return {"cancelled": cloud.cancel_job(job_id)}
+
+
+@app.get("/dtc/timeline")
+def dtc_timeline(limit: int = 200):
+    """Fault enter/exit events detected on the live stream, oldest first, plus the active set."""
+    return {
+        "events": fault_monitor.timeline(limit),
+        "active": fault_monitor.active(),
+        "samples": fault_monitor.samples,
+    }
+
+
+EVENTS_KEEPALIVE_SECONDS = 15
+
+
+@app.get("/dtc/events")
+def dtc_events(sub_id: str = ""):
+    """
+    Server-sent stream of DTC events: `enter` / `exit` / `reset` from the
+    fault monitor (same payloads as /dtc/timeline), `appear` / `clear` /
+    `status` from the DTC monitor (see /dtc/history) and a `ping` every
+    EVENTS_KEEPALIVE_SECONDS while nothing happens. Pass a client-chosen
+    `sub_id` to be able to end it via /dtc/events/cancel/{sub_id}.
+    """
+    sub = hub.subscribe((FAULT_TOPIC,), sub_id)
+
+    def events():
+        try:
+            yield "active", {"active": fault_monitor.active()}
+            while True:
+                try:
+                    item = sub.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+                except StopIteration:
+                    return
+                if item is None:
+                    yield "ping", {}
+                    continue
+                _topic, data, _ts = item
+                yield data.get("type", "event"), data
+        finally:
+            sub.close()
+
+    return EventStreamResponse(events())
+
+
+@app.get("/dtc/events/cancel/{sub_id}")
+def cancel_dtc_events(sub_id: str):
+    return {"cancelled": hub.cancel_subscription(sub_id)}
+
+
+@app.get("/dtc/monitor")
+def dtc_monitor_status():
+    """MIL status / DTC count watcher state, with the last stored/pending/permanent lists."""
+    return dtc_monitor.snapshot()
+
+
+@app.get("/dtc/history")
+def dtc_history(limit: int = 200):
+    """Codes that appeared in or cleared from the stored/pending/permanent lists, oldest first."""
+    return dtc_monitor.history(limit)
+
+
+@app.get("/monitors")
+def monitor_results(refresh: bool = False):
+    """
+    Mode 06 on-board monitor test results (value vs. min/max per test),
+    cached until the codes are cleared or a new drive cycle starts.
+    """
+    return mode06.read_monitors(obd_mgr.get_conn(), refresh=refresh)
+
+
+@app.get("/vehicle")
+def vehicle():
+    """VIN / calibration IDs / CVNs of the connected car and its stored profile."""
+    return vehicle_profile.vehicle_info(obd_mgr.get_conn())
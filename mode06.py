@@ -0,0 +1,143 @@
+"""
+Mode 06 on-board monitor test results.
+
+The ECU reports the results of its last non-continuous monitor runs
+(catalyst, O2 sensors and heaters, EVAP, EGR, misfire, ...) as test values
+with min/max limits. Each Monitor ID (MID) groups the tests for one
+component; one request for a MID returns all of its tests (TIDs) in one
+multi-frame response.
+
+Retrieval:
+  * only MIDs the ECU advertises (python-obd probes the 0x00/0x20/... bitmaps
+    at connect), so no request is spent on an unsupported one
+  * one request per MID: ISO 15765-4 allows a single MID per Mode 06
+    request (unlike Mode 01, which takes up to six PIDs), so this is the
+    minimum; all of them go out in one obd_lock session
+  * results are cached until the codes are cleared (invalidate()) or a new
+    drive cycle starts, detected from the engine run time going backwards
+    or the warm-up counter changing
+
+Mode 06 as decoded here is defined for CAN (ISO 15765-4) only.
+"""
+import threading
+import time
+
+import obd_functions
+from obd_functions import obd, obd_lock
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _value(q):
+    """pint quantity -> (magnitude, unit text); plain values pass through."""
+    if q is None:
+        return None, ""
+    magnitude = getattr(q, "magnitude", q)
+    units = getattr(q, "units", None)
+    unit = "" if units is None or str(units) == "dimensionless" else f"{units:~}"
+    try:
+        magnitude = float(magnitude)
+    except (TypeError, ValueError):
+        pass
+    return magnitude, unit
+
+
+def _rows(cmd, monitor):
+    """Flatten one MID's Monitor response into typed rows."""
+    rows = []
+    for test_result in getattr(monitor, "tests", []) or []:
+        value, unit = _value(test_result.value)
+        lo, _ = _value(test_result.min)
+        hi, _ = _value(test_result.max)
+        rows.append({
+            "mid": f"{cmd.pid:02X}",
+            "monitor": cmd.name.replace("MONITOR_", ""),
+            "tid": f"{test_result.tid:02X}",
+            "test": test_result.name or "",
+            "description": test_result.desc or "",
+            "value": value,
+            "min": lo,
+            "max": hi,
+            "unit": unit,
+            "passed": bool(test_result.passed),
+        })
+    return rows
+
+
+def supported_mids(conn):
+    """MONITOR_* commands the ECU reports as supported (MID bitmap getters excluded)."""
+    return [
+        cmd for cmd in obd.commands[6]
+        if cmd is not None and cmd.pid % 0x20 != 0 and conn.supports(cmd)
+    ]
+
+
+def _drive_cycle(conn):
+    """(warm-ups since clear, engine run time in s), None where unsupported. Caller holds obd_lock."""
+    marks = []
+    for cmd in (obd.commands.WARMUPS_SINCE_DTC_CLEAR, obd.commands.RUN_TIME):
+        value = None
+        if conn.supports(cmd):
+            response = conn.query(cmd)
+            if not response.is_null():
+                value, _ = _value(response.value)
+        marks.append(value)
+    return tuple(marks)
+
+
+def _same_drive_cycle(cached, marks) -> bool:
+    warmups, run_time = marks
+    if warmups is not None and warmups != cached["warmups"]:
+        return False
+    if run_time is not None and cached["run_time"] is not None and run_time < cached["run_time"]:
+        return False  # engine restarted since the results were read
+    return True
+
+
+def read_monitors(conn, refresh: bool = False) -> dict:
+    """
+    Mode 06 results as {"supported", "read_time", "duration_ms", "requests",
+    "cached", "tests": [row, ...]}. Each row: mid, monitor, tid, test,
+    description, value, min, max, unit, passed.
+    """
+    global _cache
+    empty = {"supported": False, "read_time": None, "duration_ms": 0, "requests": 0,
+             "cached": False, "tests": []}
+    if obd_functions.test or not conn or not conn.is_connected():
+        return empty
+    with _cache_lock:
+        with obd_lock:
+            marks = _drive_cycle(conn)
+            cached = _cache
+            if cached is not None and not refresh and _same_drive_cycle(cached, marks):
+                return {**cached["doc"], "cached": True}
+
+            started = time.perf_counter()
+            mids = supported_mids(conn)
+            rows = []
+            for cmd in mids:
+                try:
+                    response = conn.query(cmd)
+                except Exception as e:
+                    print(f"[mode06] {cmd.name} error: {e}")
+                    continue
+                if not response.is_null():
+                    rows.extend(_rows(cmd, response.value))
+        doc = {
+            "supported": bool(mids),
+            "read_time": time.time(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "requests": len(mids),
+            "cached": False,
+            "tests": rows,
+        }
+        _cache = {"doc": doc, "warmups": marks[0], "run_time": marks[1]}
+        return doc
+
+
+def invalidate():
+    """Drop cached results (codes cleared: the monitors start over)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -1,7 +1,12 @@
-import obd
 import time
 import threading
 
+from lazy_import import lazy_module
+from fault_monitor import monitor as fault_monitor
+
+# python-obd (and pint through it) is imported on first use, not at backend start
+obd = lazy_module("obd")
+
 # Synchronization primitives and thread reference for safe concurrent access
 obd_lock = threading.Lock()
 polling_thread = None
@@ -9,152 +14,61 @@ polling_thread = None
 test = False  # Set to True to enable test mode with synthetic data
 
 def detect_dtcs(data):
-    dtcs = []
-
-    # Helper for safe numeric conversion
-    def val(key):
-        try:
-            return float(str(data.get(key, 0)).split(' ')[0])
-        except Exception:
-            return 0.0
-
-    rpm = val("RPM")
-    speed = val("SPEED")
-    coolant = val("COOLANT_TEMP")
-    intake = val("INTAKE_TEMP")
-    maf = val("MAF")
-    throttle = val("THROTTLE_POS")
-    stft = val("SHORT_FUEL_TRIM_1")
-    ltft = val("LONG_FUEL_TRIM_1")
-    o2s1 = val("O2_B1S1")
-    o2s2 = val("O2_B1S2")
-    timing = val("TIMING_ADVANCE")
-    fuel_pressure = val("FUEL_PRESSURE")
-
-    # -------------------------------
-    # Fuel Mixture and Airflow Faults
-    # -------------------------------
-
-    # System Too Lean (Bank 1)
-    if maf < 0.6 and ltft > 10 and stft > 8:
-        dtcs.append(("P0171", "System Too Lean Bank 1"))
-
-    # System Too Rich (Bank 1)
-    if maf > 3.5 and ltft < -10 and stft < -8:
-        dtcs.append(("P0172", "System Too Rich (Bank 1)"))
-
-    # Mass Air Flow Circuit Range/Performance Problem
-    if maf < 0.3 or maf > 10.0:
-        dtcs.append(("P0101", "MAF Circuit Range/Performance"))
-
-    # -------------------------------
-    # Misfire / Ignition Issues
-    # -------------------------------
-
-    # Random Misfire
-    if rpm < 600 and throttle < 5 and timing < 10:
-        dtcs.append(("P0300", "Random Misfire Detected Code"))
-
-    # Cylinder Misfire Detected (idle roughness simulation)
-    if abs(stft) > 15 and rpm < 650:
-        dtcs.append(("P0301", "Cylinder #1 Misfire"))
-
-    # -------------------------------
-    # Catalyst and O2 Sensor Monitoring
-    # -------------------------------
-
-    # Catalyst Efficiency Below Threshold
-    if abs(o2s1 - o2s2) < 0.1 and o2s2 > 0.6:
-        dtcs.append(("P0420", "Catalyst System Efficiency Below Threshold"))
-
-    # O2 Sensor Slow Response (Bank 1, Sensor 1)
-    if abs(stft) > 12 and (o2s1 < 0.2 or o2s1 > 0.9):
-        dtcs.append(("P0133", "Oxygen Sensor Circuit Slow Response"))
-
-    # -------------------------------
-    # Cooling System
-    # -------------------------------
-
-    # Coolant Thermostat Below Regulating Temperature
-    if coolant < 70 and speed > 20:
-        dtcs.append(("P0128", "Thermostat OBD-II Trouble Code"))
-
-    # Engine Overheating
-    if coolant > 105:
-        dtcs.append(("P0217", "Engine Over Temperature"))
-
-    # -------------------------------
-    # Fuel System Pressure
-    # -------------------------------
-
-    # Fuel Pressure too low
-    if fuel_pressure < 35 and (maf < 1.5 or ltft > 12):
-        dtcs.append(("P0087", "Fuel Rail/System Pressure - Too Low"))  # Fuel Rail/System Pressure Too Low
-
-    # -------------------------------
-    # Throttle / Air Intake
-    # -------------------------------
-
-    # Throttle position mismatch (e.g. limp mode)
-    if throttle < 5 and rpm > 2500:
-        dtcs.append(("P2119", "Throttle Actuator Control Throttle Body Range"))  # Throttle actuator control throttle body range
-
-    # -------------------------------
-    # Idle Control and Stability
-    # -------------------------------
-
-    # Idle RPM not stable — possible vacuum leak
-    if 600 < rpm < 900 and abs(stft) > 10 and maf < 0.5:
-        dtcs.append(("P0507", "Idle Air Control System RPM Higher Than Expected"))  # Idle control system RPM higher than expected
-
-    # -------------------------------
-    # Intake Air Temperature Sensor
-    # -------------------------------
-
-    if intake < -10 or intake > 60:
-        dtcs.append(("P0113", "IAT Sensor 1 Circuit High Input"))  # IAT sensor circuit high input
-
-    # -------------------------------
-    # Deduplicate and return
-    # -------------------------------
-    return list(set(dtcs))
+    """
+    Infer DTCs from one snapshot ({channel: value-text}) using the declarative
+    rule table in dtc_rules.py. Returns [(code, description)].
+    """
+    # Imported here so NumPy is not loaded at backend start
+    import dtc_rules
+    return dtc_rules.detect_snapshot(data)
 
 
 # ===============================
 # OBD Command Dictionaries
 # ===============================
 
+# Display name -> python-obd command name. The OBDCommand objects are looked up
+# on first use so importing this module does not import python-obd.
+
 # --- Mode 1: Live Data Commands ---
-live_commands = {
-    'RPM': obd.commands.RPM,
-    'SPEED': obd.commands.SPEED,
-    'COOLANT_TEMP': obd.commands.COOLANT_TEMP,
-    'INTAKE_TEMP': obd.commands.INTAKE_TEMP,
-    'MAF': obd.commands.MAF,
-    'THROTTLE_POS': obd.commands.THROTTLE_POS,
-    'SHORT_FUEL_TRIM_1': obd.commands.SHORT_FUEL_TRIM_1,
-    'LONG_FUEL_TRIM_1': obd.commands.LONG_FUEL_TRIM_1,
-    'O2_B1S1': obd.commands.O2_B1S1,
-    'O2_B1S2': obd.commands.O2_B1S2,
-    'TIMING_ADVANCE': obd.commands.TIMING_ADVANCE,
-    'FUEL_PRESSURE': obd.commands.FUEL_PRESSURE,
+LIVE_COMMAND_NAMES = {
+    'RPM': 'RPM',
+    'SPEED': 'SPEED',
+    'COOLANT_TEMP': 'COOLANT_TEMP',
+    'INTAKE_TEMP': 'INTAKE_TEMP',
+    'MAF': 'MAF',
+    'THROTTLE_POS': 'THROTTLE_POS',
+    'SHORT_FUEL_TRIM_1': 'SHORT_FUEL_TRIM_1',
+    'LONG_FUEL_TRIM_1': 'LONG_FUEL_TRIM_1',
+    'O2_B1S1': 'O2_B1S1',
+    'O2_B1S2': 'O2_B1S2',
+    'TIMING_ADVANCE': 'TIMING_ADVANCE',
+    'FUEL_PRESSURE': 'FUEL_PRESSURE',
 }
 
 # --- Mode 2: Freeze Frame Commands ---
-freeze_commands = {
-    'RPM': obd.commands.DTC_RPM,
-    'SPEED': obd.commands.DTC_SPEED,
-    'COOLANT_TEMP': obd.commands.DTC_COOLANT_TEMP,
-    'INTAKE_TEMP': obd.commands.DTC_INTAKE_TEMP,
-    'MAF': obd.commands.DTC_MAF,
-    'THROTTLE_POS': obd.commands.DTC_THROTTLE_POS,
-    'SHORT_FUEL_TRIM_1': obd.commands.DTC_SHORT_FUEL_TRIM_1,
-    'LONG_FUEL_TRIM_1': obd.commands.DTC_LONG_FUEL_TRIM_1,
-    'O2_B1S1': obd.commands.DTC_O2_B1S1,
-    'O2_B1S2': obd.commands.DTC_O2_B1S2,
-    'TIMING_ADVANCE': obd.commands.DTC_TIMING_ADVANCE,
-    'FUEL_PRESSURE': obd.commands.DTC_FUEL_PRESSURE,
-}
+FREEZE_COMMAND_NAMES = {name: f"DTC_{cmd}" for name, cmd in LIVE_COMMAND_NAMES.items()}
+
+_command_tables = {}
+
+
+def _commands(kind):
+    """Resolve a command table ('live' or 'freeze') to {name: OBDCommand}, once."""
+    table = _command_tables.get(kind)
+    if table is None:
+        names = LIVE_COMMAND_NAMES if kind == "live" else FREEZE_COMMAND_NAMES
+        table = {name: getattr(obd.commands, cmd) for name, cmd in names.items()}
+        _command_tables[kind] = table
+    return table
+
+
+def __getattr__(name):
+    # Keep `obd_functions.live_commands` / `.freeze_commands` working for importers
+    if name == "live_commands":
+        return _commands("live")
+    if name == "freeze_commands":
+        return _commands("freeze")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ===============================
@@ -167,7 +81,10 @@ def get_dtc_codes(conn):
     """
     try:
         if test:
-            # In test mode we derive DTCs from a synthetic freeze frame
+            # Once live polling has fed the fault monitor it holds the
+            # debounced set of codes; before that, derive them from one frame.
+            if fault_monitor.has_samples:
+                return fault_monitor.active()
             frame = get_freeze_frame(conn)
             dtcs = detect_dtcs(frame)
             return dtcs
@@ -184,6 +101,168 @@ def get_dtc_codes(conn):
         return []
 
 
+def _permanent_dtc_command():
+    """Mode 0A (permanent DTCs): python-obd has no command for it, so build one once."""
+    cmd = _command_tables.get("permanent")
+    if cmd is None:
+        cmd = obd.OBDCommand("GET_PERMANENT_DTC", "Get Permanent DTCs (cannot be cleared)",
+                             b"0A", 0, obd.decoders.dtc, obd.ECU.ALL, False)
+        _command_tables["permanent"] = cmd
+    return cmd
+
+
+def _query(conn, cmd, force=False):
+    # Caller holds obd_lock
+    response = conn.query(cmd, force=force)
+    return None if response.is_null() else response.value
+
+
+def _dtc_list(conn, cmd, force=False):
+    with obd_lock:
+        value = _query(conn, cmd, force)
+    return [(code, desc) for code, desc in value] if value else []
+
+
+def _dtc_queries():
+    return (
+        ("stored", obd.commands.GET_DTC, False),
+        ("pending", obd.commands.GET_CURRENT_DTC, False),
+        # Not in the adapter's supported set (PIDs only cover Mode 01), so force it
+        ("permanent", _permanent_dtc_command(), True),
+    )
+
+
+def get_dtc_lists(conn):
+    """
+    Stored (Mode 03), pending (Mode 07) and permanent (Mode 0A) DTCs as
+    {"stored": [...], "pending": [...], "permanent": [...]} of (code, description).
+    A list that cannot be read comes back empty.
+    """
+    result = {"stored": [], "pending": [], "permanent": []}
+    if not conn:
+        return result
+    for kind, cmd, force in _dtc_queries():
+        try:
+            result[kind] = _dtc_list(conn, cmd, force)
+        except Exception as e:
+            print(f"[get_dtc_lists] {kind} error: {e}")
+    return result
+
+
+def _status_dict(status):
+    """python-obd Status -> {"mil", "dtc_count", "ignition", "readiness": {test: {...}}}."""
+    readiness = {
+        name: {"available": bool(test.available), "complete": bool(test.complete)}
+        for name, test in vars(status).items()
+        if hasattr(test, "available") and test.available
+    }
+    return {
+        "mil": bool(status.MIL),
+        "dtc_count": int(status.DTC_count),
+        "ignition": status.ignition_type,
+        "readiness": readiness,
+    }
+
+
+def get_mil_status(conn):
+    """
+    Mode 01 PID 01: {"mil": bool, "dtc_count": int}, or None if it cannot be read.
+    One short single-frame query, cheap enough to poll.
+    """
+    if not conn:
+        return None
+    with obd_lock:
+        value = _query(conn, obd.commands.STATUS)
+    if value is None:
+        return None
+    return {"mil": bool(value.MIL), "dtc_count": int(value.DTC_count)}
+
+
+def get_diagnostic_snapshot(conn):
+    """
+    Everything a full scan needs, read in one adapter session: MIL status and
+    readiness monitors, stored/pending/permanent DTCs, the freeze frame and
+    the vehicle identity (VIN, calibration IDs, CVNs: cached at connect, so
+    Mode 09 is only queried when the connection has no VIN). obd_lock is
+    held once for the whole sequence, so the queries go out back to back
+    (pipelined on an STN adapter over TCP; live polling waits instead of
+    interleaving) and the freeze frame is read exactly once.
+    """
+    started = time.perf_counter()
+    doc = {
+        "time": time.time(),
+        "vin": None,
+        "calibration_ids": [],
+        "cvns": [],
+        "status": None,
+        "dtcs": {"stored": [], "pending": [], "permanent": []},
+        "freeze_frame": {},
+        "errors": {},
+    }
+    if test:
+        frame = get_live_data(conn)
+        doc["freeze_frame"] = frame
+        doc["dtcs"]["stored"] = fault_monitor.active() if fault_monitor.has_samples else detect_dtcs(frame)
+    elif conn:
+        with obd_lock:
+            # Identity is read once per connection (ProfiledOBD keeps it); Mode 09 only if it is missing
+            identity = getattr(conn, "identity", None) or {}
+            doc["vin"] = identity.get("vin")
+            doc["calibration_ids"] = list(identity.get("calibration_ids") or [])
+            doc["cvns"] = list(identity.get("cvns") or [])
+            reads = [("status", obd.commands.STATUS, False)] + list(_dtc_queries())
+            reads += [(("freeze", name), cmd, False) for name, cmd in _commands("freeze").items()]
+            if not doc["vin"]:
+                # Mode 09 support is not probed by python-obd, so force it
+                reads.append(("vin", obd.commands.VIN, True))
+            values = _snapshot_reads(conn, reads)
+        for key, value in values.items():
+            if isinstance(key, tuple):
+                doc["freeze_frame"][key[1]] = (f"Error: {value}" if isinstance(value, Exception)
+                                               else str(value) if value is not None else "N/A")
+                continue
+            try:
+                if isinstance(value, Exception):
+                    raise value
+                if key == "status":
+                    doc["status"] = _status_dict(value) if value is not None else None
+                elif key == "vin":
+                    doc["vin"] = value.decode(errors="replace") if isinstance(value, (bytes, bytearray)) else value
+                elif value:
+                    doc["dtcs"][key] = [(code, desc) for code, desc in value]
+            except Exception as e:
+                doc["errors"][key] = str(e)
+    doc["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return doc
+
+
+def _snapshot_reads(conn, reads):
+    """
+    {key: value, None or the exception} for (key, command, force) reads. None of
+    them depends on another, so on a pipelining adapter they go out in batches
+    (forced reads in their own); otherwise one at a time. Caller holds obd_lock.
+    """
+    values = {}
+    if getattr(conn, "pipeline_depth", 1) > 1:
+        for force in (False, True):
+            group = [(key, cmd) for key, cmd, f in reads if f is force]
+            if not group:
+                continue
+            try:
+                responses = conn.query_many([cmd for _, cmd in group], force=force)
+            except Exception as e:
+                responses = [e] * len(group)
+            for (key, _), resp in zip(group, responses):
+                values[key] = resp if isinstance(resp, Exception) else None if resp.is_null() else resp.value
+        return values
+    for key, cmd, force in reads:
+        try:
+            values[key] = _query(conn, cmd, force)
+        except Exception as e:
+            values[key] = e
+    return values
+
+
 def clear_dtc(conn):
     """
     Clear all Diagnostic Trouble Codes.
@@ -193,6 +272,7 @@ def clear_dtc(conn):
             return "❌ No active connection."
         with obd_lock:
             conn.query(obd.commands.CLEAR_DTC)
+        fault_monitor.reset("cleared")
         return "✅ DTCs cleared successfully."
     except Exception as e:
         print(f"[clear_dtc] Error: {e}")
@@ -208,7 +288,7 @@ def get_freeze_frame(conn):
         return get_live_data(conn)
     if not conn:
         return frame_data
-    for name, cmd in freeze_commands.items():
+    for name, cmd in _commands("freeze").items():
         try:
             with obd_lock:
                 resp = conn.query(cmd)
@@ -225,13 +305,65 @@ def get_live_data(conn):
     live_data = {}
     if not conn:
         return live_data
-    for name, cmd in live_commands.items():
+    # With a vehicle profile, unsupported channels are known up front and
+    # each query's round trip feeds the profile's latency table.
+    profile = getattr(conn, "profile", None)
+    supported = set(profile.supported) if profile is not None and profile.supported else None
+    items = _commands("live").items()
+    group = getattr(conn, "group_by_target", None)
+    if group is not None:
+        # Commands for the same ECU back to back (see ecu_targeting.py)
+        items = group(items)
+    wanted = []
+    for name, cmd in items:
+        if supported is not None and cmd.name not in supported:
+            live_data[name] = "N/A"
+        else:
+            wanted.append((name, cmd))
+    # Manufacturer Mode 22 requests (see enhanced_pids.py); a None name marks them
+    enhanced = getattr(conn, "enhanced", None)
+    if enhanced is not None:
+        wanted += [(None, cmd) for cmd in enhanced.commands()]
+    if getattr(conn, "pipeline_depth", 1) > 1:
+        # STN adapter over TCP: requests go out in pipelined batches (see tcp_transport.py)
+        return _get_live_data_pipelined(conn, wanted, profile, enhanced, live_data)
+    for name, cmd in wanted:
         try:
             with obd_lock:
+                started = time.perf_counter()
                 resp = conn.query(cmd)
-            live_data[name] = str(resp.value) if not resp.is_null() else "N/A"
+                elapsed = time.perf_counter() - started
+            _store_response(live_data, name, cmd, resp, enhanced, profile, elapsed)
         except Exception as e:
-            live_data[name] = f"Error: {e}"
+            if name is not None:
+                live_data[name] = f"Error: {e}"
+    return live_data
+
+
+def _store_response(live_data, name, cmd, resp, enhanced, profile, elapsed):
+    if name is None:
+        live_data.update(enhanced.collect(cmd, resp))
+    else:
+        live_data[name] = "N/A" if resp.is_null() else str(resp.value)
+    if profile is not None and not resp.is_null():
+        profile.record_latency(cmd.name, elapsed)
+
+
+def _get_live_data_pipelined(conn, wanted, profile, enhanced, live_data):
+    try:
+        with obd_lock:
+            started = time.perf_counter()
+            responses = conn.query_many([cmd for _, cmd in wanted])
+            elapsed = time.perf_counter() - started
+    except Exception as e:
+        for name, _ in wanted:
+            if name is not None:
+                live_data[name] = f"Error: {e}"
+        return live_data
+    # A batch shares its round trips, so each channel is charged its share
+    share = elapsed / max(len(wanted), 1)
+    for (name, cmd), resp in zip(wanted, responses):
+        _store_response(live_data, name, cmd, resp, enhanced, profile, share)
     return live_data
 
 
@@ -241,27 +373,39 @@ def get_live_data(conn):
 
 live_data_cache = {}
 polling_active = False
+# Stop event of the current polling thread. Each thread gets its own, so a thread
+# still finishing a query after a stop never sees a later start as "keep going".
+_polling_stop = None
 
 
 def start_live_polling(conn, interval=1):
     """
     Continuously query live OBD data every `interval` seconds in a background thread.
     """
-    global polling_active, polling_thread
+    global polling_active, polling_thread, _polling_stop
     if polling_active:
         return  # Already polling
     if not conn:
         return
     polling_active = True
+    stop = _polling_stop = threading.Event()
 
     def poll():
-        global live_data_cache, polling_active
+        global live_data_cache
         print("✅ Live data polling started.")
-        while polling_active:
+        while not stop.is_set():
             try:
                 data = get_live_data(conn)
+                if stop.is_set():
+                    break  # stopped mid-query: a newer thread may already be publishing
                 live_data_cache = data
-                time.sleep(interval)
+                try:
+                    # Incremental fault detection on every new sample
+                    fault_monitor.feed(data, time.time())
+                except Exception as e:
+                    print(f"[Polling] Fault monitor error: {e}")
+                if stop.wait(interval):
+                    break
             except Exception as e:
                 print(f"[Polling] Error: {e}")
                 break
@@ -271,16 +415,19 @@ def start_live_polling(conn, interval=1):
     polling_thread.start()
 
 
-def stop_live_polling():
+def stop_live_polling(wait=True):
     """
     Stop the continuous live data polling thread.
+    With wait=False the thread is only signalled (it exits after its current query).
     """
     global polling_active, polling_thread
     if not polling_active:
         return
     polling_active = False
+    if _polling_stop is not None:
+        _polling_stop.set()
     print("🛑 Live data polling stop requested.")
-    if polling_thread and polling_thread.is_alive():
+    if wait and polling_thread and polling_thread.is_alive():
         polling_thread.join(timeout=2)
     polling_thread = None
 
@@ -288,5 +435,7 @@ def stop_live_polling():
 def get_latest_live_data():
     """
     Return the most recent cached live data snapshot.
+    Each poll publishes a new dict and never mutates it afterwards, so the
+    snapshot can be handed to an in-process caller without copying.
     """
     return live_data_cache
\ No newline at end of file
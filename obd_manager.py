@@ -1,20 +1,62 @@
-import obd
+import os
+
+from lazy_import import lazy_module
+import elm_tuning
+import enhanced_pids
+import tcp_transport
+import vehicle_profile
+from obd_functions import obd_lock
+
+obd = lazy_module("obd")
 
 class OBDManager:
     def __init__(self):
         self.conn = None
 
     def connect(self, port=None, test=False):               # set test to true to use a simulated connection
+        # ProfiledOBD: known vehicles skip protocol and command discovery (see vehicle_profile.py)
         if test:
-            self.conn = obd.OBD("COM9")
+            self.conn = vehicle_profile.open_connection("COM9")
+        elif tcp_transport.is_tcp_port(port):
+            # Wi-Fi adapter (tcp://host:port): the baud rate is meaningless, so skip python-obd's baud probe
+            self.conn = vehicle_profile.open_connection(
+                tcp_transport.tcp_url(port), baudrate=38400, fast=False, timeout=5)
         else:
-            self.conn = obd.OBD(port) if port else obd.OBD(fast=False, timeout=5)
+            self.conn = (vehicle_profile.open_connection(port) if port
+                         else vehicle_profile.open_connection(fast=False, timeout=5))
+        if self.conn.is_connected() and os.environ.get("OBDPLUS_ELM_TUNING", "1") != "0":
+            self.tune_adapter()
+        if self.conn.is_connected():
+            # Manufacturer Mode 22 channels for this make, polled with the live set
+            try:
+                self.conn.enhanced = enhanced_pids.poller_for(self.conn)
+            except Exception as e:
+                print(f"[OBDManager] Enhanced PIDs unavailable: {e}")
         return self.conn.is_connected()
 
+    def tune_adapter(self):
+        """Adaptive timing, tighter timeout, spaces off and response-count hints (see elm_tuning.py)."""
+        tuner = elm_tuning.AdapterTuner(self.conn)
+        try:
+            with obd_lock:
+                tuner.apply()
+        except Exception as e:
+            print(f"[OBDManager] Adapter tuning skipped: {e}")
+            return None
+        self.conn.tuner = tuner
+        return tuner
+
     def get_conn(self):
         return self.conn
 
+    def get_profile(self):
+        return getattr(self.conn, "profile", None)
+
     def disconnect(self):
         if self.conn:
+            # Persist the response latencies learned during this session
+            profile = self.get_profile()
+            if profile is not None and profile.dirty:
+                vehicle_profile.store.save(profile)
             self.conn.close()
             self.conn = None
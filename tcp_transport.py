@@ -0,0 +1,313 @@
+"""
+TCP transport for Wi-Fi ELM327/STN adapters.
+
+python-obd opens its port with pyserial's `serial_for_url`, so a TCP adapter
+plugs in as a pyserial URL handler: `tcp_url("192.168.0.10:35000")` gives
+"obdtcp://192.168.0.10:35000", which opens a TcpSerial instead of a serial
+port. Compared to pyserial's generic socket:// handler it
+
+  * disables Nagle (TCP_NODELAY): a request is a handful of bytes and must
+    leave at once instead of waiting for an ACK of the previous segment
+  * reads in blocks into its own buffer (python-obd reads the prompt-
+    terminated response a byte at a time) and sizes the socket buffers
+  * can pipeline: `pipeline([req, ...])` sends several requests in one
+    segment and splits the replies at the adapter's `>` prompts, in order.
+    Only STN chips queue input while a request is running (an ELM327
+    aborts the running request on any input), so the connection layer uses
+    it only for them. Each Wi-Fi round trip costs 20-50 ms; pipelining
+    pays it once per batch.
+
+`python tcp_transport.py [port] [--stn] [--latency MS]` runs StandInAdapter,
+a small local TCP adapter for trying all of this without a car.
+"""
+import os
+import re
+import select
+import socket
+import sys
+import threading
+import time
+
+URL_SCHEME = "obdtcp"
+DEFAULT_PORT = 35000  # the usual Wi-Fi dongle port
+RECV_CHUNK = 4096
+SOCKET_BUFFER = 64 * 1024
+PIPELINE_DEPTH = int(os.environ.get("OBDPLUS_TCP_PIPELINE", "8"))
+PROMPT = b">"
+
+
+# Bare "host:port" (no path separators, so never a serial device like COM9 or /dev/ttyUSB0)
+_HOST_PORT = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.\-]*:\d{1,5}$")
+
+
+def is_tcp_port(port) -> bool:
+    if not isinstance(port, str):
+        return False
+    p = port.strip().lower()
+    return p.startswith(("tcp://", "socket://", f"{URL_SCHEME}://")) or bool(_HOST_PORT.match(p))
+
+
+def tcp_url(port: str) -> str:
+    """'tcp://host:port' / 'socket://host:port' / 'host:port' -> 'obdtcp://host:port' (registers the handler)."""
+    address = port.strip().split("://", 1)[-1]
+    if ":" not in address:
+        address = f"{address}:{DEFAULT_PORT}"
+    register_url_handler()
+    return f"{URL_SCHEME}://{address}"
+
+
+def register_url_handler():
+    """Make pyserial's serial_for_url open obdtcp:// URLs with TcpSerial."""
+    import serial
+    # pyserial imports "<package>.protocol_<scheme>" and uses its Serial class;
+    # this module stands in as both the package and the handler module.
+    sys.modules.setdefault(f"{__name__}.protocol_{URL_SCHEME}", sys.modules[__name__])
+    if __name__ not in serial.protocol_handler_packages:
+        serial.protocol_handler_packages.append(__name__)
+
+
+class TcpSerial:
+    """The subset of pyserial's Serial API that python-obd uses, over a TCP socket."""
+
+    pipeline_depth = PIPELINE_DEPTH
+
+    def __init__(self, port=None, baudrate=38400, timeout=None, **_ignored):
+        self.port = port
+        self.baudrate = baudrate  # meaningless on TCP; python-obd sets it
+        self.timeout = timeout
+        self._sock = None
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    # --- pyserial surface ---
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None
+
+    @property
+    def name(self):
+        return self.port
+
+    portstr = name
+
+    def open(self):
+        address = str(self.port).split("://", 1)[-1]
+        host, _, port = address.rpartition(":")
+        sock = socket.create_connection((host, int(port)), timeout=self.timeout or 10)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.settimeout(None)
+        self._sock = sock
+
+    def close(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _fill(self, wait) -> bool:
+        """Append whatever the socket has (waiting up to `wait` s) to the buffer. False on EOF/timeout."""
+        ready, _, _ = select.select([self._sock], [], [], wait)
+        if not ready:
+            return False
+        data = self._sock.recv(RECV_CHUNK)
+        if not data:
+            raise ConnectionError("adapter closed the connection")
+        self._buffer.extend(data)
+        return True
+
+    @property
+    def in_waiting(self) -> int:
+        while self._sock is not None and self._fill(0):
+            pass
+        return len(self._buffer)
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while len(self._buffer) < size:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                break
+            if not self._fill(wait):
+                break
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def write(self, data: bytes) -> int:
+        self._sock.sendall(data)
+        return len(data)
+
+    def flush(self):
+        pass  # sendall already handed everything to the kernel (and Nagle is off)
+
+    def reset_input_buffer(self):
+        self._buffer.clear()
+        while self._sock is not None and self._fill(0):
+            self._buffer.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    flushInput = reset_input_buffer
+    flushOutput = reset_output_buffer
+
+    # --- pipelining ---
+    def pipeline(self, requests, timeout: float = None):
+        """
+        Send `requests` (bytes, without CR) back to back in one write and return
+        one list of response lines per request, matched in order by prompt.
+        A request whose reply did not arrive in time gets an empty list.
+        """
+        if not requests:
+            return []
+        timeout = timeout if timeout is not None else (self.timeout or 5)
+        with self._lock:
+            self.reset_input_buffer()
+            self.write(b"".join(r + b"\r" for r in requests))
+            deadline = time.monotonic() + timeout
+            while self._buffer.count(PROMPT) < len(requests):
+                wait = deadline - time.monotonic()
+                if wait <= 0 or not self._fill(wait):
+                    break
+            chunks = bytes(self._buffer).split(PROMPT)
+            self._buffer.clear()
+        replies = []
+        for i, request in enumerate(requests):
+            if i >= len(chunks) - 1:
+                replies.append([])  # no prompt for this one: timed out
+                continue
+            lines = [ln.strip() for ln in chunks[i].decode("ascii", errors="replace").split("\r")]
+            # Drop blanks and the echo, if the adapter still has echo on
+            replies.append([ln for ln in lines if ln and ln.encode() != request])
+        return replies
+
+
+# pyserial URL handler entry point (see register_url_handler)
+Serial = TcpSerial
+
+
+# ===============================
+# Stand-in adapter for testing
+# ===============================
+
+class StandInAdapter:
+    """
+    Minimal TCP ELM327 (or, with stn=True, STN) emulator: AT commands answer
+    OK, a few Mode 01 PIDs answer from an engine ECU at 7E8 with headers on,
+    everything else answers NO DATA. Requests are served strictly in the
+    order received, so pipelined input works like on an STN chip.
+    `latency` delays each received segment, like a Wi-Fi round trip.
+    """
+
+    PIDS = {
+        "0100": "BE3FA813", "0101": "00076500", "010C": "1AF8", "010D": "32",
+        "0105": "7B", "010F": "46", "0110": "0190", "0111": "33",
+    }
+
+    def __init__(self, host="127.0.0.1", port=0, stn=False, latency=0.0):
+        self.stn = stn
+        self.latency = latency
+        self.requests = []
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"tcp://{self.address[0]}:{self.address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name="elm-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.close()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._session, args=(client,), daemon=True).start()
+
+    def _session(self, client):
+        # Like a real dongle, answer at once (Nagle would hold each reply for the client's ACK)
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        state = {"echo": True, "spaces": True, "headers": False}
+        pending = b""
+        with client:
+            while True:
+                try:
+                    data = client.recv(RECV_CHUNK)
+                except OSError:
+                    return
+                if not data:
+                    return
+                pending += data
+                if self.latency:
+                    time.sleep(self.latency)  # the link's round trip, paid once per segment
+                while b"\r" in pending:
+                    line, pending = pending.split(b"\r", 1)
+                    request = line.strip().decode("ascii", errors="replace").upper().replace(" ", "")
+                    reply = self._reply(request, state)
+                    echo = line + b"\r" if state["echo"] else b""
+                    try:
+                        client.sendall(echo + reply.encode() + b"\r\r>")
+                    except OSError:
+                        return
+
+    def _reply(self, request, state):
+        self.requests.append(request)
+        if not request:
+            return ""
+        if request.startswith("AT"):
+            cmd = request[2:]
+            if cmd in ("Z", "WS"):
+                state.update(echo=True, spaces=True, headers=False)
+                return "ELM327 v1.4b"
+            if cmd == "I":
+                return "ELM327 v1.4b"
+            if cmd in ("E0", "E1"):
+                state["echo"] = cmd == "E1"
+            elif cmd in ("S0", "S1"):
+                state["spaces"] = cmd == "S1"
+            elif cmd in ("H0", "H1"):
+                state["headers"] = cmd == "H1"
+            elif cmd == "RV":
+                return "12.6V"
+            elif cmd == "DPN":
+                return "A6"
+            return "OK"
+        if request.startswith("ST"):
+            return "STN2120 r4.3" if self.stn and request == "STI" else "?"
+        pid = request[:4]
+        value = self.PIDS.get(pid)
+        if value is None:
+            return "NO DATA"
+        payload = f"4{pid[1]}{pid[2:]}{value}"
+        data = [payload[i:i + 2] for i in range(0, len(payload), 2)]
+        frame = [f"{len(data):02X}"] + data
+        if state["headers"]:
+            frame = ["7E8"] + frame
+        sep = " " if state["spaces"] else ""
+        return sep.join(frame)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    port = int(next((a for a in args if a.isdigit()), DEFAULT_PORT))
+    latency = float(args[args.index("--latency") + 1]) / 1000 if "--latency" in args else 0.0
+    adapter = StandInAdapter("0.0.0.0", port, stn="--stn" in args, latency=latency).start()
+    print(f"Stand-in {'STN' if adapter.stn else 'ELM327'} adapter on port {port}; connect to tcp://127.0.0.1:{port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        adapter.close()
@@ -1,44 +1,94 @@
+import threading
+import uuid
 import requests
-from requests.adapters import HTTPAdapter, Retry
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .transport import default_transport
+from .utils.cancel import CancelToken
 
 
 class ApiClient:
-    def __init__(self, base_url: str = "http://127.0.0.1:8000", timeout: int = 10):
+    """Typed wrappers around the backend endpoints.
+
+    The actual calls go through a transport: in-process when the launcher hosts
+    the backend in this process, HTTP otherwise (see ui/transport.py). It is
+    picked on the first call, so the window can be built while the backend boots.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", timeout: int = 10, transport=None):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self.session = requests.Session()
-        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        self._transport = transport
+        self._transport_lock = threading.Lock()
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    # May wait for a backend that is still booting in this process
+                    self._transport = default_transport(self.base_url, self.timeout)
+        return self._transport
+
+    @property
+    def transport_ready(self) -> bool:
+        """True once a transport was picked (i.e. the backend has been used)."""
+        return self._transport is not None
 
     # --- Helpers ---
-    def _get(self, path: str, timeout: Optional[float] = None) -> Any:
-        url = f"{self.base_url}{path}"
-        t = timeout if timeout is not None else self.timeout
-        r = self.session.get(url, timeout=t)
-        r.raise_for_status()
-        return r.json()
+    def _get(self, path: str, timeout: Optional[float] = None,
+             cancel_token: Optional[CancelToken] = None) -> Any:
+        return self.transport.get(path, timeout=timeout, cancel_token=cancel_token)
 
     def _post(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
-        url = f"{self.base_url}{path}"
-        t = timeout if timeout is not None else self.timeout
-        r = self.session.post(url, json=json, timeout=t)
-        r.raise_for_status()
-        return r.json()
+        return self.transport.post(path, json=json, timeout=timeout)
+
+    def _stream(self, path: str, timeout: Optional[float] = None,
+                cancel_token: Optional[CancelToken] = None) -> Iterator[Tuple[str, Any]]:
+        return self.transport.stream(path, timeout=timeout, cancel_token=cancel_token)
+
+    def _fire_and_forget(self, path: str, timeout: float = 2):
+        self.transport.fire_and_forget(path, timeout=timeout)
+
+    def _get_once(self, path: str, timeout: float) -> Any:
+        return self.transport.get_once(path, timeout=timeout)
 
     # --- Endpoints ---
-    def connect(self) -> Dict[str, Any]:
+    def connect(self, port: Optional[str] = None) -> Dict[str, Any]:
+        # port: serial port or tcp://host:port (Wi-Fi adapter); None lets the backend choose
+        if port:
+            return self._get(f"/connect?port={quote(port, safe='')}")
         return self._get("/connect")
 
     def disconnect(self) -> Dict[str, Any]:
         return self._get("/disconnect")
 
+    def shutdown_stop_live(self, timeout: float = 1) -> Dict[str, Any]:
+        # One attempt, short timeout: used while the app exits
+        return self._get_once("/live/stop?wait=false", timeout)
+
+    def shutdown_disconnect(self, timeout: float = 1) -> Dict[str, Any]:
+        return self._get_once("/disconnect?fast=true", timeout)
+
     def get_dtc(self) -> List[List[str]]:
         # Returns list of [code, description]
         return self._get("/dtc")
 
+    def get_diagnostic_snapshot(self, cached: bool = False) -> Dict[str, Any]:
+        # Full scan (status, stored/pending/permanent codes, freeze frame, VIN) in one adapter session;
+        # cached=True merges the background monitors' lists into the last scan without a bus read
+        if cached:
+            return self._get("/diagnostics/snapshot?cached=true")
+        return self._get("/diagnostics/snapshot", timeout=30)
+
+    def get_vehicle(self) -> Dict[str, Any]:
+        return self._get("/vehicle")
+
+    def get_monitor_results(self, refresh: bool = False) -> Dict[str, Any]:
+        # Mode 06 test results; the first read after a new drive cycle queries every supported MID
+        return self._get(f"/monitors?refresh={'true' if refresh else 'false'}", timeout=30)
+
     def get_freeze(self) -> Dict[str, str]:
         return self._get("/freeze")
 
@@ -54,6 +104,44 @@ class ApiClient:
     def get_live_data(self) -> Dict[str, str]:
         return self._get("/live/data")
 
-    def explain_code(self, code: str) -> Dict[str, Any]:
+    def get_dtc_info(self, code: str, cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        # Offline knowledge base lookup; answers in milliseconds
+        return self._get(f"/dtc/info/{code}", cancel_token=cancel_token)
+
+    def search_dtc(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return self._get(f"/dtc/search?q={requests.utils.quote(query)}&limit={limit}")
+
+    def explain_code(self, code: str, cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         # Explain can be slower (cloud call). Allow longer timeout here to match backend.
-        return self._get(f"/dtc/explain/{code}", timeout=70)
+        return self._get(f"/dtc/explain/{code}", timeout=70, cancel_token=cancel_token)
+
+    def explain_code_stream(self, code: str, cancel_token: Optional[CancelToken] = None) -> Iterator[Tuple[str, Any]]:
+        # Yields ("start"|"chunk"|"error"|"done", payload) while the explanation is generated.
+        # The timeout is per read, so it only trips if the stream stalls.
+        # On cancel the backend is told to drop its in-flight cloud call as well.
+        job_id = uuid.uuid4().hex
+        if cancel_token is not None:
+            cancel_token.on_cancel(lambda: self.cancel_explain(job_id))
+        return self._stream(f"/dtc/explain/{code}/stream?job_id={job_id}", timeout=70,
+                            cancel_token=cancel_token)
+
+    def cancel_explain(self, job_id: str):
+        self._fire_and_forget(f"/dtc/explain/cancel/{job_id}")
+
+    def get_dtc_monitor(self) -> Dict[str, Any]:
+        return self._get("/dtc/monitor")
+
+    def get_dtc_history(self, limit: int = 200) -> List[Dict[str, Any]]:
+        return self._get(f"/dtc/history?limit={limit}")
+
+    def get_dtc_timeline(self, limit: int = 200) -> Dict[str, Any]:
+        return self._get(f"/dtc/timeline?limit={limit}")
+
+    def dtc_events_stream(self, cancel_token: Optional[CancelToken] = None) -> Iterator[Tuple[str, Any]]:
+        # Yields ("active"|"enter"|"exit"|"reset"|"appear"|"clear"|"status"|"ping", payload)
+        # as the backend detects faults or the DTC monitor sees codes change.
+        # The server pings every 15 s, so the per-read timeout only trips on a dead stream.
+        sub_id = uuid.uuid4().hex
+        if cancel_token is not None:
+            cancel_token.on_cancel(lambda: self._fire_and_forget(f"/dtc/events/cancel/{sub_id}"))
+        return self._stream(f"/dtc/events?sub_id={sub_id}", timeout=45, cancel_token=cancel_token)
@@ -9,19 +9,26 @@ import sys as _sys
 try:
     # Preferred when `ui` is imported as a package (e.g. `from ui import app`).
     from .windows.main_window import MainWindow
+    from .utils.stylesheet import apply_theme, compile_qss, DEFAULT_THEME
 except Exception:
     # Fallback for running `python ui/app.py` directly during development.
     # Use absolute package import which works when the parent package is on sys.path.
     from ui.windows.main_window import MainWindow
+    from ui.utils.stylesheet import apply_theme, compile_qss, DEFAULT_THEME
 
 
-def load_stylesheet(app: QApplication, path: str):
-    """Load a stylesheet file. If `path` is relative, resolve it relative to this module (ui/).
-    This function preprocesses CSS-like custom properties declared as
-    `--name: value;` and replaces `var(--name)` occurrences because Qt's
-    QSS doesn't support CSS custom properties.
+def load_stylesheet(app: QApplication, path: str = None, theme: str = None):
+    """Apply the application stylesheet.
+
+    With no `path`, the compiled and cached output of ui/resources/style.qss is
+    applied for `theme` (default: OBDPLUS_THEME or the built-in dark theme);
+    see ui/utils/stylesheet.py. An explicit `path` (relative paths resolve
+    against ui/) is compiled directly, without caching.
     Print a simple warning if loading fails so issues are visible during development.
     """
+    if path is None:
+        apply_theme(app, theme or os.environ.get("OBDPLUS_THEME", DEFAULT_THEME))
+        return
     try:
         # Resolve relative paths relative to this file (ui/)
         if not os.path.isabs(path):
@@ -32,44 +39,17 @@ def load_stylesheet(app: QApplication, path: str):
             print(f"Warning: stylesheet not found: {path}", file=_sys.stderr)
             return
 
-        # Read raw stylesheet text
         with open(path, "r", encoding="utf-8") as f:
-            raw = f.read()
-
-        # Extract simple --name: value; declarations and substitute var(--name)
-        import re
-        vars_map = {}
-        for m in re.finditer(r'--([\w-]+)\s*:\s*([^;]+);', raw):
-            vars_map[m.group(1).strip()] = m.group(2).strip()
-
-        def _replace_var(match):
-            key = match.group(1)
-            return vars_map.get(key, match.group(0))
-
-        processed = re.sub(r'var\(--([\w-]+)\)', _replace_var, raw)
-
-        # Remove the original custom-property declarations since QSS doesn't support them
-        processed = re.sub(r'--[\w-]+\s*:\s*[^;]+;\s*', '', processed)
-
-        # Remove any `transition:` properties (not supported by QSS)
-        processed = re.sub(r'transition\s*:\s*[^;]+;\s*', '', processed)
-
-        # Remove properties unsupported by Qt QSS that appear in the stylesheet
-        # e.g., transform and box-shadow are common CSS properties not supported by QSS.
-        processed = re.sub(r'box-shadow\s*:\s*[^;]+;\s*', '', processed, flags=re.IGNORECASE)
-        processed = re.sub(r'transform\s*:\s*[^;]+;\s*', '', processed, flags=re.IGNORECASE)
-        # Also remove vendor-prefixed variants and any remaining common unsupported props
-        processed = re.sub(r'-webkit-box-shadow\s*:\s*[^;]+;\s*', '', processed, flags=re.IGNORECASE)
-        processed = re.sub(r'-webkit-transform\s*:\s*[^;]+;\s*', '', processed, flags=re.IGNORECASE)
-        app.setStyleSheet(processed)
+            app.setStyleSheet(compile_qss(f.read()))
     except Exception as e:
         print(f"Error loading stylesheet {path}: {e}", file=_sys.stderr)
 
 
-def main():
-    app = QApplication(sys.argv)
-    # Load the stylesheet relative to this file (ui/resources/style.qss)
-    load_stylesheet(app, os.path.join("resources", "style.qss"))
+def create_app(argv=None) -> QApplication:
+    """Create the QApplication with the stylesheet and window icon applied."""
+    app = QApplication.instance() or QApplication(argv if argv is not None else sys.argv)
+    # Compiled ui/resources/style.qss (cached; precompiled in packaged builds)
+    load_stylesheet(app)
 
     # Ensure an app icon exists. We ship a small base64 placeholder in `assets/app_icon.b64`.
     # Compute assets path relative to ui/ (one level up -> assets)
@@ -94,8 +74,17 @@ def main():
                 print(f"Warning: no app icon found in {assets_dir}", file=_sys.stderr)
     except Exception as e:
         print(f"Error setting application icon: {e}", file=_sys.stderr)
+    return app
+
 
-    win = MainWindow()
+def create_window() -> MainWindow:
+    """Build the main window (requires create_app() first). Not shown yet."""
+    return MainWindow()
+
+
+def main():
+    app = create_app()
+    win = create_window()
     win.show()
 
     sys.exit(app.exec())
@@ -1,14 +1,14 @@
-from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QMessageBox
 
-from ..utils.workers import FunctionWorker
+from ..utils.workers import FunctionWorker, get_pool, INTERACTIVE
 
 
 class ClearPage(QWidget):
     def __init__(self, main):
         super().__init__()
         self.main = main
-        self.pool = QThreadPool.globalInstance()
+        self.pool = get_pool(INTERACTIVE)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(32, 24, 32, 24)
@@ -52,7 +52,7 @@ class ClearPage(QWidget):
             self.btn_clear.setEnabled(True)
             self.loading.hide()
         worker.signals.finished.connect(_done)
-        self.pool.start(worker)
+        self.pool.start(worker, key="clear")
 
     def _show_result(self, res: dict):
         # Backend returns {"result": <string>}
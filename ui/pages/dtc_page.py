@@ -1,18 +1,26 @@
-from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtCore import Qt
 from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton, QScrollArea, QFrame, QHBoxLayout,
     QMessageBox, QDialog, QDialogButtonBox, QGridLayout, QTextBrowser
 )
 
-from ..utils.workers import FunctionWorker
+from ..utils.cancel import CancelToken
+from ..utils.workers import FunctionWorker, StreamWorker, get_pool, INTERACTIVE, BULK
 
 
 class DtcPage(QWidget):
+    # Rebuilt (and reloaded in on_activated) after being off-screen for a while
+    RELEASE_WHEN_IDLE = True
+
     def __init__(self, main):
         super().__init__()
         self.main = main
-        self.pool = QThreadPool.globalInstance()
+        self.pool = get_pool(INTERACTIVE)
+        # Cloud explanations can run for a minute; keep them off the adapter pool
+        self.bulk_pool = get_pool(BULK)
+        # Fault events pushed by the backend while the page is shown
+        self._events_token = None
 
         outer = QVBoxLayout(self)
         outer.setContentsMargins(32, 24, 32, 24)
@@ -31,6 +39,12 @@ class DtcPage(QWidget):
         controls.addStretch(1)
         outer.addLayout(controls)
 
+        # MIL / code counts / VIN from the last full scan
+        self.summary = QLabel("")
+        self.summary.setObjectName("SubHeader")
+        outer.addWidget(self.summary)
+        self.summary.hide()
+
         # Scroll list
         # Page-level loading indicator
         self.loading = QLabel("Loading...")
@@ -50,9 +64,41 @@ class DtcPage(QWidget):
     # Page lifecycle
     def on_activated(self):
         self.load_codes()
+        self._start_fault_events()
 
     def on_deactivated(self):
-        pass
+        self._stop_fault_events()
+
+    def release(self):
+        self._stop_fault_events()
+
+    # Pushed fault events: refresh the list when a code appears or clears
+    def _start_fault_events(self):
+        if self._events_token is not None:
+            return
+        token = self._events_token = CancelToken()
+        worker = StreamWorker(self.main.api.dtc_events_stream, cancel_token=token)
+        worker.signals.progress.connect(self._on_fault_event)
+        worker.signals.error.connect(lambda e: None)
+        worker.signals.finished.connect(lambda: self._fault_events_ended(token))
+        self.bulk_pool.start(worker, key="dtc/events")
+
+    def _stop_fault_events(self):
+        token, self._events_token = self._events_token, None
+        if token is not None:
+            token.cancel()
+
+    def _fault_events_ended(self, token):
+        if token is not self._events_token:
+            return  # stopped on purpose
+        # Stream dropped (backend restarted or timed out): reconnect while shown
+        self._events_token = None
+        QTimer.singleShot(5000, lambda: self._start_fault_events() if self.isVisible() else None)
+
+    def _on_fault_event(self, item):
+        event, _data = item
+        if event in ("enter", "exit", "reset", "appear", "clear"):
+            self._rescan()
 
     def load_codes(self):
         self.btn_refresh.setEnabled(False)
@@ -68,10 +114,6 @@ class DtcPage(QWidget):
             if w:
                 w.deleteLater()
 
-        worker = FunctionWorker(self.main.api.get_dtc)
-        worker.signals.result.connect(self._populate_codes)
-        worker.signals.error.connect(lambda e: QMessageBox.critical(self, "DTC Error", str(e)))
-
         def _finished():
             self.btn_refresh.setEnabled(True)
             try:
@@ -79,8 +121,44 @@ class DtcPage(QWidget):
             except Exception:
                 pass
 
+        # One backend call reads everything the scan needs in a single adapter session
+        worker = FunctionWorker(self.main.api.get_diagnostic_snapshot)
+        worker.signals.result.connect(self._populate_snapshot)
+        worker.signals.error.connect(lambda e: QMessageBox.critical(self, "DTC Error", str(e)))
         worker.signals.finished.connect(_finished)
-        self.pool.start(worker)
+        self.pool.start(worker, key="diagnostics/snapshot")
+
+    def _rescan(self):
+        # Pushed updates: the monitors already re-read the lists, so take their copies
+        # (no full sweep); keep the current cards until the new document arrives
+        worker = FunctionWorker(self.main.api.get_diagnostic_snapshot, True)
+        worker.signals.result.connect(self._populate_snapshot)
+        worker.signals.error.connect(lambda e: None)
+        self.pool.start(worker, key="diagnostics/snapshot/cached")
+
+    def _populate_snapshot(self, doc):
+        if not isinstance(doc, dict):
+            self._populate_codes([])
+            return
+        dtcs = doc.get("dtcs") or {}
+        codes = []
+        for kind in ("stored", "pending", "permanent"):
+            codes += [(pair[0], pair[1], kind) for pair in dtcs.get(kind) or [] if len(pair) > 1]
+
+        parts = []
+        status = doc.get("status")
+        if isinstance(status, dict):
+            parts.append("MIL on" if status.get("mil") else "MIL off")
+            readiness = status.get("readiness") or {}
+            if readiness:
+                done = sum(1 for t in readiness.values() if t.get("complete"))
+                parts.append(f"Monitors ready {done}/{len(readiness)}")
+        parts.append(", ".join(f"{len(dtcs.get(k) or [])} {k}" for k in ("stored", "pending", "permanent")))
+        if doc.get("vin"):
+            parts.append(f"VIN {doc['vin']}")
+        self.summary.setText("   |   ".join(parts))
+        self.summary.show()
+        self._populate_codes(codes)
 
     def _populate_codes(self, codes):
         # Normalize backend response and handle "no codes" case with a simple message.
@@ -125,6 +203,7 @@ class DtcPage(QWidget):
         lbl_code.setObjectName("CodeLabel")
         lbl_desc = QLabel(desc)
         lbl_desc.setObjectName("DescLabel")
+        kind = pair[2] if len(pair) > 2 else "stored"
 
         btn = QPushButton("Explain with AI")
         btn.setObjectName("SecondaryButton")
@@ -135,6 +214,11 @@ class DtcPage(QWidget):
         grid.addWidget(QLabel("Description:"), 1, 0)
         grid.addWidget(lbl_desc, 1, 1)
         grid.addWidget(btn, 0, 2, 2, 1)
+        if kind != "stored":
+            lbl_kind = QLabel(kind.capitalize())
+            lbl_kind.setObjectName("SubHeader")
+            grid.addWidget(QLabel("Status:"), 2, 0)
+            grid.addWidget(lbl_kind, 2, 1)
 
         return frame
 
@@ -161,7 +245,7 @@ class DtcPage(QWidget):
             pass
         spinner = QLabel("Loading... ")
         spinner.setObjectName("LoadingText")
-        note = QLabel("Note: AI explanation can take up to 70 seconds.")
+        note = QLabel("Note: the AI explanation appears as it is generated.")
         note.setObjectName("SubHeader")
         layout.addWidget(spinner)
         layout.addWidget(note)
@@ -196,47 +280,99 @@ class DtcPage(QWidget):
                 )
             return html_candidate
 
-        def on_result(res: dict):
-            # If the dialog has been closed by the user, ignore late results
-            if not dlg.isVisible():
-                return
-            # stop spinner
+        # Streamed fragments are accumulated and re-rendered at most every 80 ms;
+        # QTextBrowser tolerates the partial (unclosed) HTML in between.
+        state = {"html": "", "freeze_frame": None, "error": None, "local": ""}
+        render_timer = QTimer(dlg)
+        render_timer.setSingleShot(True)
+        render_timer.setInterval(80)
+
+        def _stop_spinner():
             try:
                 timer.stop()
             except Exception:
                 pass
             spinner.hide()
-            # main.py returns { code, freeze_frame, explanation }
-            # explanation may itself be a dict with 'explanation' or HTML string
-            html = None
-            exp = res.get("explanation")
-            if isinstance(exp, dict):
-                html = exp.get("explanation") or exp.get("html") or exp.get("error") or str(exp)
-            elif isinstance(exp, str):
-                html = exp
-            if not html:
-                html = f"<pre>{res}</pre>"
 
+        def _render():
+            bar = text.verticalScrollBar()
+            pos = bar.value()
+            text.setHtml(state["html"])
+            bar.setValue(pos)
+
+        render_timer.timeout.connect(_render)
+
+        def on_event(item):
+            # If the dialog has been closed by the user, ignore late events
+            if not dlg.isVisible():
+                return
+            event, data = item
+            if event == "start":
+                state["freeze_frame"] = data.get("freeze_frame") if isinstance(data, dict) else None
+            elif event == "chunk":
+                fragment = data.get("html", "") if isinstance(data, dict) else str(data)
+                if not fragment:
+                    return
+                if not state["html"]:
+                    _stop_spinner()
+                state["html"] += fragment
+                if not render_timer.isActive():
+                    render_timer.start()
+            elif event == "error":
+                state["error"] = data.get("error") if isinstance(data, dict) else str(data)
+
+        def on_finished():
+            if not dlg.isVisible():
+                return
+            _stop_spinner()
+            render_timer.stop()
+            res = {"code": code, "freeze_frame": state["freeze_frame"]}
+            if state["error"] and not state["html"] and state["local"]:
+                # Keep the offline reference and say why the AI part is missing
+                text.setHtml(state["local"] + f"<hr><b>AI explanation unavailable.</b><pre>{state['error']}</pre>")
+                return
+            if state["error"] and not state["html"]:
+                # Show a concise friendly message plus the low-level error details as preformatted text
+                text.setHtml(f"<b>Explain failed.</b><br><pre>{state['error']}</pre>")
+                return
+            if not state["html"]:
+                text.setHtml(f"<pre>{res}</pre>")
+                return
             # Clean or replace generic message if present
-            safe_html = _clean_html_candidate(html, res)
-            text.setHtml(safe_html)
+            res["explanation"] = {"explanation": state["html"], "error": state["error"]}
+            state["html"] = _clean_html_candidate(state["html"], res)
+            if state["error"]:
+                state["html"] += f"<hr><i>Explanation interrupted:</i><pre>{state['error']}</pre>"
+            _render()
 
         def on_error(exc):
             # Ignore errors if dialog closed
             if not dlg.isVisible():
                 return
-            try:
-                timer.stop()
-            except Exception:
-                pass
-            spinner.hide()
-            # Show a concise friendly message plus the low-level error details as preformatted text
-            text.setHtml(f"<b>Explain failed.</b><br><pre>{exc}</pre>")
+            state["error"] = str(exc)
+
+        def on_local(info):
+            # Offline knowledge base entry: shown instantly until the first streamed fragment
+            if not dlg.isVisible() or not isinstance(info, dict) or not info.get("html"):
+                return
+            state["local"] = info["html"]
+            if not state["html"]:
+                text.setHtml(state["local"] + "<hr><i>Offline reference. The AI explanation is loading...</i>")
 
-        worker = FunctionWorker(self.main.api.explain_code, code)
-        worker.signals.result.connect(on_result)
+        # One token for both requests: closing the dialog aborts them and tells the
+        # backend to drop the cloud call, so no pool thread is left waiting on it.
+        token = CancelToken()
+
+        local_worker = FunctionWorker(self.main.api.get_dtc_info, code, cancel_token=token)
+        local_worker.signals.result.connect(on_local)
+        local_worker.signals.error.connect(lambda e: None)
+        self.pool.start(local_worker)
+
+        worker = StreamWorker(self.main.api.explain_code_stream, code, cancel_token=token)
+        worker.signals.progress.connect(on_event)
         worker.signals.error.connect(on_error)
-        self.pool.start(worker)
+        worker.signals.finished.connect(on_finished)
+        self.bulk_pool.start(worker)
 
         # simple animated dots for spinner
         timer = QTimer(dlg)
@@ -249,7 +385,12 @@ class DtcPage(QWidget):
         timer.timeout.connect(_tick)
         timer.start(350)
 
-        # stop timer when dialog closes
-        dlg.finished.connect(lambda: timer.stop())
+        # stop timer and cancel in-flight requests when dialog closes
+        def _closed():
+            timer.stop()
+            render_timer.stop()
+            token.cancel()
+
+        dlg.finished.connect(_closed)
 
         dlg.exec()
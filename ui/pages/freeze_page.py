@@ -1,14 +1,17 @@
-from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QGridLayout, QPushButton, QMessageBox
 
-from ..utils.workers import FunctionWorker
+from ..utils.workers import FunctionWorker, get_pool, INTERACTIVE
 
 
 class FreezePage(QWidget):
+    # Rebuilt (and reloaded in on_activated) after being off-screen for a while
+    RELEASE_WHEN_IDLE = True
+
     def __init__(self, main):
         super().__init__()
         self.main = main
-        self.pool = QThreadPool.globalInstance()
+        self.pool = get_pool(INTERACTIVE)
 
         outer = QVBoxLayout(self)
         outer.setContentsMargins(32, 24, 32, 24)
@@ -46,7 +49,7 @@ class FreezePage(QWidget):
         worker.signals.result.connect(self._update)
         worker.signals.error.connect(lambda e: QMessageBox.critical(self, "Freeze Frame Error", str(e)))
         worker.signals.finished.connect(lambda: self.loading.hide())
-        self.pool.start(worker)
+        self.pool.start(worker, key="freeze")
 
     def _update(self, data: dict):
         # Clear grid
@@ -1,14 +1,14 @@
-from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QMessageBox
 
-from ..utils.workers import FunctionWorker
+from ..utils.workers import FunctionWorker, get_pool, INTERACTIVE
 
 
 class LandingPage(QWidget):
     def __init__(self, main):
         super().__init__()
         self.main = main
-        self.pool = QThreadPool.globalInstance()
+        self.pool = get_pool(INTERACTIVE)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(32, 24, 32, 24)
@@ -60,7 +60,7 @@ class LandingPage(QWidget):
                 self.btn_connect.setEnabled(True)
 
         worker.signals.finished.connect(_finished)
-        self.pool.start(worker)
+        self.pool.start(worker, key="connect")
 
     def _on_disconnect(self):
         self.btn_disconnect.setEnabled(False)
@@ -76,7 +76,7 @@ class LandingPage(QWidget):
                 self.btn_disconnect.setEnabled(True)
 
         worker.signals.finished.connect(_finished_disconnect)
-        self.pool.start(worker)
+        self.pool.start(worker, key="disconnect")
 
     def _connected(self, res: dict):
         status = res.get("status")
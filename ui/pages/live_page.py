@@ -1,26 +1,27 @@
-from PyQt6.QtCore import Qt, QThreadPool, QTimer
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QGridLayout, QMessageBox, QSizePolicy
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QMessageBox
 
-from ..utils.workers import FunctionWorker
-from ..widgets.sparkline import Sparkline
-from ..utils.parse_utils import parse_leading_float
-import collections
-import time
+from ..utils.workers import FunctionWorker, get_pool, INTERACTIVE, REALTIME
+from ..utils.render_scheduler import get_render_scheduler
+from ..widgets.live_table import LiveTableModel, LiveTableView
 
 
 class LivePage(QWidget):
+    # Torn down after being off-screen for a while; see release()
+    RELEASE_WHEN_IDLE = True
+
     def __init__(self, main):
         super().__init__()
         self.main = main
-        self.pool = QThreadPool.globalInstance()
+        self.pool = get_pool(INTERACTIVE)
+        # Ticks get their own pool so slow DTC/freeze/explain calls never starve them
+        self.realtime_pool = get_pool(REALTIME)
         self.timer = QTimer(self)
         # Lower update latency to 500ms
         self.timer.setInterval(500)
         self.timer.timeout.connect(self._tick)
         self._pending = False
         self._started = False
-        # persistent rows storage: key -> {card, key_label, val_label, spark, buf, row}
-        self._rows = {}
 
         outer = QVBoxLayout(self)
         outer.setContentsMargins(36, 24, 36, 24)
@@ -30,22 +31,16 @@ class LivePage(QWidget):
         header.setObjectName("PageHeader")
         outer.addWidget(header)
 
-        # NOTE: Large shared graph removed. Per-row sparklines are shown inline.
-
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.container = QWidget()
-        self.grid = QGridLayout(self.container)
-        # make the grid more spacious
-        self.grid.setContentsMargins(12, 10, 12, 10)
-        self.grid.setHorizontalSpacing(20)
-        self.grid.setVerticalSpacing(12)
-        # Make three columns with weights: sensor name | value | sparkline (2:1:3)
-        self.grid.setColumnStretch(0, 2)
-        self.grid.setColumnStretch(1, 1)
-        self.grid.setColumnStretch(2, 3)
-        self.scroll.setWidget(self.container)
-        outer.addWidget(self.scroll)
+        # Model/view table: one model row per channel, painted by a delegate
+        # (name | value | inline sparkline). Only visible rows are drawn.
+        # Samples live once in the window's shared channel store.
+        self.model = LiveTableModel(self.main.channels, self)
+        self.table = LiveTableView(self)
+        self.table.setModel(self.model)
+        outer.addWidget(self.table)
+        # Results are only ingested on arrival; the table repaints once per frame while visible
+        self.render = get_render_scheduler()
+        self.render.register(self.table, self.model.flush)
 
         self.empty = QLabel("Waiting for live data...")
         outer.addWidget(self.empty)
@@ -78,7 +73,7 @@ class LivePage(QWidget):
 
             worker.signals.result.connect(_on_started)
             worker.signals.error.connect(lambda e: QMessageBox.critical(self, "Live Start Error", str(e)))
-            self.pool.start(worker)
+            self.pool.start(worker, key="live/start")
         else:
             # Already started previously; ensure timer is running
             if self._started:
@@ -91,7 +86,13 @@ class LivePage(QWidget):
             worker = FunctionWorker(self.main.api.stop_live)
             worker.signals.result.connect(lambda res: setattr(self, "_started", False))
             worker.signals.error.connect(lambda e: None)
-            self.pool.start(worker)
+            self.pool.start(worker, key="live/stop")
+
+    def release(self):
+        """Called by MainWindow before this page is destroyed for being idle.
+        Polling already stopped in on_deactivated; drop the sample history too."""
+        self.timer.stop()
+        self.main.channels.clear()
 
     def _tick(self):
         if self._pending:
@@ -101,68 +102,12 @@ class LivePage(QWidget):
         worker.signals.result.connect(self._update)
         worker.signals.error.connect(lambda e: None)
         worker.signals.finished.connect(lambda: setattr(self, "_pending", False))
-        self.pool.start(worker)
+        self.realtime_pool.start(worker, key="live/data")
 
     def _update(self, data: dict):
-        # Update per-row widgets in-place. Create rows only when first seen.
         if not data:
             self.empty.show()
             return
         self.empty.hide()
-
-        keys = sorted(data.keys())
-        # Remove rows for keys that no longer exist
-        to_remove = [k for k in self._rows.keys() if k not in keys]
-        for k in to_remove:
-            entry = self._rows.pop(k)
-            # remove individual widgets
-            for wname in ("key_label", "val_label", "spark"):
-                w = entry.get(wname)
-                if w:
-                    w.deleteLater()
-
-        row = 0
-        for k in keys:
-            v = data.get(k)
-            if k not in self._rows:
-                key_lbl = QLabel(str(k))
-                key_lbl.setObjectName("KeyLabel")
-                key_lbl.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                val_lbl = QLabel(str(v))
-                val_lbl.setObjectName("ValueLabel")
-                val_lbl.setAlignment(Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter)
-                spark = Sparkline(self)
-                spark.setFixedHeight(48)
-                spark.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-
-                # Add widgets directly into the page grid so columns align across rows
-                self.grid.addWidget(key_lbl, row, 0)
-                self.grid.addWidget(val_lbl, row, 1)
-                self.grid.addWidget(spark, row, 2, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-
-                buf = collections.deque(maxlen=240)
-                self._rows[k] = {"key_label": key_lbl, "val_label": val_lbl, "spark": spark, "buf": buf, "row": row}
-            else:
-                entry = self._rows[k]
-                # Move widgets to the current row (preserve order)
-                try:
-                    self.grid.addWidget(entry["key_label"], row, 0)
-                    self.grid.addWidget(entry["val_label"], row, 1)
-                    self.grid.addWidget(entry["spark"], row, 2, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                except Exception:
-                    pass
-                entry["val_label"].setText(str(v))
-
-            # Try to parse numeric value for sparkline
-            # parse numeric prefix (handles units and noisy strings)
-            num = parse_leading_float(v)
-
-            if num is not None:
-                entry = self._rows[k]
-                entry["buf"].append(num)
-                try:
-                    entry["spark"].append(num)
-                except Exception:
-                    pass
-
-            row += 1
+        self.main.channels.ingest(data)
+        self.render.mark_dirty(self.table)
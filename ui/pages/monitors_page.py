@@ -0,0 +1,123 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QMessageBox
+)
+
+from ..utils.workers import FunctionWorker, get_pool, INTERACTIVE
+
+
+COLUMNS = ("Monitor", "Test", "Value", "Min", "Max", "Unit", "Result")
+
+
+def _fmt(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+class MonitorsPage(QWidget):
+    """Mode 06 on-board monitor test results against their limits."""
+
+    # Rebuilt (and reloaded in on_activated) after being off-screen for a while
+    RELEASE_WHEN_IDLE = True
+
+    def __init__(self, main):
+        super().__init__()
+        self.main = main
+        self.pool = get_pool(INTERACTIVE)
+
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(32, 24, 32, 24)
+        outer.setSpacing(16)
+
+        header = QLabel("Monitor Test Results")
+        header.setObjectName("PageHeader")
+        outer.addWidget(header)
+
+        controls = QHBoxLayout()
+        self.btn_refresh = QPushButton("Re-read Tests")
+        self.btn_refresh.setObjectName("PrimaryButton")
+        self.btn_refresh.clicked.connect(lambda: self.load(refresh=True))
+        controls.addWidget(self.btn_refresh)
+        controls.addStretch(1)
+        outer.addLayout(controls)
+
+        self.summary = QLabel("")
+        self.summary.setObjectName("SubHeader")
+        outer.addWidget(self.summary)
+
+        self.loading = QLabel("Loading...")
+        self.loading.setObjectName("LoadingText")
+        outer.addWidget(self.loading)
+        self.loading.hide()
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setObjectName("MonitorTable")
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setShowGrid(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        outer.addWidget(self.table)
+
+    def on_activated(self):
+        # Served from the backend cache unless a new drive cycle started
+        self.load()
+
+    def on_deactivated(self):
+        pass
+
+    def load(self, refresh: bool = False):
+        self.btn_refresh.setEnabled(False)
+        self.loading.show()
+        worker = FunctionWorker(self.main.api.get_monitor_results, refresh)
+        worker.signals.result.connect(self._update)
+        worker.signals.error.connect(lambda e: QMessageBox.critical(self, "Monitor Tests Error", str(e)))
+
+        def _finished():
+            self.btn_refresh.setEnabled(True)
+            self.loading.hide()
+
+        worker.signals.finished.connect(_finished)
+        self.pool.start(worker, key="monitors")
+
+    def _update(self, doc):
+        doc = doc if isinstance(doc, dict) else {}
+        rows = doc.get("tests") or []
+        self.table.setRowCount(0)
+        if not doc.get("supported"):
+            self.summary.setText("This vehicle does not report Mode 06 monitor results (CAN vehicles only).")
+            return
+
+        failed = sum(1 for r in rows if not r.get("passed"))
+        source = "cached for this drive cycle" if doc.get("cached") else f"read in {doc.get('duration_ms', 0):.0f} ms"
+        self.summary.setText(
+            f"{len(rows)} tests from {doc.get('requests', 0)} monitors, {failed} failed ({source})"
+        )
+
+        bold = QFont()
+        bold.setBold(True)
+        self.table.setRowCount(len(rows))
+        for i, r in enumerate(rows):
+            cells = (
+                f"{r.get('mid', '')} {r.get('monitor', '')}",
+                r.get("description") or r.get("test") or f"TID {r.get('tid', '')}",
+                _fmt(r.get("value")),
+                _fmt(r.get("min")),
+                _fmt(r.get("max")),
+                r.get("unit", ""),
+                "Pass" if r.get("passed") else "FAIL",
+            )
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if col >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if not r.get("passed"):
+                    item.setFont(bold)
+                self.table.setItem(i, col, item)
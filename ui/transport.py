@@ -0,0 +1,329 @@
+"""
+Transports used by ApiClient to reach the backend.
+
+- HttpTransport: requests against a (possibly remote) uvicorn server.
+- InProcessTransport: when the launcher hosts the FastAPI app in this same
+  process, endpoints are called directly. Results are handed over as the
+  Python objects the endpoint returned (no JSON, no loopback HTTP), and
+  server-sent event streams are consumed from their raw event iterator.
+
+Both expose the same small interface: get / post / stream / fire_and_forget.
+"""
+import inspect
+import json as _json
+import os
+import socket
+import threading
+from typing import Any, Iterator, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+from .utils.cancel import CancelToken
+
+
+class ApiError(Exception):
+    """Backend answered with an error status (in-process equivalent of an HTTP error)."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"{status_code} Error: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _abort_response(r: requests.Response):
+    """Unblock a thread reading `r` by shutting the socket down, then close it."""
+    try:
+        sock = r.raw._connection.sock
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass
+    try:
+        r.close()
+    except Exception:
+        pass
+
+
+def parse_sse_line(line, event, data):
+    """Fold one SSE line into (event, data). Returns (event, data, complete_or_None),
+    or None for lines that carry nothing."""
+    if line is None:
+        return None
+    if not line:
+        complete = (event, _json.loads("\n".join(data))) if data else None
+        return "message", [], complete
+    if line.startswith(":"):
+        return None
+    field, _, value = line.partition(":")
+    if value.startswith(" "):
+        value = value[1:]
+    if field == "event":
+        event = value
+    elif field == "data":
+        data = data + [value]
+    return event, data, None
+
+
+class HttpTransport:
+    name = "http"
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", timeout: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path: str, timeout: Optional[float] = None,
+            cancel_token: Optional[CancelToken] = None) -> Any:
+        url = f"{self.base_url}{path}"
+        t = timeout if timeout is not None else self.timeout
+        if cancel_token is None:
+            r = self.session.get(url, timeout=t)
+            r.raise_for_status()
+            return r.json()
+        cancel_token.raise_if_cancelled()
+        # Stream the body so a cancel can abort the read instead of waiting it out
+        with self.session.get(url, timeout=t, stream=True) as r:
+            cancel_token.on_cancel(lambda: _abort_response(r))
+            try:
+                r.raise_for_status()
+                body = r.content
+            except Exception:
+                cancel_token.raise_if_cancelled()
+                raise
+        cancel_token.raise_if_cancelled()
+        return _json.loads(body)
+
+    def post(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
+        url = f"{self.base_url}{path}"
+        t = timeout if timeout is not None else self.timeout
+        r = self.session.post(url, json=json, timeout=t)
+        r.raise_for_status()
+        return r.json()
+
+    def stream(self, path: str, timeout: Optional[float] = None,
+               cancel_token: Optional[CancelToken] = None) -> Iterator[Tuple[str, Any]]:
+        """GET a server-sent event stream and yield (event, data) pairs as they arrive.
+        Cancelling `cancel_token` closes the connection and ends the iteration."""
+        url = f"{self.base_url}{path}"
+        t = timeout if timeout is not None else self.timeout
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with self.session.get(url, stream=True, timeout=t, headers={"Accept": "text/event-stream"}) as r:
+            if cancel_token is not None:
+                cancel_token.on_cancel(lambda: _abort_response(r))
+            r.raise_for_status()
+            event, data = "message", []
+            # chunk_size=None hands over each HTTP chunk as soon as it is received
+            try:
+                lines = r.iter_lines(chunk_size=None, decode_unicode=True)
+                for line in lines:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        return
+                    parsed = parse_sse_line(line, event, data)
+                    if parsed is None:
+                        continue
+                    event, data, complete = parsed
+                    if complete is not None:
+                        yield complete
+            except Exception:
+                if cancel_token is not None and cancel_token.cancelled:
+                    return
+                raise
+
+    def get_once(self, path: str, timeout: float = 1) -> Any:
+        """Single attempt with a short timeout and no Retry adapter (used at shutdown)."""
+        r = requests.get(f"{self.base_url}{path}", timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def fire_and_forget(self, path: str, timeout: float = 2):
+        # Used from the GUI thread: no retries, and never wait for the answer
+        url = f"{self.base_url}{path}"
+
+        def _send():
+            try:
+                requests.get(url, timeout=timeout)
+            except Exception:
+                pass
+
+        threading.Thread(target=_send, daemon=True).start()
+
+
+class InProcessTransport:
+    """Calls the FastAPI app's endpoint functions directly.
+
+    Only the parts of FastAPI this backend uses are emulated: path parameters
+    (via the route's own regex and converters), query parameters converted to
+    the endpoint's annotated scalar types, HTTPException -> ApiError, and
+    streaming responses that expose their raw `events` iterator.
+    Timeouts do not apply; cancellation is checked before and after the call.
+    """
+
+    name = "in-process"
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = [
+            r for r in getattr(app, "routes", [])
+            if getattr(r, "path_regex", None) is not None and getattr(r, "endpoint", None) is not None
+        ]
+
+    def _resolve(self, method: str, path: str):
+        parts = urlsplit(path)
+        for route in self._routes:
+            if method not in (getattr(route, "methods", None) or ()):
+                continue
+            m = route.path_regex.match(unquote(parts.path))
+            if m is None:
+                continue
+            convertors = getattr(route, "param_convertors", {})
+            path_params = {
+                k: convertors[k].convert(v) if k in convertors else v
+                for k, v in m.groupdict().items()
+            }
+            return route.endpoint, path_params, dict(parse_qsl(parts.query))
+        raise ApiError(404, f"No route for {method} {parts.path}")
+
+    @staticmethod
+    def _bind(endpoint, path_params: dict, query: dict, body: Optional[dict]):
+        kwargs = {}
+        for name, param in inspect.signature(endpoint).parameters.items():
+            if name in path_params:
+                kwargs[name] = path_params[name]
+                continue
+            if name in query:
+                raw = query[name]
+            elif body and name in body:
+                kwargs[name] = body[name]
+                continue
+            elif param.default is not inspect.Parameter.empty:
+                continue
+            else:
+                raise ApiError(422, f"Missing parameter: {name}")
+            ann = param.annotation
+            try:
+                if ann is bool:
+                    kwargs[name] = raw.lower() in ("1", "true", "yes", "on")
+                elif ann in (int, float):
+                    kwargs[name] = ann(raw)
+                else:
+                    kwargs[name] = raw
+            except ValueError:
+                raise ApiError(422, f"Invalid value for {name}: {raw!r}")
+        return kwargs
+
+    def _call(self, method: str, path: str, body: Optional[dict] = None):
+        endpoint, path_params, query = self._resolve(method, path)
+        kwargs = self._bind(endpoint, path_params, query, body)
+        try:
+            return endpoint(**kwargs)
+        except ApiError:
+            raise
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            if isinstance(status, int) and hasattr(e, "detail"):
+                raise ApiError(status, e.detail) from e
+            raise
+
+    @staticmethod
+    def _unwrap(result):
+        # Endpoints normally return plain dicts/lists; unwrap any explicit Response
+        body = getattr(result, "body", None)
+        if isinstance(body, (bytes, bytearray)) and hasattr(result, "status_code"):
+            if result.status_code >= 400:
+                raise ApiError(result.status_code, body.decode("utf-8", "replace"))
+            return _json.loads(body) if body else None
+        return result
+
+    def get(self, path: str, timeout: Optional[float] = None,
+            cancel_token: Optional[CancelToken] = None) -> Any:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        result = self._unwrap(self._call("GET", path))
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return result
+
+    def post(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
+        return self._unwrap(self._call("POST", path, body=json))
+
+    def stream(self, path: str, timeout: Optional[float] = None,
+               cancel_token: Optional[CancelToken] = None) -> Iterator[Tuple[str, Any]]:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        result = self._call("GET", path)
+        events = getattr(result, "events", None)
+        if events is None:
+            raise ApiError(500, f"{path} is not an event stream")
+        try:
+            for item in events:
+                if cancel_token is not None and cancel_token.cancelled:
+                    return
+                yield item
+        finally:
+            # Runs the endpoint's cleanup (e.g. dropping the upstream cloud call)
+            close = getattr(events, "close", None)
+            if close is not None:
+                close()
+
+    def get_once(self, path: str, timeout: float = 1) -> Any:
+        return self.get(path)
+
+    def fire_and_forget(self, path: str, timeout: float = 2):
+        def _send():
+            try:
+                self.get(path)
+            except Exception:
+                pass
+
+        threading.Thread(target=_send, daemon=True).start()
+
+
+# ===============================
+# Default transport selection
+# ===============================
+
+_in_process_app = None
+# Cleared by the launcher while a backend is booting in this process, so the
+# first API call waits for it instead of failing or picking the wrong transport.
+_backend_settled = threading.Event()
+_backend_settled.set()
+BACKEND_WAIT_SECONDS = 30
+
+
+def _force_http() -> bool:
+    return os.environ.get("OBDPLUS_TRANSPORT", "").strip().lower() == "http"
+
+
+def expect_backend():
+    """Called by the launcher before it starts booting the backend in this process."""
+    _backend_settled.clear()
+
+
+def register_in_process_backend(app):
+    """Called by the launcher once the backend app is imported in this process."""
+    global _in_process_app
+    _in_process_app = app
+    if not _force_http():
+        _backend_settled.set()
+
+
+def mark_backend_ready():
+    """Called by the launcher when the HTTP server is serving (or failed to start)."""
+    _backend_settled.set()
+
+
+def default_transport(base_url: str, timeout: int):
+    """In-process when a backend app has been registered, HTTP otherwise.
+    Set OBDPLUS_TRANSPORT=http to force HTTP (e.g. to debug against the server)."""
+    if not _backend_settled.wait(BACKEND_WAIT_SECONDS):
+        print("[transport] Backend not ready; falling back to HTTP")
+    if _in_process_app is not None and not _force_http():
+        return InProcessTransport(_in_process_app)
+    return HttpTransport(base_url, timeout)
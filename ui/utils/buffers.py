@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity circular buffer backed by a preallocated NumPy array.
+
+    Every sample is written twice (at i and i + capacity), so the live window is
+    always one contiguous slice and `view()` returns it oldest -> newest without
+    copying. Appends are O(1) and never allocate.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self._cap = int(capacity)
+        self._data = np.zeros(2 * self._cap, dtype=dtype)
+        self._head = 0  # next write position in [0, cap)
+        self._len = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._cap
+
+    def __len__(self):
+        return self._len
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._data[self._head + self._cap] = value
+        self._head = (self._head + 1) % self._cap
+        if self._len < self._cap:
+            self._len += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        if len(values) >= self._cap:
+            values = values[-self._cap:]
+            self._data[:self._cap] = values
+            self._data[self._cap:] = values
+            self._head = 0
+            self._len = self._cap
+            return
+        for v in values:
+            self.append(v)
+
+    def view(self) -> np.ndarray:
+        """Read-only view of the stored samples, oldest first (no copy)."""
+        start = (self._head - self._len) % self._cap
+        v = self._data[start:start + self._len]
+        v.flags.writeable = False
+        return v
+
+    def last(self, default=None):
+        if not self._len:
+            return default
+        return self._data[(self._head - 1) % self._cap].item()
+
+    def discard_oldest(self, n: int):
+        """Forget the `n` oldest samples."""
+        self._len = max(0, self._len - max(0, int(n)))
+
+    def clear(self):
+        self._len = 0
+        self._head = 0
+
+    def resize(self, capacity: int):
+        """Change capacity, keeping the most recent samples."""
+        keep = self.view()[-capacity:].copy()
+        self.__init__(capacity, self._data.dtype)
+        self.extend(keep)
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, n_bins: int):
+    """Peak-preserving downsampling for line plots.
+
+    Splits the series into `n_bins` buckets and keeps each bucket's minimum and
+    maximum sample (in their original order), so spikes survive even when there
+    are far more samples than horizontal pixels. Returns (x, y) unchanged when
+    there are fewer than 2 * n_bins samples.
+    """
+    n = len(y)
+    if n_bins < 1 or n <= 2 * n_bins:
+        return x, y
+    per = n // n_bins
+    # Bucket from the newest end; the leftover oldest samples form one extra bucket
+    start = n - per * n_bins
+    yb = y[start:].reshape(n_bins, per)
+    xb = x[start:].reshape(n_bins, per)
+    imin = yb.argmin(axis=1)
+    imax = yb.argmax(axis=1)
+    first = np.minimum(imin, imax)
+    second = np.maximum(imin, imax)
+    rows = np.arange(n_bins)
+    xs = np.empty(2 * n_bins, dtype=x.dtype)
+    ys = np.empty(2 * n_bins, dtype=y.dtype)
+    xs[0::2] = xb[rows, first]
+    xs[1::2] = xb[rows, second]
+    ys[0::2] = yb[rows, first]
+    ys[1::2] = yb[rows, second]
+    if start:
+        head_y = y[:start]
+        i0, i1 = sorted((int(head_y.argmin()), int(head_y.argmax())))
+        xs = np.concatenate((x[[i0, i1]], xs))
+        ys = np.concatenate((head_y[[i0, i1]], ys))
+    return xs, ys
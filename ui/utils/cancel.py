@@ -0,0 +1,49 @@
+import threading
+
+
+class CancelledError(Exception):
+    """Raised inside a worker when its CancelToken has been cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared between the GUI thread and a worker.
+
+    Callbacks registered with `on_cancel` run once, on the thread that calls
+    `cancel()`; they are used to abort blocking I/O (e.g. close an HTTP stream).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def on_cancel(self, cb):
+        """Register `cb`; it runs immediately if the token is already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(cb)
+                return
+        try:
+            cb()
+        except Exception:
+            pass
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError()
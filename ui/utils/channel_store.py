@@ -0,0 +1,89 @@
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .parse_utils import parse_leading_float
+
+
+def _empty():
+    import numpy as np
+    return np.empty(0)
+
+
+class ChannelStore(QObject):
+    """Single UI-side home for live samples.
+
+    Each channel keeps its latest display text plus two aligned ring buffers
+    (timestamps and numeric values). Widgets read zero-copy views through
+    `times(name)` / `values(name)` instead of keeping their own copies, so memory
+    is channels x capacity once, however many visualizations are attached.
+
+    `ingest(data)` parses a snapshot once and emits a single `changed` signal
+    with the names that got a new sample; `channelsChanged` fires first when the
+    channel set itself changed. NumPy is only imported with the first sample.
+    """
+
+    changed = pyqtSignal(object)          # tuple of channel names updated in this batch
+    channelsChanged = pyqtSignal(object)  # sorted list of channel names
+
+    def __init__(self, capacity: int = 1200, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._names = []
+        self._text = {}
+        self._t = {}
+        self._v = {}
+
+    # --- read side ---
+    def names(self):
+        return list(self._names)
+
+    def text(self, name: str, default: str = "") -> str:
+        return self._text.get(name, default)
+
+    def times(self, name: str):
+        buf = self._t.get(name)
+        return buf.view() if buf is not None else _empty()
+
+    def values(self, name: str):
+        buf = self._v.get(name)
+        return buf.view() if buf is not None else _empty()
+
+    def last(self, name: str, default=None):
+        buf = self._v.get(name)
+        return buf.last(default) if buf is not None else default
+
+    # --- write side ---
+    def ingest(self, data: dict, timestamp: float = None):
+        if not data:
+            return
+        ts = timestamp if timestamp is not None else time.time()
+        keys = sorted(data.keys())
+        if keys != self._names:
+            from .buffers import RingBuffer
+            # Channels that disappeared are dropped together with their history
+            for k in set(self._names) - set(keys):
+                self._text.pop(k, None)
+                self._t.pop(k, None)
+                self._v.pop(k, None)
+            for k in keys:
+                if k not in self._t:
+                    self._t[k] = RingBuffer(self.capacity)
+                    self._v[k] = RingBuffer(self.capacity)
+            self._names = keys
+            self.channelsChanged.emit(self.names())
+
+        updated = []
+        for k in keys:
+            text = str(data.get(k))
+            self._text[k] = text
+            num = parse_leading_float(text)
+            if num is not None:
+                self._t[k].append(ts)
+                self._v[k].append(num)
+            updated.append(k)
+        self.changed.emit(tuple(updated))
+
+    def clear(self):
+        self._names, self._text, self._t, self._v = [], {}, {}, {}
+        self.channelsChanged.emit([])
@@ -0,0 +1,115 @@
+import os
+import weakref
+
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+
+
+DEFAULT_FPS = 30
+
+
+class RenderScheduler(QObject):
+    """Central frame clock for the UI.
+
+    Data arrival and painting are decoupled: widgets `register(widget, flush)`
+    once, then call `mark_dirty(widget)` whenever new data lands (any number of
+    times). Once per frame the scheduler calls `flush()` for every dirty widget
+    that is visible. Hidden widgets stay dirty and are flushed on the first frame
+    after they are shown. The timer only runs while something is dirty and visible,
+    so an idle UI costs nothing and a busy one costs at most `fps` flushes per widget.
+    """
+
+    def __init__(self, fps: int = DEFAULT_FPS, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._frame)
+        self.set_fps(fps)
+        # id(widget) -> (weakref to widget, flush callback)
+        self._targets = {}
+        self._dirty = set()
+
+    @property
+    def fps(self) -> int:
+        return self._fps
+
+    def set_fps(self, fps: int):
+        self._fps = max(1, int(fps))
+        self._timer.setInterval(max(1, round(1000 / self._fps)))
+
+    # --- registration ---
+    def register(self, widget, flush):
+        key = id(widget)
+        self._targets[key] = (weakref.ref(widget), flush)
+        widget.installEventFilter(self)
+        widget.destroyed.connect(lambda *_, k=key: self._forget(k))
+
+    def unregister(self, widget):
+        try:
+            widget.removeEventFilter(self)
+        except RuntimeError:
+            pass
+        self._forget(id(widget))
+
+    def _forget(self, key):
+        self._targets.pop(key, None)
+        self._dirty.discard(key)
+
+    # --- dirty tracking ---
+    def mark_dirty(self, widget):
+        key = id(widget)
+        if key not in self._targets:
+            return
+        self._dirty.add(key)
+        if not self._timer.isActive() and widget.isVisible():
+            self._timer.start()
+
+    def is_dirty(self, widget) -> bool:
+        return id(widget) in self._dirty
+
+    def eventFilter(self, obj, event):
+        # A dirty widget that becomes visible gets painted on the next frame
+        if event.type() == QEvent.Type.Show and id(obj) in self._dirty and not self._timer.isActive():
+            self._timer.start()
+        return False
+
+    def _frame(self):
+        for key in list(self._dirty):
+            ref, flush = self._targets.get(key, (None, None))
+            widget = ref() if ref is not None else None
+            if widget is None:
+                self._forget(key)
+                continue
+            if not widget.isVisible():
+                # keep it dirty; the Show event restarts the clock
+                continue
+            self._dirty.discard(key)
+            try:
+                flush()
+            except Exception as e:
+                print(f"[render] flush failed for {type(widget).__name__}: {e}")
+        # flush() may have marked widgets dirty again; stop only when nothing visible is waiting
+        if not any(self._visible(k) for k in self._dirty):
+            self._timer.stop()
+
+    def _visible(self, key) -> bool:
+        ref, _ = self._targets.get(key, (None, None))
+        widget = ref() if ref is not None else None
+        try:
+            return widget is not None and widget.isVisible()
+        except RuntimeError:
+            return False
+
+
+_scheduler = None
+
+
+def get_render_scheduler() -> RenderScheduler:
+    """Shared scheduler; the frame cap can be set with OBDPLUS_UI_FPS."""
+    global _scheduler
+    if _scheduler is None:
+        try:
+            fps = int(os.environ.get("OBDPLUS_UI_FPS", DEFAULT_FPS))
+        except ValueError:
+            fps = DEFAULT_FPS
+        _scheduler = RenderScheduler(fps)
+    return _scheduler
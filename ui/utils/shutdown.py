@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+# name -> callable; run by every ShutdownCoordinator (e.g. data recorders flushing to disk)
+_hooks = {}
+_hooks_lock = threading.Lock()
+
+
+def register_shutdown_hook(name: str, fn):
+    """Run `fn()` during application shutdown, in parallel with the other steps."""
+    with _hooks_lock:
+        _hooks[name] = fn
+
+
+def unregister_shutdown_hook(name: str):
+    with _hooks_lock:
+        _hooks.pop(name, None)
+
+
+class ShutdownCoordinator:
+    """Runs shutdown steps in parallel under one total deadline.
+
+    Each step gets its own daemon thread; `run()` returns once all steps are
+    done or the deadline has passed, whichever comes first. Steps still running
+    at the deadline are abandoned (daemon threads die with the process), so a
+    dead backend or a stuck adapter can never hold the exit hostage.
+    """
+
+    def __init__(self, deadline: float = 1.5):
+        self.deadline = deadline
+        self._steps = []
+
+    def add(self, name: str, fn):
+        self._steps.append((name, fn))
+        return self
+
+    def run(self) -> dict:
+        """Returns {step name: "ok" | "error: ..." | "timeout"}."""
+        with _hooks_lock:
+            steps = self._steps + [(f"hook:{n}", fn) for n, fn in _hooks.items()]
+        outcome = {name: "timeout" for name, _ in steps}
+        threads = []
+
+        def _runner(name, fn):
+            try:
+                fn()
+                outcome[name] = "ok"
+            except Exception as e:
+                outcome[name] = f"error: {e}"
+
+        for name, fn in steps:
+            t = threading.Thread(target=_runner, args=(name, fn), name=f"shutdown-{name}", daemon=True)
+            t.start()
+            threads.append(t)
+
+        end = time.monotonic() + self.deadline
+        for t in threads:
+            t.join(max(0.0, end - time.monotonic()))
+        late = [n for n, v in outcome.items() if v == "timeout"]
+        if late:
+            print(f"[shutdown] deadline {self.deadline}s reached; abandoned: {', '.join(late)}")
+        return dict(outcome)
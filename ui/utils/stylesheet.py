@@ -0,0 +1,187 @@
+"""
+Stylesheet compiler.
+
+`ui/resources/style.qss` is written with CSS-style custom properties
+(`--name: value;` / `var(--name)`) and a few CSS properties Qt does not
+support. Compiling expands the variables and strips those properties in a
+single substitution pass. Themes in `ui/resources/themes/<name>.qss` only
+override variables, so every theme is compiled from the same source.
+
+Compiled output is keyed by a hash of the source, the theme file and the
+compiler version, and looked up in this order:
+  1. ui/resources/compiled/ (written at build time: `python -m ui.utils.stylesheet`)
+  2. the per-user cache directory
+  3. compiled now, then written to the user cache
+"""
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent / "resources"
+SOURCE_PATH = RESOURCES_DIR / "style.qss"
+THEMES_DIR = RESOURCES_DIR / "themes"
+COMPILED_DIR = RESOURCES_DIR / "compiled"
+DEFAULT_THEME = "dark"  # the variables declared in style.qss itself
+
+_COMPILER_VERSION = 1
+_HEADER = "/* obdplus-qss {key} */\n"
+
+_VAR_DECL_RE = re.compile(r"--([\w-]+)\s*:\s*([^;]+);")
+# One pass: variable declarations and unsupported properties are dropped,
+# var(--name) references are replaced.
+_PASS_RE = re.compile(
+    r"--[\w-]+\s*:\s*[^;]+;\s*"
+    r"|(?<![\w-])(?:-webkit-)?(?:transition|box-shadow|transform)\s*:\s*[^;]+;\s*"
+    r"|var\(--([\w-]+)\)",
+    re.IGNORECASE,
+)
+
+_memory = {}  # theme -> compiled text for this process
+
+
+def _read(path: Path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _resolve_vars(decls: dict) -> dict:
+    # Allow variables defined in terms of other variables
+    ref = re.compile(r"var\(--([\w-]+)\)")
+    out = dict(decls)
+    for _ in range(5):
+        changed = False
+        for k, v in out.items():
+            nv = ref.sub(lambda m: out.get(m.group(1), m.group(0)), v)
+            if nv != v:
+                out[k], changed = nv, True
+        if not changed:
+            break
+    return out
+
+
+def compile_qss(source: str, overrides: dict = None) -> str:
+    """Expand `var(--x)` (with `overrides` taking precedence over the source's
+    own declarations) and strip properties Qt's QSS does not support."""
+    variables = {m.group(1): m.group(2).strip() for m in _VAR_DECL_RE.finditer(source)}
+    variables.update(overrides or {})
+    variables = _resolve_vars(variables)
+
+    def _sub(m):
+        name = m.group(1)
+        if name is None:
+            return ""
+        return variables.get(name, m.group(0))
+
+    return _PASS_RE.sub(_sub, source)
+
+
+def available_themes():
+    themes = [DEFAULT_THEME]
+    if THEMES_DIR.is_dir():
+        themes += sorted(p.stem for p in THEMES_DIR.glob("*.qss") if p.stem != DEFAULT_THEME)
+    return themes
+
+
+def _theme_source(theme: str) -> str:
+    if theme == DEFAULT_THEME:
+        return ""
+    path = THEMES_DIR / f"{theme}.qss"
+    if not path.exists():
+        raise ValueError(f"Unknown theme: {theme}")
+    return _read(path)
+
+
+def _cache_key(source: str, theme_source: str, theme: str) -> str:
+    h = hashlib.sha256()
+    for part in (str(_COMPILER_VERSION), theme, source, theme_source):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def _user_cache_dir() -> Path:
+    try:
+        from app_paths import user_data_dir
+        return user_data_dir("cache", "qss")
+    except ImportError:
+        # ui/ run on its own without the project root on sys.path
+        path = Path.home() / ".obdplus" / "cache" / "qss"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+def _load_cached(path: Path, key: str):
+    try:
+        text = _read(path)
+    except OSError:
+        return None
+    header = _HEADER.format(key=key)
+    return text[len(header):] if text.startswith(header) else None
+
+
+def _write(path: Path, key: str, compiled: str):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(_HEADER.format(key=key))
+        f.write(compiled)
+    os.replace(tmp, path)
+
+
+def get_stylesheet(theme: str = DEFAULT_THEME) -> str:
+    """Compiled QSS for `theme`, from memory, the bundled build output or the disk cache."""
+    cached = _memory.get(theme)
+    if cached is not None:
+        return cached
+    source = _read(SOURCE_PATH)
+    theme_source = _theme_source(theme)
+    key = _cache_key(source, theme_source, theme)
+
+    compiled = _load_cached(COMPILED_DIR / f"style.{theme}.qss", key)
+    cache_path = None
+    if compiled is None:
+        try:
+            cache_path = _user_cache_dir() / f"style.{theme}.qss"
+            compiled = _load_cached(cache_path, key)
+        except OSError:
+            cache_path = None
+    if compiled is None:
+        overrides = {m.group(1): m.group(2).strip() for m in _VAR_DECL_RE.finditer(theme_source)}
+        compiled = compile_qss(source, overrides)
+        if cache_path is not None:
+            try:
+                _write(cache_path, key, compiled)
+            except OSError as e:
+                print(f"Warning: could not cache stylesheet: {e}", file=sys.stderr)
+    _memory[theme] = compiled
+    return compiled
+
+
+def apply_theme(app, theme: str = DEFAULT_THEME) -> bool:
+    """Apply a (pre)compiled theme to the QApplication. Returns False on failure."""
+    try:
+        app.setStyleSheet(get_stylesheet(theme))
+        return True
+    except Exception as e:
+        print(f"Error applying theme {theme}: {e}", file=sys.stderr)
+        return False
+
+
+def precompile(out_dir: Path = COMPILED_DIR):
+    """Build-time step: write every theme's compiled QSS next to the sources."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    source = _read(SOURCE_PATH)
+    written = []
+    for theme in available_themes():
+        theme_source = _theme_source(theme)
+        overrides = {m.group(1): m.group(2).strip() for m in _VAR_DECL_RE.finditer(theme_source)}
+        path = out_dir / f"style.{theme}.qss"
+        _write(path, _cache_key(source, theme_source, theme), compile_qss(source, overrides))
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    for p in precompile():
+        print(p)
@@ -1,19 +1,35 @@
-from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot, QThread, QThreadPool
 from PyQt6.QtWidgets import QApplication
 
+from .cancel import CancelToken, CancelledError
+
 
 class WorkerSignals(QObject):
     finished = pyqtSignal()
     error = pyqtSignal(Exception)
     result = pyqtSignal(object)
+    progress = pyqtSignal(object)
 
 
 class FunctionWorker(QRunnable):
+    """Runs `fn(*args, **kwargs)` on a pool thread and reports through `signals`.
+
+    Every worker owns a CancelToken (`worker.token`). If the call takes a
+    `cancel_token` keyword argument, that token is used instead so the function
+    can abort its own blocking I/O. Once cancelled, a worker that has not started
+    yet skips `fn`, and `result`/`error` are no longer emitted; `finished` always is.
+    """
+
     def __init__(self, fn, *args, **kwargs):
         super().__init__()
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
+        self.token = kwargs.get("cancel_token") or CancelToken()
+        # Set by WorkerPool when the worker holds a dedupe slot
+        self._release = None
         # Parent signals to the QApplication instance to keep the underlying
         # C++ QObject alive for the duration of the application. This prevents
         # 'wrapped C/C++ object ... has been deleted' when emitting from threads.
@@ -26,23 +42,180 @@ class FunctionWorker(QRunnable):
             # workers are used.
             self.signals = WorkerSignals()
 
+    def cancel(self):
+        self.token.cancel()
+
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            # signals QObject was deleted during shutdown; ignore
+            pass
+
+    def _complete(self, outcome):
+        # Free the dedupe slot *before* emitting, so a duplicate submitted from
+        # now on starts its own call instead of chaining to signals already sent.
+        if self._release is not None:
+            self._release()
+        if outcome is not None and not self.token.cancelled:
+            kind, value = outcome
+            self._emit(self.signals.error if kind == "error" else self.signals.result, value)
+        self._emit(self.signals.finished)
+
     @pyqtSlot()
     def run(self):
+        outcome = None
         try:
-            res = self.fn(*self.args, **self.kwargs)
+            if not self.token.cancelled:
+                outcome = ("result", self.fn(*self.args, **self.kwargs))
+        except CancelledError:
+            pass
         except Exception as e:
-            try:
-                self.signals.error.emit(e)
-            except RuntimeError:
-                # signals QObject was deleted during shutdown; ignore
-                pass
-        else:
-            try:
-                self.signals.result.emit(res)
-            except RuntimeError:
-                pass
+            # Errors caused by aborting I/O on cancel are dropped in _complete
+            outcome = ("error", e)
+        self._complete(outcome)
+
+
+class StreamWorker(FunctionWorker):
+    """Runs a generator function and emits `progress` for every item it yields.
+
+    `result` is emitted once with the number of items after the generator is exhausted.
+    Cancelling stops the iteration at the next item and closes the generator.
+    """
+
+    @pyqtSlot()
+    def run(self):
+        count = 0
+        gen = None
+        outcome = None
+        try:
+            if not self.token.cancelled:
+                gen = self.fn(*self.args, **self.kwargs)
+                for item in gen:
+                    if self.token.cancelled:
+                        break
+                    count += 1
+                    self._emit(self.signals.progress, item)
+                outcome = ("result", count)
+        except CancelledError:
+            pass
+        except Exception as e:
+            outcome = ("error", e)
         finally:
+            if gen is not None and hasattr(gen, "close"):
+                try:
+                    gen.close()
+                except Exception:
+                    pass
+        self._complete(outcome)
+
+
+# ===============================
+# Named worker pools
+# ===============================
+
+REALTIME = "realtime"        # live data ticks: small, frequent, must never queue behind slow calls
+INTERACTIVE = "interactive"  # user-triggered adapter calls: connect, DTC, freeze, clear
+BULK = "bulk"                # cloud / long-running calls (explain)
+
+# name -> (max threads, OS thread priority)
+POOL_SPECS = {
+    REALTIME: (2, QThread.Priority.HighPriority),
+    INTERACTIVE: (3, QThread.Priority.NormalPriority),
+    BULK: (4, QThread.Priority.LowPriority),
+}
+
+
+class WorkerPool:
+    """A QThreadPool with its own concurrency limit and thread priority, plus
+    de-duplication of identical in-flight calls.
+
+    `start(worker, key=...)`: if a worker with the same key is still running,
+    the new one is not executed; its result/error/finished signals are chained
+    to the running call instead, so every caller still gets its callbacks.
+    """
+
+    def __init__(self, name: str, max_threads: int, thread_priority=None):
+        self.name = name
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max_threads)
+        if thread_priority is not None:
             try:
-                self.signals.finished.emit()
-            except RuntimeError:
+                self._pool.setThreadPriority(thread_priority)
+            except AttributeError:
+                # Qt < 6.2 has no per-pool thread priority
                 pass
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def start(self, worker, key=None, priority: int = 0):
+        if key is not None:
+            with self._lock:
+                running = self._inflight.get(key)
+                if running is not None:
+                    self._chain(running, worker)
+                    return running
+                self._inflight[key] = worker
+                worker._release = lambda: self._release(key, worker)
+        self._pool.start(worker, priority)
+        return worker
+
+    def _release(self, key, worker):
+        with self._lock:
+            if self._inflight.get(key) is worker:
+                del self._inflight[key]
+
+    @staticmethod
+    def _chain(running, worker):
+        def _forward(signal):
+            return lambda *args: None if worker.token.cancelled else worker._emit(signal, *args)
+
+        running.signals.result.connect(_forward(worker.signals.result))
+        running.signals.error.connect(_forward(worker.signals.error))
+        running.signals.finished.connect(lambda: worker._emit(worker.signals.finished))
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def active_count(self) -> int:
+        return self._pool.activeThreadCount()
+
+    def clear(self):
+        """Drop queued (not yet started) workers. Dropped keyed workers free their
+        key and emit `finished`, so the key can be started again."""
+        with self._lock:
+            keyed = list(self._inflight.values())
+        for w in keyed:
+            if self._pool.tryTake(w):  # still queued
+                w.cancel()
+                w._complete(None)
+        self._pool.clear()
+
+    def cancel_in_flight(self):
+        """Cancel every running keyed worker (their blocking I/O is aborted)."""
+        with self._lock:
+            running = list(self._inflight.values())
+        for w in running:
+            w.cancel()
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+
+_pools = {}
+
+
+def get_pool(name: str = INTERACTIVE) -> WorkerPool:
+    pool = _pools.get(name)
+    if pool is None:
+        max_threads, prio = POOL_SPECS[name]
+        pool = _pools[name] = WorkerPool(name, max_threads, prio)
+    return pool
+
+
+def clear_pools():
+    """App exit: drop queued workers and cancel in-flight keyed calls in every pool."""
+    for pool in list(_pools.values()):
+        pool.clear()
+        pool.cancel_in_flight()
@@ -1,14 +1,30 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel
-from PyQt6.QtCore import QTimer, pyqtSignal
-import collections
+from PyQt6.QtCore import pyqtSignal
 import time
 import csv
 import os
 
-import pyqtgraph as pg
+import numpy as np
+
+from ..utils.buffers import RingBuffer, minmax_decimate
+from ..utils.render_scheduler import get_render_scheduler
+
+
+def _pg():
+    # pyqtgraph is heavy to import; load it when the first graph is built
+    import pyqtgraph
+    return pyqtgraph
 
 
 class LiveGraphWidget(QWidget):
+    """Scrolling multi-series plot of the last `max_history_seconds`.
+
+    Standalone, samples fed through `update()` are kept in per-series ring
+    buffers. When a ChannelStore is passed as `store`, the widget keeps no
+    samples: it plots views of the store's channels and `update()` just
+    forwards to `store.ingest()`.
+    """
+
     dataUpdated = pyqtSignal()
     seriesAdded = pyqtSignal(str)
     seriesRemoved = pyqtSignal(str)
@@ -16,7 +32,7 @@ class LiveGraphWidget(QWidget):
     exportComplete = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, parent=None, max_history_seconds: int = 60, redraw_interval_ms: int = 500):
+    def __init__(self, parent=None, max_history_seconds: int = 60, max_samples: int = None, store=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
 
@@ -32,43 +48,56 @@ class LiveGraphWidget(QWidget):
         self.layout.addLayout(controls)
 
         # Plot area
-        self.plot = pg.PlotWidget()
+        self.plot = _pg().PlotWidget()
         self.plot.showGrid(x=True, y=True)
         self.plot.addLegend(offset=(10, 10))
         self.layout.addWidget(self.plot)
 
         # Internal state
         self.max_history_seconds = max_history_seconds
-        self.buffers = {}  # name -> {'t':deque, 'v':deque, 'curve':PlotDataItem, 'color':QColor}
+        # Ring capacity per series; default assumes up to 20 samples/s over the history window
+        self.max_samples = max_samples or max(1024, int(max_history_seconds * 20))
+        self.buffers = {}  # name -> {'t':RingBuffer, 'v':RingBuffer, 'curve':PlotDataItem, 'color':QColor}
         self.paused = False
+        # Shared channel store (optional); 't'/'v' are None in that mode
+        self.store = store
+        self._cleared_at = None
 
         # Colors: use pyqtgraph default color generator
         self._color_index = 0
 
-        # Redraw timer (controls how often we update the visual)
-        self.redraw_timer = QTimer(self)
-        self.redraw_timer.setInterval(redraw_interval_ms)
-        self.redraw_timer.timeout.connect(self._redraw)
-        self.redraw_timer.start()
+        # Redraws are paced by the shared render scheduler (once per frame, only while visible)
+        self._render = get_render_scheduler()
+        self._render.register(self, self._redraw)
 
         # Wire controls
         self.btn_pause.clicked.connect(self._toggle_pause)
         self.btn_clear.clicked.connect(self.clear)
         self.btn_export.clicked.connect(self._export_dialog)
 
+        if store is not None:
+            store.changed.connect(self._on_store_changed)
+            store.channelsChanged.connect(self._on_store_channels)
+            self._on_store_changed(store.names())
+
     # ----------------
     # Series management
     # ----------------
     def add_series(self, name: str):
         if name in self.buffers:
             return
-        # create ring buffers (deque) for timestamps and values
-        dq_t = collections.deque()
-        dq_v = collections.deque()
-        color = pg.intColor(self._color_index)
+        # preallocated NumPy ring buffers for timestamps and values (none when reading a store)
+        buf_t = RingBuffer(self.max_samples) if self.store is None else None
+        buf_v = RingBuffer(self.max_samples) if self.store is None else None
+        color = _pg().intColor(self._color_index)
         self._color_index += 1
         curve = self.plot.plot([], [], pen=color, name=name)
-        self.buffers[name] = {"t": dq_t, "v": dq_v, "curve": curve, "color": color}
+        try:
+            # data is always finite (non-numeric samples are dropped on ingest)
+            curve.setSkipFiniteCheck(True)
+        except AttributeError:
+            pass
+        self.buffers[name] = {"t": buf_t, "v": buf_v, "curve": curve, "color": color}
         self.seriesAdded.emit(name)
 
     def remove_series(self, name: str):
@@ -87,6 +116,10 @@ class LiveGraphWidget(QWidget):
     # ----------------
     def update(self, data: dict, timestamp: float = None):
         """Append new samples from `data` (mapping name->floatable)."""
+        if self.store is not None:
+            # the store notifies us (and every other view) once for the batch
+            self.store.ingest(data, timestamp)
+            return
         ts = timestamp if timestamp is not None else time.time()
         for k, raw_v in data.items():
             # convert to float where possible
@@ -100,15 +133,44 @@ class LiveGraphWidget(QWidget):
             buf = self.buffers[k]
             buf["t"].append(ts)
             buf["v"].append(v)
-            # drop old samples beyond history window
+            # drop old samples beyond history window (timestamps are sorted)
             cutoff = ts - self.max_history_seconds
-            while buf["t"] and buf["t"][0] < cutoff:
-                buf["t"].popleft()
-                buf["v"].popleft()
+            stale = int(np.searchsorted(buf["t"].view(), cutoff, side="left"))
+            if stale:
+                buf["t"].discard_oldest(stale)
+                buf["v"].discard_oldest(stale)
+
+        # fire a lightweight signal; the redraw happens on the next frame
+        self._render.mark_dirty(self)
+        self.dataUpdated.emit()
 
-        # fire a lightweight signal (UI redraw controlled by timer)
+    def _on_store_changed(self, names):
+        for k in names:
+            if k not in self.buffers and len(self.store.values(k)):
+                self.add_series(k)
+        self._render.mark_dirty(self)
         self.dataUpdated.emit()
 
+    def _on_store_channels(self, names):
+        for k in list(self.buffers):
+            if k not in names:
+                self.remove_series(k)
+
+    def _views(self, name: str, now: float = None):
+        """(timestamps, values) arrays for a series, oldest first, without copying."""
+        if self.store is None:
+            buf = self.buffers[name]
+            t, v = buf["t"].view(), buf["v"].view()
+        else:
+            t, v = self.store.times(name), self.store.values(name)
+            # the store's history can be longer than our window
+            cutoff = (now if now is not None else time.time()) - self.max_history_seconds
+            if self._cleared_at is not None:
+                cutoff = max(cutoff, self._cleared_at)
+            start = int(np.searchsorted(t, cutoff, side="left"))
+            t, v = t[start:], v[start:]
+        return t, v
+
     # ----------------
     # Rendering
     # ----------------
@@ -117,17 +179,17 @@ class LiveGraphWidget(QWidget):
             return
         if not self.buffers:
             return
-        # Plot each series; x axis use relative timestamps (seconds from now) for nicer scale
+        # Plot each series; x axis is relative time (seconds from now), newest at the right.
+        # Offsets are computed on the whole array at once and, when there are more
+        # samples than horizontal pixels, reduced with peak-preserving min/max decimation.
         now = time.time()
+        n_bins = max(1, int(self.plot.width()))
         for name, buf in self.buffers.items():
-            ts = list(buf["t"]) if buf["t"] else []
-            vs = list(buf["v"]) if buf["v"] else []
-            if not ts:
+            ts, values = self._views(name, now)
+            if not len(ts):
                 buf["curve"].setData([], [])
                 continue
-            # convert to relative times (seconds ago) or absolute - keep absolute for CSV but shift for plotting
-            # We'll plot relative to now (seconds), newest at the right
-            xs = [t - now for t in ts]
+            xs, vs = minmax_decimate(ts - now, values, n_bins)
             buf["curve"].setData(xs, vs)
 
     # ----------------
@@ -136,6 +198,8 @@ class LiveGraphWidget(QWidget):
     def _toggle_pause(self):
         self.paused = not self.paused
         self.btn_pause.setText("Resume" if self.paused else "Pause")
+        if not self.paused:
+            self._render.mark_dirty(self)
         self.pausedChanged.emit(self.paused)
 
     def pause(self):
@@ -147,7 +211,10 @@ class LiveGraphWidget(QWidget):
             self._toggle_pause()
 
     def clear(self, name: str = None):
-        if name:
+        if self.store is not None:
+            # shared samples are not ours to delete; just hide everything up to now
+            self._cleared_at = time.time()
+        elif name:
             if name in self.buffers:
                 self.buffers[name]["t"].clear()
                 self.buffers[name]["v"].clear()
@@ -155,6 +222,7 @@ class LiveGraphWidget(QWidget):
             for k in list(self.buffers.keys()):
                 self.buffers[k]["t"].clear()
                 self.buffers[k]["v"].clear()
+        self._render.mark_dirty(self)
 
     # ----------------
     # Export
@@ -176,7 +244,8 @@ class LiveGraphWidget(QWidget):
         # Prepare header
         series_names = list(self.buffers.keys())
         # Find max length
-        max_len = max(len(self.buffers[n]["t"]) for n in series_names)
+        views = {n: self._views(n) for n in series_names}
+        max_len = max(len(t) for t, _ in views.values())
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             header = ["index", "timestamp"] + series_names
@@ -186,13 +255,13 @@ class LiveGraphWidget(QWidget):
                 # pick timestamp from first available series at index i or empty
                 ts = ""
                 for n in series_names:
-                    if len(self.buffers[n]["t"]) > i:
-                        ts = self.buffers[n]["t"][i]
+                    if len(views[n][0]) > i:
+                        ts = float(views[n][0][i])
                         break
                 row = [i, ts]
                 for n in series_names:
-                    if len(self.buffers[n]["v"]) > i:
-                        row.append(self.buffers[n]["v"][i])
+                    if len(views[n][1]) > i:
+                        row.append(float(views[n][1][i]))
                     else:
                         row.append("")
                 writer.writerow(row)
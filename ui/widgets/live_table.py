@@ -0,0 +1,174 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRectF
+from PyQt6.QtGui import QColor, QPainter, QPen, QFont
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QTableView, QHeaderView, QAbstractItemView
+
+from .sparkline import DEFAULT_PEN_COLOR, sparkline_polygon
+
+
+class LiveTableModel(QAbstractTableModel):
+    """Live channels as rows: name | value | trend, backed by a ChannelStore.
+
+    The model holds no samples of its own: values and trend data are read from
+    the store on demand (trend = the newest `history` samples, a zero-copy view).
+    Rows are only reset when the store's channel set changes; otherwise the rows
+    updated by each batch are remembered and `flush()` emits `dataChanged` for
+    them grouped into contiguous row ranges. Any number of batches can arrive
+    between two flushes (the render scheduler calls `flush()` once per frame).
+    """
+
+    COL_NAME, COL_VALUE, COL_TREND = range(3)
+    HISTORY_ROLE = Qt.ItemDataRole.UserRole + 1
+
+    _HEADERS = ("Sensor", "Value", "Trend")
+
+    def __init__(self, store, parent=None, history: int = 240):
+        super().__init__(parent)
+        self._store = store
+        self._history_len = history
+        self._names = store.names()
+        self._row_of = {k: i for i, k in enumerate(self._names)}
+        self._dirty_rows = set()
+        store.channelsChanged.connect(self._on_channels_changed)
+        store.changed.connect(self._on_changed)
+
+    # --- Qt model API ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == self.COL_NAME:
+                return name
+            if col == self.COL_VALUE:
+                return self._store.text(name)
+            return None
+        if role == self.HISTORY_ROLE and col == self.COL_TREND:
+            return self._store.values(name)[-self._history_len:]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if col == self.COL_VALUE:
+                return Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    # --- Store notifications ---
+    def channel_names(self):
+        return list(self._names)
+
+    def _on_channels_changed(self, names):
+        # Channel set changed (first snapshot, or PIDs appeared/disappeared): rebuild rows
+        self.beginResetModel()
+        self._names = list(names)
+        self._row_of = {k: i for i, k in enumerate(self._names)}
+        # The reset repaints everything; pending row numbers are stale
+        self._dirty_rows.clear()
+        self.endResetModel()
+
+    def _on_changed(self, names):
+        for k in names:
+            row = self._row_of.get(k)
+            if row is not None:
+                self._dirty_rows.add(row)
+
+    def flush(self):
+        """Emit dataChanged for every row updated since the last flush."""
+        rows, self._dirty_rows = sorted(self._dirty_rows), set()
+        self._emit_ranges(rows, self.COL_VALUE, self.COL_TREND)
+
+    def _emit_ranges(self, rows, first_col, last_col):
+        # One dataChanged per contiguous run of rows keeps signal traffic small
+        if not rows:
+            return
+        start = prev = rows[0]
+        for r in rows[1:]:
+            if r != prev + 1:
+                self.dataChanged.emit(self.index(start, first_col), self.index(prev, last_col))
+                start = r
+            prev = r
+        self.dataChanged.emit(self.index(start, first_col), self.index(prev, last_col))
+
+
+class LiveRowDelegate(QStyledItemDelegate):
+    """Paints the name, value and an inline sparkline directly with QPainter.
+    The view only asks for visible cells, so off-screen rows cost nothing."""
+
+    def __init__(self, parent=None, name_color="#f2f6fb", value_color="#9aa6bd",
+                 line_color=DEFAULT_PEN_COLOR):
+        super().__init__(parent)
+        self._name_color = QColor(name_color)
+        self._value_color = QColor(value_color)
+        self._pen = QPen(QColor(*line_color))
+        self._pen.setWidthF(1.2)
+        self._pen.setCosmetic(True)
+
+    def paint(self, painter: QPainter, option, index):
+        painter.save()
+        try:
+            if option.state & QStyle.StateFlag.State_Selected:
+                painter.fillRect(option.rect, option.palette.highlight())
+            rect = QRectF(option.rect).adjusted(12, 4, -12, -4)
+            col = index.column()
+            if col == LiveTableModel.COL_TREND:
+                self._paint_sparkline(painter, rect, index.data(LiveTableModel.HISTORY_ROLE))
+            else:
+                font = QFont(option.font)
+                if col == LiveTableModel.COL_VALUE:
+                    font.setBold(True)
+                    painter.setPen(self._value_color)
+                else:
+                    painter.setPen(self._name_color)
+                painter.setFont(font)
+                align = index.data(Qt.ItemDataRole.TextAlignmentRole)
+                painter.drawText(rect, align, str(index.data() or ""))
+        finally:
+            painter.restore()
+
+    def _paint_sparkline(self, painter: QPainter, rect: QRectF, values):
+        if values is None or len(values) < 2:
+            return
+        pts = sparkline_polygon(values, rect)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.setPen(self._pen)
+        painter.drawPolyline(pts)
+
+
+class LiveTableView(QTableView):
+    """QTableView preconfigured for the live page: fixed row height, no grid,
+    no per-row widgets."""
+
+    def __init__(self, parent=None, row_height: int = 48):
+        super().__init__(parent)
+        self.setObjectName("LiveTable")
+        self.setShowGrid(False)
+        self.setAlternatingRowColors(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setWordWrap(False)
+        vh = self.verticalHeader()
+        vh.hide()
+        # Fixed section size lets the view compute row positions without measuring rows
+        vh.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vh.setDefaultSectionSize(row_height)
+        self.setItemDelegate(LiveRowDelegate(self))
+
+    def setModel(self, model):
+        super().setModel(model)
+        # Sections only exist once a model is set
+        hh = self.horizontalHeader()
+        hh.setSectionResizeMode(LiveTableModel.COL_NAME, QHeaderView.ResizeMode.Stretch)
+        hh.setSectionResizeMode(LiveTableModel.COL_VALUE, QHeaderView.ResizeMode.Fixed)
+        hh.setSectionResizeMode(LiveTableModel.COL_TREND, QHeaderView.ResizeMode.Stretch)
+        hh.resizeSection(LiveTableModel.COL_VALUE, 180)
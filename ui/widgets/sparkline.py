@@ -1,72 +1,132 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
-from PyQt6.QtCore import Qt
-from collections import deque
-import pyqtgraph as pg
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QColor, QPainter, QPainterPath, QPen, QPolygonF
+
+from ..utils.render_scheduler import get_render_scheduler
+
+
+DEFAULT_PEN_COLOR = (120, 200, 255)
+
+
+def sparkline_polygon(values, rect: QRectF) -> QPolygonF:
+    """Scale `values` (any sequence / ndarray) into `rect`, oldest at the left."""
+    import numpy as np
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n < 2:
+        return QPolygonF()
+    lo, hi = float(y.min()), float(y.max())
+    span = (hi - lo) or 1.0
+    xs = np.linspace(rect.left(), rect.right(), n)
+    ys = rect.bottom() - (y - lo) * (rect.height() / span)
+    return QPolygonF([QPointF(x, v) for x, v in zip(xs.tolist(), ys.tolist())])
 
 
 class Sparkline(QWidget):
-    """Minimal inline sparkline widget.
+    """Minimal inline sparkline widget drawn directly with QPainter.
 
     API:
       - append(value: float)
       - clear()
       - setBufferSize(n: int)
+      - set_source(store, name): draw a ChannelStore channel instead of own samples
+
+    Samples live in a preallocated NumPy ring buffer. The painter path is cached
+    and only rebuilt after new data or a resize. Repaints go through the shared
+    render scheduler: at most one per frame, none while the widget is hidden.
     """
 
     def __init__(self, parent=None, buffer_size: int = 240, pen=None):
         super().__init__(parent)
-        self._buffer_size = buffer_size
-        self._buf = deque(maxlen=self._buffer_size)
+        from ..utils.buffers import RingBuffer
+        self._buf = RingBuffer(buffer_size)
+        if pen is None:
+            pen = QPen(QColor(*DEFAULT_PEN_COLOR))
+            pen.setWidthF(1.2)
+        elif not isinstance(pen, QPen):
+            # accept pyqtgraph-style pens/colors for compatibility
+            pen = QPen(QColor(pen))
+        pen.setCosmetic(True)
+        self._pen = pen
+        self._path = None
+        self._store = None
+        self._channel = None
+        self._render = get_render_scheduler()
+        self._render.register(self, self.update)
 
-        self._layout = QVBoxLayout(self)
-        self._layout.setContentsMargins(0, 0, 0, 0)
-
-        self.plot = pg.PlotWidget()
-        # compact plot: no padding and small margins
         self.setContentsMargins(0, 0, 0, 0)
-        self.plot.setMinimumWidth(120)
-        self.plot.setMaximumWidth(220)
-        self.plot.setBackground(None)
-        self.plot.setMouseEnabled(x=False, y=False)
-        # hide axes for a compact sparkline look
-        try:
-            self.plot.hideAxis('left')
-            self.plot.hideAxis('bottom')
-        except Exception:
-            pass
-        self.plot.setMenuEnabled(False)
-        self.plot.showGrid(x=False, y=False)
-        self._pen = pen or pg.mkPen(color=(120, 200, 255), width=1)
-        self._curve = self.plot.plot([], [], pen=self._pen)
-
-        self._layout.addWidget(self.plot)
+        self.setMinimumWidth(120)
+        self.setMaximumWidth(220)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
 
+    # --- data ---
     def append(self, value: float):
         try:
             self._buf.append(float(value))
         except Exception:
             return
-        # Update curve with current buffer values
-        try:
-            self._curve.setData(list(self._buf))
-        except Exception:
-            pass
+        self._invalidate()
 
     def clear(self):
         self._buf.clear()
-        try:
-            self._curve.setData([])
-        except Exception:
-            pass
+        self._invalidate()
 
     def setBufferSize(self, n: int):
-        if n == self._buffer_size:
+        if n == self._buf.capacity:
             return
-        # recreate buffer with new size, keep most recent values
-        vals = list(self._buf)
-        self._buffer_size = n
-        self._buf = deque(vals[-n:], maxlen=n)
+        # keep most recent values
+        self._buf.resize(n)
+        self._invalidate()
+
+    def set_source(self, store, name: str):
+        """Read samples from `store` channel `name` (a zero-copy view of the newest
+        `buffer_size` samples) instead of the internal buffer. Pass store=None to detach."""
+        if self._store is not None:
+            try:
+                self._store.changed.disconnect(self._on_store_changed)
+            except (TypeError, RuntimeError):
+                pass
+        self._store, self._channel = store, name
+        if store is not None:
+            store.changed.connect(self._on_store_changed)
+        self._invalidate()
+
+    def _on_store_changed(self, names):
+        if self._channel in names:
+            self._invalidate()
+
+    def values(self):
+        if self._store is not None:
+            return self._store.values(self._channel)[-self._buf.capacity:]
+        return self._buf.view()
+
+    # --- painting ---
+    def _invalidate(self):
+        self._path = None
+        self._render.mark_dirty(self)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._path = None
+
+    def _build_path(self) -> QPainterPath:
+        path = QPainterPath()
+        rect = QRectF(self.rect()).adjusted(1, 2, -1, -2)
+        poly = sparkline_polygon(self.values(), rect)
+        if not poly.isEmpty():
+            path.addPolygon(poly)
+        return path
+
+    def paintEvent(self, event):
+        if len(self.values()) < 2:
+            return
+        if self._path is None:
+            self._path = self._build_path()
+        p = QPainter(self)
         try:
-            self._curve.setData(list(self._buf))
-        except Exception:
-            pass
+            p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+            p.setPen(self._pen)
+            p.drawPath(self._path)
+        finally:
+            p.end()
@@ -1,4 +1,7 @@
-from PyQt6.QtCore import Qt
+import os
+import time
+
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QStackedWidget,
@@ -6,21 +9,70 @@ from PyQt6.QtWidgets import (
 )
 
 from ..api_client import ApiClient
-from ..pages.landing_page import LandingPage
-from ..pages.dtc_page import DtcPage
-from ..pages.live_page import LivePage
-from ..pages.freeze_page import FreezePage
-from ..pages.clear_page import ClearPage
+from ..utils.channel_store import ChannelStore
+from ..utils.shutdown import ShutdownCoordinator
+from ..utils.workers import clear_pools
+
+
+# Page factories, in stack/nav order. Each imports its page module on first use,
+# so a page costs nothing until the user opens it.
+def _landing_page(main):
+    from ..pages.landing_page import LandingPage
+    return LandingPage(main)
+
+
+def _dtc_page(main):
+    from ..pages.dtc_page import DtcPage
+    return DtcPage(main)
+
+
+def _live_page(main):
+    from ..pages.live_page import LivePage
+    return LivePage(main)
+
+
+def _freeze_page(main):
+    from ..pages.freeze_page import FreezePage
+    return FreezePage(main)
+
+
+def _clear_page(main):
+    from ..pages.clear_page import ClearPage
+    return ClearPage(main)
+
+
+def _monitors_page(main):
+    from ..pages.monitors_page import MonitorsPage
+    return MonitorsPage(main)
+
+
+PAGE_FACTORIES = [
+    ("landing", _landing_page),  # 0
+    ("dtc", _dtc_page),          # 1
+    ("live", _live_page),        # 2
+    ("freeze", _freeze_page),    # 3
+    ("clear", _clear_page),      # 4
+    ("monitors", _monitors_page),  # 5
+]
+
+# Pages with RELEASE_WHEN_IDLE = True are torn down after this long off-screen
+# (rebuilt on the next visit). Override with OBDPLUS_PAGE_IDLE_SECONDS; 0 disables.
+DEFAULT_PAGE_IDLE_SECONDS = 300
+
+# Upper bound for everything closeEvent does after the window is hidden
+SHUTDOWN_DEADLINE_SECONDS = 1.5
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, page_idle_seconds: float = None):
         super().__init__()
         self.setWindowTitle("OBD++ Desktop")
         self.resize(1100, 720)
 
         self.api = ApiClient()
         self.connected = False
+        # Live samples shared by every live visualization
+        self.channels = ChannelStore(parent=self)
 
         # Central layout: side menu + stacked pages
         central = QWidget()
@@ -34,18 +86,24 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         root.addWidget(self.stack, 1)
 
-        # Pages
-        self.page_landing = LandingPage(self)
-        self.page_dtc = DtcPage(self)
-        self.page_live = LivePage(self)
-        self.page_freeze = FreezePage(self)
-        self.page_clear = ClearPage(self)
+        # Pages: the stack starts with empty placeholders; goto_page builds the
+        # real page from its factory the first time it is shown.
+        self._pages = [None] * len(PAGE_FACTORIES)
+        self._left_at = {}  # index -> time the page was last deactivated
+        for _ in PAGE_FACTORIES:
+            self.stack.addWidget(QWidget())
 
-        self.stack.addWidget(self.page_landing)  # 0
-        self.stack.addWidget(self.page_dtc)      # 1
-        self.stack.addWidget(self.page_live)     # 2
-        self.stack.addWidget(self.page_freeze)   # 3
-        self.stack.addWidget(self.page_clear)    # 4
+        if page_idle_seconds is None:
+            try:
+                page_idle_seconds = float(os.environ.get("OBDPLUS_PAGE_IDLE_SECONDS", DEFAULT_PAGE_IDLE_SECONDS))
+            except ValueError:
+                page_idle_seconds = DEFAULT_PAGE_IDLE_SECONDS
+        self.page_idle_seconds = page_idle_seconds
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setInterval(int(min(60.0, max(5.0, page_idle_seconds / 4)) * 1000))
+        self._idle_timer.timeout.connect(self._release_idle_pages)
+        if page_idle_seconds > 0:
+            self._idle_timer.start()
 
         self.setCentralWidget(central)
 
@@ -59,6 +117,7 @@ class MainWindow(QMainWindow):
         self.btn_live.clicked.connect(lambda: self.goto_page(2))
         self.btn_freeze.clicked.connect(lambda: self.goto_page(3))
         self.btn_clear.clicked.connect(lambda: self.goto_page(4))
+        self.btn_monitors.clicked.connect(lambda: self.goto_page(5))
 
         # File -> Exit action
         exit_action = QAction("Exit", self)
@@ -81,9 +140,11 @@ class MainWindow(QMainWindow):
         self.btn_live = QPushButton("Live Sensor Data")
         self.btn_freeze = QPushButton("Freeze Frame Data")
         self.btn_clear = QPushButton("Clear Codes")
+        self.btn_monitors = QPushButton("Monitor Tests")
 
         # Keep nav buttons in a list in the same order as stack pages
-        self.nav_buttons = [self.btn_home, self.btn_dtc, self.btn_live, self.btn_freeze, self.btn_clear]
+        self.nav_buttons = [self.btn_home, self.btn_dtc, self.btn_live, self.btn_freeze, self.btn_clear,
+                            self.btn_monitors]
 
         for b in self.nav_buttons:
             b.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -104,13 +165,14 @@ class MainWindow(QMainWindow):
         self.btn_live.setEnabled(enabled)
         self.btn_freeze.setEnabled(enabled)
         self.btn_clear.setEnabled(enabled)
+        self.btn_monitors.setEnabled(enabled)
 
     def set_connected(self, ok: bool):
         self.connected = ok
         self._update_nav_state()
         # Keep LandingPage controls in sync (connect/disconnect buttons & status)
         try:
-            if hasattr(self, "page_landing") and self.page_landing:
+            if self.page_landing:
                 page = self.page_landing
                 page.status.setText("Status: Connected" if ok else "Status: Disconnected")
                 # Ensure buttons reflect connection state
@@ -125,17 +187,94 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
+    # --- Page lifecycle ---
+    @property
+    def page_landing(self):
+        return self._pages[0]
+
+    @property
+    def page_dtc(self):
+        return self._pages[1]
+
+    @property
+    def page_live(self):
+        return self._pages[2]
+
+    @property
+    def page_freeze(self):
+        return self._pages[3]
+
+    @property
+    def page_clear(self):
+        return self._pages[4]
+
+    @property
+    def page_monitors(self):
+        return self._pages[5]
+
+    def page(self, index: int, create: bool = True):
+        """The page widget at `index`, built from its factory on first request."""
+        page = self._pages[index]
+        if page is None and create:
+            page = PAGE_FACTORIES[index][1](self)
+            self._swap_stack_widget(index, page)
+            self._pages[index] = page
+        return page
+
+    def _swap_stack_widget(self, index: int, widget: QWidget):
+        old = self.stack.widget(index)
+        current = self.stack.currentIndex() == index
+        self.stack.insertWidget(index, widget)
+        self.stack.removeWidget(old)
+        old.deleteLater()
+        if current:
+            self.stack.setCurrentIndex(index)
+
+    def release_page(self, index: int) -> bool:
+        """Tear down a built, inactive page; it is rebuilt on the next goto_page."""
+        page = self._pages[index]
+        if page is None or self.stack.currentIndex() == index:
+            return False
+        if hasattr(page, "release"):
+            try:
+                page.release()
+            except Exception as e:
+                print(f"[MainWindow] release() failed for page {PAGE_FACTORIES[index][0]}: {e}")
+        self._pages[index] = None
+        self._left_at.pop(index, None)
+        self._swap_stack_widget(index, QWidget())
+        return True
+
+    def _release_idle_pages(self):
+        if self.page_idle_seconds <= 0:
+            return
+        now = time.monotonic()
+        for index, left in list(self._left_at.items()):
+            page = self._pages[index]
+            if page is None or not getattr(page, "RELEASE_WHEN_IDLE", False):
+                continue
+            if now - left >= self.page_idle_seconds:
+                self.release_page(index)
+
     def goto_page(self, index: int):
         # Notify old page of deactivation if it supports it
-        old_widget = self.stack.currentWidget()
+        old_index = self.stack.currentIndex()
+        old_widget = self._pages[old_index] if old_index >= 0 else None
+        if old_widget is not None and old_index != index:
+            self._left_at[old_index] = time.monotonic()
         if hasattr(old_widget, "on_deactivated"):
             try:
                 old_widget.on_deactivated()
             except Exception:
                 pass
 
+        try:
+            w = self.page(index)
+        except Exception as e:
+            QMessageBox.warning(self, "Page Error", f"Could not open page: {e}")
+            return
+        self._left_at.pop(index, None)
         self.stack.setCurrentIndex(index)
-        w = self.stack.currentWidget()
         # update nav button checked state (nav_buttons list mirrors page indices)
         try:
             for i, b in enumerate(getattr(self, "nav_buttons", [])):
@@ -149,13 +288,20 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Page Error", str(e))
 
     def closeEvent(self, event):
-        # Best-effort: stop live and disconnect
-        try:
-            self.api.stop_live()
-        except Exception:
-            pass
-        try:
-            self.api.disconnect()
-        except Exception:
-            pass
+        # Bounded shutdown: the window goes away at once and the backend calls run
+        # in parallel under one deadline, so a dead backend or adapter cannot hang the exit.
+        self.hide()
+        # GUI-thread work first: stop acquisition timers and drop pending calls
+        live = self.page_live
+        if live is not None:
+            live.timer.stop()
+        self._idle_timer.stop()
+        clear_pools()
+
+        coordinator = ShutdownCoordinator(SHUTDOWN_DEADLINE_SECONDS)
+        if self.api.transport_ready:
+            # Nothing to stop when the backend was never used
+            coordinator.add("stop_live", lambda: self.api.shutdown_stop_live(timeout=1))
+            coordinator.add("disconnect", lambda: self.api.shutdown_disconnect(timeout=1))
+        coordinator.run()
         return super().closeEvent(event)
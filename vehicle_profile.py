@@ -0,0 +1,505 @@
+"""
+Vehicle identity (Mode 09) and the per-VIN profile store.
+
+On every connection the VIN, calibration IDs and CVNs are read once. The
+profile for that VIN (one JSON file per vehicle in the user data directory)
+remembers what discovery found last time: the protocol, the supported
+commands, the ECU addresses that answered, which ECU answers each command
+(see ecu_targeting.py) and learned per-command response latencies.
+
+ProfiledOBD is python-obd's OBD with the command discovery step replaced:
+for a known VIN whose calibration IDs still match, the supported set comes
+from the profile and the PID bitmap queries (0100/0120/.../0600...) are not
+sent at all. The protocol used last time on the same port is tried first,
+so auto-detection is skipped as well.
+"""
+import json
+import os
+import threading
+import time
+
+import ecu_targeting
+from app_paths import user_data_dir
+from lazy_import import lazy_module
+
+obd = lazy_module("obd")
+
+PROFILE_VERSION = 1
+LATENCY_ALPHA = 0.2  # weight of a new sample in the latency moving average
+# Advertised PIDs no ECU answers this many times in a row are dropped for the connection
+MAX_NULL_DISCOVERIES = 3
+
+
+def _text(value):
+    """Mode 09 values come back as bytes (or lists of them); normalize to str."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("ascii", errors="replace").strip("\x00 ").strip() or None
+    return str(value).strip() or None
+
+
+def _text_list(value):
+    if value is None:
+        return []
+    items = value if isinstance(value, (list, tuple)) else [value]
+    return [t for t in (_text(v) for v in items) if t]
+
+
+class VehicleProfile:
+    def __init__(self, vin, calibration_ids=None, cvns=None, protocol=None, supported=None,
+                 ecus=None, latencies=None, created=None, updated=None, connects=0, extra=None,
+                 responders=None):
+        self.vin = vin
+        self.calibration_ids = list(calibration_ids or [])
+        self.cvns = list(cvns or [])
+        self.protocol = protocol
+        self.supported = sorted(supported or [])   # python-obd command names
+        self.ecus = dict(ecus or {})               # CAN/K-line tx id (hex) -> role
+        self.latencies = dict(latencies or {})     # command name -> seconds (moving average)
+        self.responders = dict(responders or {})   # command name -> [tx id (hex)] answering it
+        self.created = created or time.time()
+        self.updated = updated or self.created
+        self.connects = connects
+        self.extra = dict(extra or {})             # room for later additions, kept on save
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def record_latency(self, name: str, seconds: float):
+        with self._lock:
+            old = self.latencies.get(name)
+            self.latencies[name] = seconds if old is None else old + LATENCY_ALPHA * (seconds - old)
+            self.dirty = True
+
+    def record_responders(self, name: str, tx_ids):
+        with self._lock:
+            self.responders[name] = [f"{t:X}" for t in tx_ids]
+            self.dirty = True
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "version": PROFILE_VERSION,
+                "vin": self.vin,
+                "calibration_ids": self.calibration_ids,
+                "cvns": self.cvns,
+                "protocol": self.protocol,
+                "supported": self.supported,
+                "ecus": self.ecus,
+                "latencies": {k: round(v, 5) for k, v in self.latencies.items()},
+                "responders": dict(self.responders),
+                "created": self.created,
+                "updated": self.updated,
+                "connects": self.connects,
+                **({"extra": self.extra} if self.extra else {}),
+            }
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        if d.get("version") != PROFILE_VERSION or not d.get("vin"):
+            return None
+        return cls(
+            d["vin"], d.get("calibration_ids"), d.get("cvns"), d.get("protocol"), d.get("supported"),
+            d.get("ecus"), d.get("latencies"), d.get("created"), d.get("updated"), d.get("connects", 0),
+            d.get("extra"), d.get("responders"),
+        )
+
+
+class ProfileStore:
+    """One JSON file per VIN, plus ports.json mapping a port to the last vehicle seen on it."""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            self._directory = user_data_dir("profiles")
+        return self._directory
+
+    def _path(self, vin: str):
+        safe = "".join(c for c in vin.upper() if c.isalnum())
+        return self.directory / f"{safe}.json"
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, data):
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def load(self, vin: str):
+        if not vin:
+            return None
+        with self._lock:
+            data = self._read(self._path(vin))
+        return VehicleProfile.from_dict(data) if data else None
+
+    def save(self, profile: VehicleProfile):
+        profile.updated = time.time()
+        data = profile.to_dict()
+        try:
+            with self._lock:
+                self._write(self._path(profile.vin), data)
+            profile.dirty = False
+        except OSError as e:
+            print(f"[vehicle_profile] Could not save profile {profile.vin}: {e}")
+
+    def last_for_port(self, port) -> dict:
+        """{"vin", "protocol"} last seen on `port` (auto-detected ports share the "None" entry), or {}."""
+        with self._lock:
+            ports = self._read(self.directory / "ports.json") or {}
+        return ports.get(str(port), {})
+
+    def remember_port(self, port, vin, protocol):
+        path = self.directory / "ports.json"
+        try:
+            with self._lock:
+                ports = self._read(path) or {}
+                ports[str(port)] = {"vin": vin, "protocol": protocol}
+                self._write(path, ports)
+        except OSError as e:
+            print(f"[vehicle_profile] Could not save port hint: {e}")
+
+
+store = ProfileStore()
+
+
+def read_identity(conn) -> dict:
+    """VIN, calibration IDs and CVNs (Mode 09 02/04/06), forced: python-obd does not probe Mode 09."""
+    identity = {"vin": None, "calibration_ids": [], "cvns": []}
+    for key, name in (("vin", "VIN"), ("calibration_ids", "CALIBRATION_ID"), ("cvns", "CVN")):
+        cmd = getattr(obd.commands, name, None)
+        if cmd is None:
+            continue
+        try:
+            response = conn.query(cmd, force=True)
+        except Exception as e:
+            print(f"[vehicle_profile] {name} error: {e}")
+            continue
+        if response.is_null():
+            continue
+        identity[key] = _text(response.value) if key == "vin" else _text_list(response.value)
+    return identity
+
+
+def ecu_addresses(conn) -> dict:
+    """tx id -> ECU role for the ECUs that answered at connect (empty if the adapter hides it)."""
+    try:
+        ecu_map = conn.interface._ELM327__protocol.ecu_map
+    except AttributeError:
+        return {}
+    roles = {getattr(obd.ECU, n): n for n in ("ENGINE", "TRANSMISSION") if hasattr(obd.ECU, n)}
+    return {f"{tx_id:X}": roles.get(ecu, "UNKNOWN") for tx_id, ecu in ecu_map.items()}
+
+
+_profiled_class = None
+
+
+def _profiled_obd_class():
+    global _profiled_class
+    if _profiled_class is not None:
+        return _profiled_class
+
+    _NOT_LEARNED = object()
+
+    class ProfiledOBD(obd.OBD):
+        """OBD whose command discovery is replaced by the stored profile for known
+        vehicles, and which addresses Mode 01 requests to the ECU that answers them."""
+
+        _bits = None         # CAN id size once targeting is set up; None = plain python-obd
+        _targets = None      # command name -> ecu_targeting.Target, or None (stay functional)
+        _functional = None   # command name -> copy with the functional header
+        _null_discoveries = None  # command name -> unanswered discovery requests in a row
+        _rx_filter = None    # receive filter currently set on the adapter
+        _cra_ok = True       # False once the adapter rejected AT CRA
+        tuner = None         # elm_tuning.AdapterTuner, set by OBDManager after connecting
+
+        def _OBD__load_commands(self):
+            self.identity = {"vin": None, "calibration_ids": [], "cvns": []}
+            self.profile = None
+            self.discovery_skipped = False
+            if self.status() != obd.OBDStatus.CAR_CONNECTED:
+                return super()._OBD__load_commands()
+
+            self.identity = read_identity(self)
+            vin = self.identity["vin"]
+            profile = store.load(vin)
+            if (profile is not None and profile.supported
+                    and profile.calibration_ids == self.identity["calibration_ids"]):
+                self.supported_commands |= {
+                    obd.commands[n] for n in profile.supported if obd.commands.has_name(n)
+                }
+                self.discovery_skipped = True
+                print(f"[vehicle_profile] Known vehicle {vin}: discovery skipped "
+                      f"({len(self.supported_commands)} commands from profile)")
+            else:
+                super()._OBD__load_commands()
+                if vin:
+                    old = profile
+                    profile = VehicleProfile(
+                        vin, self.identity["calibration_ids"], self.identity["cvns"],
+                        supported=[c.name for c in self.supported_commands],
+                        # A reflash changes calibration IDs; keep what the bus taught us
+                        latencies=old.latencies if old else None,
+                        created=old.created if old else None,
+                        connects=old.connects if old else 0,
+                        extra=old.extra if old else None,
+                        responders=old.responders if old else None,
+                    )
+            if profile is not None:
+                profile.cvns = self.identity["cvns"] or profile.cvns
+                profile.protocol = self.protocol_id()
+                profile.ecus = ecu_addresses(self) or profile.ecus
+                profile.connects += 1
+                store.save(profile)
+            self.profile = profile
+            self._setup_targeting()
+
+        # --- ECU targeting (CAN only) ---
+        def _setup_targeting(self):
+            bits = ecu_targeting.id_bits(self.protocol_id())
+            if bits is None:
+                return
+            self._targets, self._functional, self._null_discoveries = {}, {}, {}
+            if self.profile is not None:
+                for name, tx_ids in self.profile.responders.items():
+                    if obd.commands.has_name(name):
+                        cmd = obd.commands[name]
+                        self._targets[name] = (ecu_targeting.build_target(cmd, bits, int(tx_ids[0], 16))
+                                               if tx_ids else None)
+            # python-obd assumes the adapter starts on the engine header (7E0) while the ELM
+            # actually starts functional (7DF); make it send AT SH before the next request
+            self._OBD__last_header = None
+            self._bits = bits
+
+        def _set_filter(self, rx_filter):
+            if rx_filter == self._rx_filter or (rx_filter and not self._cra_ok):
+                return
+            try:
+                lines = self.interface._ELM327__send(b"ATCRA" + (rx_filter or b""))
+            except AttributeError:
+                lines = ["?"]
+            if any("?" in str(line) for line in lines or []):
+                # Old or clone chip without CAN receive filters: physical addressing alone still
+                # limits the answers to one ECU
+                self._cra_ok = False
+                self._rx_filter = None
+                return
+            self._rx_filter = rx_filter
+
+        def _functional_copy(self, cmd, ecu=None):
+            key = (cmd.name, ecu)
+            copy = self._functional.get(key)
+            if copy is None:
+                copy = self._functional[key] = ecu_targeting.with_header(
+                    cmd, ecu_targeting.functional_header(self._bits), ecu)
+            return copy
+
+        def _OBD__build_command_string(self, cmd):
+            # Replaces python-obd's `fast` mode: the response count comes from the tuner,
+            # and the "repeat last command" empty CR is never used (clones get it wrong)
+            command = cmd.command
+            n = self.tuner.hint(cmd) if self.tuner is not None else None
+            if n:
+                command += b"%X" % n
+            return command
+
+        def query(self, cmd, force=False):
+            response = self._query(cmd, force)
+            if self.tuner is not None:
+                self.tuner.observe(cmd, response)
+            return response
+
+        def _query(self, cmd, force):
+            if self._bits is None or (not force and not self.supports(cmd)):
+                return super().query(cmd, force)
+            if cmd.command[:2] not in ecu_targeting.SAE_MODES:
+                # Manufacturer services (enhanced_pids.py) are addressed by their own header
+                self._set_filter(ecu_targeting.response_filter(self._bits, cmd.header))
+                return super().query(cmd, force)
+            if cmd.header != ecu_targeting.DEFAULT_HEADER:
+                return super().query(cmd, force)
+            if cmd.command[:2] != b"01":
+                # DTC reads, freeze frames, Mode 09...: every ECU is asked
+                self._set_filter(None)
+                return super().query(self._functional_copy(cmd), force=True)
+
+            target = self._targets.get(cmd.name, _NOT_LEARNED)
+            if target is _NOT_LEARNED:
+                # Discovery: one functional request, every answer kept to see who responds
+                self._set_filter(None)
+                response = super().query(self._functional_copy(cmd, obd.ECU.ALL), force=True)
+                if response.is_null():
+                    misses = self._null_discoveries[cmd.name] = self._null_discoveries.get(cmd.name, 0) + 1
+                    if misses >= MAX_NULL_DISCOVERIES:
+                        # Advertised in the support bitmap but never answered: stop probing it
+                        # every cycle (for this connection only; the profile keeps it)
+                        self.supported_commands.discard(cmd)
+                        print(f"[vehicle_profile] {cmd.name} never answered; not queried again")
+                    return cmd(response.messages)  # nobody answered: try again next time (up to the limit)
+                self._null_discoveries.pop(cmd.name, None)
+                found = ecu_targeting.responders(response.messages, cmd)
+                self._targets[cmd.name] = (ecu_targeting.build_target(cmd, self._bits, found[0])
+                                           if found else None)
+                if self.profile is not None:
+                    self.profile.record_responders(cmd.name, found)
+                return cmd(response.messages)
+            if target is None:
+                self._set_filter(None)
+                return super().query(self._functional_copy(cmd), force=True)
+
+            self._set_filter(target.rx_filter)
+            response = super().query(target.command, force=True)
+            tuner = self.tuner
+            if tuner is not None:
+                if response.is_null() and tuner.hint(target.command):
+                    # The adapter mishandled the response count: retry once without it
+                    tuner.hint_failed(target.command)
+                    response = super().query(target.command, force=True)
+                # One ECU answers a targeted request, so its frame count is a safe hint
+                tuner.learn(target.command, response)
+            if response.is_null():
+                # ECU stopped answering on its physical address: learn again next time
+                self._targets.pop(cmd.name, None)
+            return response
+
+        # --- pipelining (STN adapters on a TCP port, see tcp_transport.py) ---
+        @property
+        def pipeline_depth(self) -> int:
+            """Requests the adapter takes in flight: >1 only for a targeting STN chip on a pipelining port."""
+            port = getattr(self.interface, "_ELM327__port", None)
+            depth = getattr(port, "pipeline_depth", 1)
+            if depth <= 1 or self._bits is None or self.tuner is None or not self.tuner.stn:
+                return 1
+            return depth
+
+        def _on_target(self, target) -> bool:
+            """True when the adapter is already addressed to `target` (header and filter)."""
+            return (self._OBD__last_header == target.header
+                    and self._rx_filter == (target.rx_filter if self._cra_ok else None))
+
+        def query_many(self, cmds, force=False):
+            """
+            Responses for `cmds`, in order. Targeted Mode 01 commands, manufacturer
+            requests and the broadcast SAE reads (DTCs, freeze frame, Mode 09) for the
+            header the adapter is already addressed to are pipelined; everything else
+            (and anything a pipelined batch lost) goes through query().
+            """
+            depth = self.pipeline_depth
+            if depth <= 1:
+                return [self.query(c, force) for c in cmds]
+            responses = [None] * len(cmds)
+            batch = []  # (index, command, target)
+
+            for i, cmd in enumerate(cmds):
+                target = self._pipeline_target(cmd, force)
+                if target is not None and self._on_target(target):
+                    batch.append((i, cmd, target))
+                    if len(batch) >= depth:
+                        self._flush_pipeline(batch, responses, force)
+                else:
+                    self._flush_pipeline(batch, responses, force)
+                    # Sets header and filter the usual way; the next commands for this ECU pipeline
+                    responses[i] = self.query(cmd, force)
+            self._flush_pipeline(batch, responses, force)
+            return responses
+
+        def _pipeline_target(self, cmd, force=False):
+            """Where `cmd` goes if it can be pipelined (a learned Mode 01 target, a
+            physically addressed manufacturer request or a broadcast SAE read), else None."""
+            if not force and not self.supports(cmd):
+                return None
+            if cmd.command[:2] not in ecu_targeting.SAE_MODES:
+                rx_filter = ecu_targeting.response_filter(self._bits, cmd.header)
+                return ecu_targeting.Target(cmd, cmd.header, rx_filter) if rx_filter else None
+            if cmd.header != ecu_targeting.DEFAULT_HEADER:
+                return None
+            if cmd.command[:2] != b"01":
+                # Every ECU is asked, with no receive filter (as in _query)
+                functional = self._functional_copy(cmd)
+                return ecu_targeting.Target(functional, functional.header, None)
+            target = self._targets.get(cmd.name)
+            return target if isinstance(target, ecu_targeting.Target) else None
+
+        def _flush_pipeline(self, batch, responses, force=False):
+            if not batch:
+                return
+            port = self.interface._ELM327__port
+            replies = port.pipeline([self._OBD__build_command_string(t.command) for _, _, t in batch])
+            for (i, cmd, target), lines in zip(batch, replies):
+                response = target.command(self.interface._ELM327__protocol(lines))
+                if response.is_null():
+                    # Lost in the batch: the single-request path retries, drops a bad hint or relearns
+                    responses[i] = self.query(cmd, force)
+                    continue
+                if self.tuner is not None:
+                    if target.command is not cmd and target.rx_filter is not None:
+                        # Learned Mode 01 target: one ECU answered, so its frame count is a safe hint
+                        self.tuner.learn(target.command, response)
+                    self.tuner.observe(cmd, response)
+                responses[i] = response
+            batch.clear()
+
+        def group_by_target(self, items):
+            """Order (name, command) pairs so commands for the same ECU are queried back to
+            back: the adapter's header and receive filter then change once per ECU."""
+            if not self._targets:
+                return list(items)
+
+            def key(item):
+                target = self._targets.get(item[1].name)
+                return target.header if isinstance(target, ecu_targeting.Target) else b""
+
+            return sorted(items, key=key)
+
+    _profiled_class = ProfiledOBD
+    return ProfiledOBD
+
+
+def open_connection(portstr=None, **kwargs):
+    """
+    Connect with ProfiledOBD. The protocol last used on this port is tried
+    first (no auto-detect); if the car does not answer on it, connect again
+    with auto-detection.
+    """
+    cls = _profiled_obd_class()
+    hint = store.last_for_port(portstr)
+    started = time.perf_counter()
+    conn = None
+    if hint.get("protocol") and "protocol" not in kwargs:
+        conn = cls(portstr, protocol=hint["protocol"], **kwargs)
+        if conn.status() != obd.OBDStatus.CAR_CONNECTED:
+            conn.close()
+            conn = None
+    if conn is None:
+        conn = cls(portstr, **kwargs)
+    conn.connect_seconds = time.perf_counter() - started
+    profile = getattr(conn, "profile", None)
+    if profile is not None:
+        store.remember_port(portstr, profile.vin, profile.protocol)
+    return conn
+
+
+def vehicle_info(conn) -> dict:
+    """What /vehicle reports for the current connection."""
+    if conn is None:
+        return {"connected": False}
+    profile = getattr(conn, "profile", None)
+    return {
+        "connected": conn.is_connected(),
+        "identity": getattr(conn, "identity", None),
+        "discovery_skipped": getattr(conn, "discovery_skipped", False),
+        "connect_seconds": getattr(conn, "connect_seconds", None),
+        "adapter": conn.tuner.status() if getattr(conn, "tuner", None) is not None else None,
+        "pipeline_depth": getattr(conn, "pipeline_depth", 1),
+        "enhanced_pids": conn.enhanced.status() if getattr(conn, "enhanced", None) is not None else None,
+        "profile": profile.to_dict() if profile is not None else None,
+    }